@@ -1,83 +1,168 @@
+import os
+import click
+from datetime import datetime
 from flask import Flask
+from flask.cli import with_appcontext
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_bcrypt import Bcrypt
 from flask_cors import CORS
-from apscheduler.schedulers.background import BackgroundScheduler
-import os
-from app.utils import setup_logging, handle_error, DatabaseManager
+from sqlalchemy import event
+from app.utils import setup_logging, handle_error, DatabaseManager, enable_sqlite_wal, get_logger
 
-# Initialize Flask app
-app = Flask(__name__)
-CORS(app)
+# Extensions are created unbound and attached to an app in create_app(), so
+# importing the package has no side effects
+logger = get_logger()
+db = SQLAlchemy()
+bcrypt = Bcrypt()
+login_manager = LoginManager()
+login_manager.login_view = 'api.login'
+db_manager = DatabaseManager()
 
-# Initialize logging
-logger = setup_logging()
+# Import models after db initialization to avoid circular imports
+from app.models import User, Game, Pick, WeeklyStanding, WeekSync, SchedulerLease, LiveEvent, DataVersion
+from app.standings import refresh_standings_for_games, rebuild_standings, check_standings
+from app.ingest import sync_games, plan_ingestion, record_sync
+from app.cache import week_schedule, bump_data_version, init_response_cache
+from app.events import leaderboard_snapshot, leaderboard_delta, record_ingest_events
 
-# Register error handler
-app.register_error_handler(Exception, handle_error)
+def create_app(config=None):
+    """Build an application instance; `config` overrides the environment defaults"""
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev_key_change_this_in_production')
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///../../data/nfl_pickems.db')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    if config:
+        app.config.update(config)
 
-# Configuration
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev_key_change_this_in_production')
-app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///../../data/nfl_pickems.db')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    if not app.testing:
+        setup_logging()
 
-# Initialize extensions
-db = SQLAlchemy(app)
-bcrypt = Bcrypt(app)
-login_manager = LoginManager(app)
-login_manager.login_view = 'login'
+    CORS(app)
+    db.init_app(app)
+    if app.config.get('SQLITE_WAL', True) and app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        with app.app_context():
+            event.listen(db.engine, 'connect', enable_sqlite_wal)
+    bcrypt.init_app(app)
+    login_manager.init_app(app)
+    db_manager.init_app(app)
+    init_response_cache(app)
 
-# Initialize database manager
-db_manager = DatabaseManager(app)
+    app.register_error_handler(Exception, handle_error)
 
-# Import models after db initialization to avoid circular imports
-from app.models import User, Game, Pick
+    from app.routes import api
+    app.register_blueprint(api)
+    app.cli.add_command(rebuild_standings_command)
+    app.cli.add_command(check_standings_command)
+    app.cli.add_command(reconcile_backups_command)
+    return app
 
 @login_manager.user_loader
 def load_user(user_id):
     return User.query.get(int(user_id))
 
+# Last sync time this process committed for each week, to notice a database
+# changed underneath it (e.g. restored from a backup by the web process)
+_committed_syncs = {}
+
+def _ingest_week(week, games, not_modified, now):
+    """Write one week's scoreboard and everything derived from it."""
+    if not_modified and week in _committed_syncs:
+        sync = db.session.get(WeekSync, week)
+        if sync is None or sync.last_synced_at != _committed_syncs[week]:
+            # Our validators describe rows that are no longer there; diff the payload instead
+            not_modified = False
+    
+    if not_modified:
+        # 304 from ESPN: the stored rows already match this payload
+        result = {'inserted': 0, 'updated': 0, 'unchanged': len(games), 'changed_games': [], 'decided_game_ids': []}
+    else:
+        result = sync_games(week, games)
+        # Keep the materialized leaderboard in step with newly decided games
+        before = leaderboard_snapshot(result['decided_game_ids'])
+        refresh_standings_for_games(result['decided_game_ids'])
+        changes = leaderboard_delta(before, leaderboard_snapshot(result['decided_game_ids']))
+        # Announced to SSE clients by each web process's event relay
+        record_ingest_events(week, result['changed_games'], changes, now)
+    
+    changed = bool(result['inserted'] or result['updated'])
+    record_sync(week, now, changed)
+    if changed:
+        bump_data_version(now)
+    db.session.commit()
+    _committed_syncs[week] = now
+    
+    if changed:
+        week_schedule.invalidate(week)
+    logger.info(
+        f"Successfully updated games for week {week}: "
+        f"{result['inserted']} inserted, {result['updated']} updated, "
+        f"{result['unchanged']} unchanged"
+    )
+    return result
+
 def update_games():
-    """Update games from ESPN API."""
+    """Update games from ESPN API for the weeks that need it."""
     try:
+        now = datetime.utcnow()
+        plan = plan_ingestion(now)
+        weeks = plan['weeks']
+        if not weeks and not plan['discover']:
+            logger.info("No weeks need an ESPN refresh")
+            return {}
+        
         from app.espn_api import ESPNAPI
-        espn_api = ESPNAPI()
-        current_week = espn_api.get_current_week()
-        games = espn_api.get_games(current_week)
+        # Validators are only kept once the week they describe is committed
+        espn_api = ESPNAPI(defer_validators=True)
+        results = {}
         
-        for game_data in games:
-            game = Game.query.filter_by(espn_id=game_data['espn_id']).first()
-            if not game:
-                game = Game(espn_id=game_data['espn_id'])
-                db.session.add(game)
-            
-            game.week = current_week
-            game.home_team = game_data['home_team']
-            game.away_team = game_data['away_team']
-            game.start_time = game_data['start_time']
-            
-            if game_data['is_finished']:
-                game.final_score_home = game_data['home_score']
-                game.final_score_away = game_data['away_score']
-                game.winner = game_data['home_team'] if game_data['home_score'] > game_data['away_score'] else game_data['away_team']
+        # The default scoreboard is the current week: one call returns both
+        # the week number and its games
+        current_week, games = espn_api.get_scoreboard()
+        results[current_week] = _ingest_week(current_week, games, espn_api.last_not_modified, now)
+        espn_api.commit_validators()
         
-        db.session.commit()
-        logger.info(f"Successfully updated games for week {current_week}")
+        for week in weeks:
+            if week in results:
+                continue
+            _, games = espn_api.get_scoreboard(week)
+            results[week] = _ingest_week(week, games, espn_api.last_not_modified, now)
+            espn_api.commit_validators()
+        
+        return results
         
     except Exception as e:
         logger.error(f"Error updating games: {str(e)}")
         db.session.rollback()
 
-# Initialize scheduler
-scheduler = BackgroundScheduler()
-scheduler.add_job(func=update_games, trigger="interval", minutes=10)
-scheduler.start()
+@click.command('rebuild-standings')
+@with_appcontext
+def rebuild_standings_command():
+    """Recompute the materialized leaderboard from scratch."""
+    rows = rebuild_standings()
+    print(f"Rebuilt {rows} standings rows")
+
+@click.command('check-standings')
+@with_appcontext
+def check_standings_command():
+    """Compare the materialized leaderboard against the live aggregation."""
+    mismatches = check_standings()
+    for mismatch in mismatches:
+        print(f"user {mismatch['user_id']} week {mismatch['week']}: "
+              f"expected {mismatch['expected']}, found {mismatch['actual']}")
+    if mismatches:
+        raise SystemExit(1)
+    print("Standings are consistent")
 
-# Import routes after everything is initialized
-from app import routes
+@click.command('reconcile-backups')
+@with_appcontext
+def reconcile_backups_command():
+    """Rebuild the backup metadata index from the backups on disk."""
+    result = db_manager.reconcile_backups()
+    print(f"Indexed {result['backups']} backups: {len(result['added'])} added, {len(result['removed'])} removed")
 
 if __name__ == '__main__':
+    app = create_app()
     with app.app_context():
         db.create_all()
     app.run(debug=True, host='0.0.0.0')
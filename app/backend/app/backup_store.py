@@ -0,0 +1,340 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import zlib
+from datetime import datetime
+
+CHUNK_SIZE = 256 * 1024  # A multiple of every SQLite page size, so unchanged pages dedupe
+DEFAULT_RETENTION = {'latest': 5, 'hourly': 24, 'daily': 7, 'weekly': 8}
+
+class GzipCodec:
+    """gzip members, readable with `gzip -d`; earlier stores wrote raw zlib under .gz"""
+    name = 'gzip'
+    extension = '.gz'
+
+    def compress(self, data):
+        # mtime=0 so the same chunk always compresses to the same bytes
+        return gzip.compress(data, 6, mtime=0)
+
+    def decompress(self, data):
+        if data[:2] == b'\x1f\x8b':
+            return gzip.decompress(data)
+        return zlib.decompress(data)
+
+class ZstdCodec:
+    """zstd compression; needs the optional `zstandard` package"""
+    name = 'zstd'
+    extension = '.zst'
+
+    def __init__(self):
+        import zstandard
+        self._compressor = zstandard.ZstdCompressor(level=3)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def decompress(self, data):
+        return self._decompressor.decompress(data)
+
+CODECS = {'gzip': GzipCodec, 'zstd': ZstdCodec}
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+def _store_lock(root):
+    """One lock per store directory, shared by every BackupStore opened on it"""
+    with _locks_guard:
+        return _locks.setdefault(os.path.abspath(root), threading.Lock())
+
+def _write_atomic(path, data):
+    """Write a file under a temporary name and rename it into place"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except Exception:
+        os.remove(temp_path)
+        raise
+
+def retained_snapshots(snapshots, retention):
+    """Names of the snapshots a retention policy keeps
+
+    `snapshots` are (name, created) pairs. 'latest' keeps the N newest
+    snapshots; for each of 'hourly', 'daily' and 'weekly', the newest
+    snapshot of each of the most recent N hours, days or ISO weeks is kept.
+    The newest snapshot overall is always kept.
+    """
+    buckets = {
+        'latest': lambda created: created,
+        'hourly': lambda created: created.strftime('%Y%m%d%H'),
+        'daily': lambda created: created.strftime('%Y%m%d'),
+        'weekly': lambda created: '%d-%02d' % created.isocalendar()[:2]
+    }
+    ordered = sorted(snapshots, key=lambda snapshot: snapshot[1], reverse=True)
+    keep = {ordered[0][0]} if ordered else set()
+    for period, limit in retention.items():
+        seen = set()
+        for name, created in ordered:
+            bucket = buckets[period](created)
+            if bucket not in seen and len(seen) < limit:
+                seen.add(bucket)
+                keep.add(name)
+    return keep
+
+class BackupStore:
+    """Content-addressed store of compressed database snapshots
+
+    A snapshot is cut into fixed CHUNK_SIZE chunks; each chunk is stored
+    once, compressed, under the SHA-256 of its contents, and a JSON
+    manifest lists the chunk hashes in order. Pages a snapshot shares with
+    earlier ones cost nothing, so a week of hourly backups of a database
+    that changes a little each hour takes little more than one copy.
+    """
+
+    def __init__(self, root, codec='gzip', chunk_size=CHUNK_SIZE):
+        self.root = root
+        self.codec = CODECS[codec]()
+        self.chunk_size = chunk_size
+        self.chunk_dir = os.path.join(root, 'chunks')
+        self.snapshot_dir = os.path.join(root, 'snapshots')
+        # A chunk must not be collected between the exists() check and the manifest write
+        self._lock = _store_lock(root)
+
+    def _chunk_path(self, digest, codec=None):
+        extension = CODECS[codec].extension if codec else self.codec.extension
+        return os.path.join(self.chunk_dir, digest[:2], digest + extension)
+
+    def _manifest_path(self, name):
+        if os.path.basename(name) != name or not name:
+            raise Exception(f"Invalid snapshot name: {name}")
+        return os.path.join(self.snapshot_dir, f'{name}.json')
+
+    def add(self, name, source, created=None, metadata=None, verify=False):
+        """Store a database file (or any readable binary stream) as snapshot `name`
+
+        The whole-file SHA-256 is computed in the same pass that chunks
+        and stores the data. With `verify`, every new chunk is also
+        decompressed in memory and checked against its hash before it is
+        written, so what lands on disk is known to round-trip without
+        reading it back; 'verify_seconds' in the manifest is what that cost.
+        `metadata` is kept in the manifest as is. Returns the manifest, with
+        'new_chunks' and 'stored_bytes' counting only the chunks this
+        snapshot added.
+        """
+        with self._lock:
+            return self._add(name, source, created or datetime.now(), metadata or {}, verify)
+
+    def _add(self, name, source, created, metadata, verify):
+        digest_all = hashlib.sha256()
+        chunks = []
+        size = new_chunks = stored_bytes = 0
+        verify_seconds = 0.0 if verify else None
+
+        with open(source, 'rb') if isinstance(source, str) else source as f:
+            while True:
+                data = f.read(self.chunk_size)
+                if not data:
+                    break
+                digest = hashlib.sha256(data).hexdigest()
+                digest_all.update(data)
+                path = self._chunk_path(digest)
+                if not os.path.exists(path):
+                    compressed = self.codec.compress(data)
+                    if verify:
+                        started = time.perf_counter()
+                        if hashlib.sha256(self.codec.decompress(compressed)).hexdigest() != digest:
+                            raise Exception(f"Chunk {digest} of {name} does not survive compression")
+                        verify_seconds += time.perf_counter() - started
+                    _write_atomic(path, compressed)
+                    new_chunks += 1
+                    stored_bytes += len(compressed)
+                chunks.append(digest)
+                size += len(data)
+
+        manifest = {
+            'name': name,
+            'created': created.isoformat(),
+            'size': size,
+            'sha256': digest_all.hexdigest(),
+            'codec': self.codec.name,
+            'chunk_size': self.chunk_size,
+            'metadata': metadata,
+            'verify_seconds': round(verify_seconds, 3) if verify else None,
+            'chunks': chunks
+        }
+        _write_atomic(self._manifest_path(name), json.dumps(manifest).encode('utf-8'))
+        return dict(manifest, new_chunks=new_chunks, stored_bytes=stored_bytes)
+
+    def manifest(self, name):
+        path = self._manifest_path(name)
+        if not os.path.exists(path):
+            raise Exception(f"Backup not found: {name}")
+        with open(path, 'rb') as f:
+            return json.loads(f.read())
+
+    def exists(self, name):
+        try:
+            return os.path.exists(self._manifest_path(name))
+        except Exception:
+            return False
+
+    def read(self, name):
+        """Yield a snapshot's bytes chunk by chunk, checking every chunk's hash"""
+        manifest = self.manifest(name)
+        codec = CODECS[manifest['codec']]() if manifest['codec'] != self.codec.name else self.codec
+        for digest in manifest['chunks']:
+            with open(self._chunk_path(digest, manifest['codec']), 'rb') as f:
+                data = codec.decompress(f.read())
+            if hashlib.sha256(data).hexdigest() != digest:
+                raise Exception(f"Backup {name} is corrupt: chunk {digest} does not match its hash")
+            yield data
+
+    def restore_to(self, name, target_path):
+        """Stream a snapshot into target_path and check the whole-file hash"""
+        manifest = self.manifest(name)
+        digest_all = hashlib.sha256()
+        with open(target_path, 'wb') as f:
+            for data in self.read(name):
+                digest_all.update(data)
+                f.write(data)
+        if digest_all.hexdigest() != manifest['sha256']:
+            raise Exception(f"Backup {name} is corrupt: checksum mismatch")
+        return manifest
+
+    def snapshots(self):
+        """Manifests of every snapshot, newest first, without their chunk lists"""
+        if not os.path.isdir(self.snapshot_dir):
+            return []
+        snapshots = []
+        for filename in os.listdir(self.snapshot_dir):
+            if filename.endswith('.json'):
+                manifest = self.manifest(filename[:-len('.json')])
+                manifest['chunk_count'] = len(manifest.pop('chunks'))
+                snapshots.append(manifest)
+        return sorted(snapshots, key=lambda manifest: manifest['created'], reverse=True)
+
+    def delete(self, name):
+        os.remove(self._manifest_path(name))
+
+    def apply_retention(self, retention=None):
+        """Delete snapshots the policy doesn't keep, then their orphaned chunks
+
+        Returns the names of the deleted snapshots.
+        """
+        retention = DEFAULT_RETENTION if retention is None else retention
+        with self._lock:
+            return self._apply_retention(retention)
+
+    def _apply_retention(self, retention):
+        snapshots = [(manifest['name'], datetime.fromisoformat(manifest['created'])) for manifest in self.snapshots()]
+        keep = retained_snapshots(snapshots, retention)
+        expired = [name for name, _ in snapshots if name not in keep]
+        for name in expired:
+            self.delete(name)
+        if expired:
+            self.collect_garbage()
+        return expired
+
+    def collect_garbage(self):
+        """Remove chunks no snapshot refers to; returns how many were removed"""
+        referenced = set()
+        for filename in os.listdir(self.snapshot_dir):
+            if filename.endswith('.json'):
+                referenced.update(self.manifest(filename[:-len('.json')])['chunks'])
+
+        removed = 0
+        for directory, _, filenames in os.walk(self.chunk_dir):
+            for filename in filenames:
+                if filename.split('.')[0] not in referenced:
+                    os.remove(os.path.join(directory, filename))
+                    removed += 1
+        return removed
+
+    def stats(self):
+        """Logical size of all snapshots against what the store takes on disk"""
+        snapshots = self.snapshots()
+        chunks = stored_bytes = 0
+        for directory, _, filenames in os.walk(self.chunk_dir):
+            for filename in filenames:
+                chunks += 1
+                stored_bytes += os.path.getsize(os.path.join(directory, filename))
+        logical_bytes = sum(manifest['size'] for manifest in snapshots)
+        return {
+            'snapshots': len(snapshots),
+            'chunks': chunks,
+            'logical_bytes': logical_bytes,
+            'stored_bytes': stored_bytes,
+            'ratio': round(logical_bytes / stored_bytes, 2) if stored_bytes else None
+        }
+
+_index_cache = {}
+
+class BackupIndex:
+    """Sidecar JSON file holding the metadata of every backup
+
+    Written whenever a backup is added or pruned, so listing backups is
+    one read of this file (none at all while it is unchanged) instead of
+    opening every manifest. reconcile() in the DatabaseManager rebuilds it
+    from the store if it drifts.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = _store_lock(path)
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self):
+        """Entries newest first; [] if the index hasn't been written yet"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return []
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        cached = _index_cache.get(self.path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        with open(self.path, 'rb') as f:
+            entries = json.loads(f.read())['backups']
+        _index_cache[self.path] = (key, entries)
+        return entries
+
+    def replace(self, entries):
+        """Write the whole index; callers hold self.lock"""
+        entries = sorted(entries, key=lambda entry: entry['created'], reverse=True)
+        _write_atomic(self.path, json.dumps({'version': 1, 'backups': entries}).encode('utf-8'))
+
+    def put(self, entry):
+        with self.lock:
+            self.replace([e for e in self.load() if e['name'] != entry['name']] + [entry])
+
+    def remove(self, names):
+        names = set(names)
+        if not names:
+            return
+        with self.lock:
+            self.replace([entry for entry in self.load() if entry['name'] not in names])
+
+    def query(self, offset=0, limit=None, since=None, until=None, schema_version=None):
+        """(total, page) of the entries matching every given filter, newest first
+
+        `since` and `until` are datetimes bounding the creation time.
+        """
+        entries = self.load()
+        if since is not None:
+            entries = [entry for entry in entries if entry['created'] >= since.isoformat()]
+        if until is not None:
+            entries = [entry for entry in entries if entry['created'] < until.isoformat()]
+        if schema_version is not None:
+            entries = [entry for entry in entries if entry['schema_version'] == schema_version]
+        end = None if limit is None else offset + limit
+        return len(entries), entries[offset:end]
@@ -0,0 +1,323 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime
+from functools import wraps
+from urllib.parse import urlencode
+from flask import current_app, g, make_response, request
+from flask_login import current_user
+from sqlalchemy import case, insert, update
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import DataVersion, Game, WeekSync
+
+WeekSchedule = namedtuple('WeekSchedule', ['first_kickoff', 'mnf_game_id', 'game_ids'])
+
+def load_week_schedule(week):
+    """Read a week's kickoff schedule from the game table"""
+    rows = db.session.query(Game.id, Game.start_time, Game.is_mnf).filter(
+        Game.week == week
+    ).order_by(Game.start_time).all()
+
+    return WeekSchedule(
+        first_kickoff=rows[0].start_time if rows else None,
+        mnf_game_id=next((row.id for row in rows if row.is_mnf), None),
+        game_ids=frozenset(row.id for row in rows)
+    )
+
+def load_week_version(week):
+    """When ingestion last changed a week's games; None before it ever has"""
+    return db.session.query(WeekSync.last_changed_at).filter(WeekSync.week == week).scalar()
+
+class WeekScheduleCache:
+    """Thread-safe, TTL-bounded cache of WeekSchedule entries keyed by week
+
+    With `version`, a callable returning a week's current version, an
+    entry is only served while the version it was loaded at is current.
+    Games are written by the ingest worker (or a restore) in another
+    process, so invalidate() alone can't reach every web process.
+    """
+
+    def __init__(self, loader, ttl=300, clock=time.monotonic, version=None):
+        self.loader = loader
+        self.ttl = ttl
+        self.clock = clock
+        self.version = version
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, week):
+        """Return the schedule for a week, loading it on a miss, after expiry or a data change"""
+        now = self.clock()
+        version = self.version(week) if self.version is not None else None
+        with self._lock:
+            entry = self._entries.get(week)
+            if entry is not None and entry[1] > now and entry[2] == version:
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        schedule = self.loader(week)
+        with self._lock:
+            self._entries[week] = (schedule, now + self.ttl, version)
+        return schedule
+
+    def invalidate(self, week=None):
+        """Drop one week, or every week when no week is given"""
+        with self._lock:
+            if week is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(week, None)
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'ttl_seconds': self.ttl
+            }
+
+# Checked against the week's last change on every lookup: one primary-key read
+week_schedule = WeekScheduleCache(load_week_schedule, version=load_week_version)
+
+DATA_VERSION = 'api'
+CACHE_CONTROL = 'private, no-cache'  # Browsers may keep a copy but must revalidate it
+
+def current_data_version():
+    """The version of everything the read-only API serves"""
+    return db.session.query(DataVersion.version).filter(
+        DataVersion.name == DATA_VERSION
+    ).scalar() or 0
+
+def bump_data_version(now=None):
+    """Mark API data as changed; the caller owns the transaction
+
+    Versions follow the clock (microseconds) as well as counting up, so a
+    restored backup can never reissue a version a client has already seen.
+    """
+    now = now or datetime.utcnow()
+    floor = int((now - datetime(1970, 1, 1)).total_seconds() * 1000000)
+    bumped = DataVersion.version + 1
+    result = db.session.execute(
+        update(DataVersion).where(DataVersion.name == DATA_VERSION).values(
+            version=case((bumped > floor, bumped), else_=floor)
+        )
+    )
+    if result.rowcount == 0:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(DataVersion).values(name=DATA_VERSION, version=floor))
+        except IntegrityError:
+            # Created concurrently; count this write on top of it
+            return bump_data_version(now)
+
+def request_data_version():
+    """current_data_version(), read at most once per request"""
+    if 'data_version' not in g:
+        g.data_version = current_data_version()
+    return g.data_version
+
+def _etag(version):
+    scope = f"{request.full_path}:{current_user.get_id()}"
+    return f"{version:x}-{hashlib.sha1(scope.encode('utf-8')).hexdigest()[:12]}"
+
+def conditional_get(f):
+    """Tag GET responses with the data version and answer 304 when the client is current
+
+    The tag also covers the query string and user, so a copy is never
+    reused for another week or account. A repeat poll costs one version
+    lookup instead of re-running the view.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if request.method != 'GET':
+            return f(*args, **kwargs)
+
+        etag = _etag(request_data_version())
+        if etag in request.if_none_match:
+            response = current_app.response_class(status=304)
+        else:
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = CACHE_CONTROL
+        return response
+    return decorated_function
+
+RESPONSE_CACHE_MAX_BYTES = 16 * 1024 * 1024
+RESPONSE_CACHE_MAX_ENTRIES = 4096
+RESPONSE_CACHE_TTL = 3600  # Seconds; only bounds shared backends, versions do the invalidating
+
+class MemoryBackend:
+    """Process-local LRU store bounded by entry count and total payload bytes"""
+
+    def __init__(self, max_bytes=RESPONSE_CACHE_MAX_BYTES, max_entries=RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        size = len(key) + len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= len(key) + len(previous)
+            self._entries[key] = value
+            self.bytes += size
+            while self.bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                old_key, old_value = self._entries.popitem(last=False)
+                self.bytes -= len(old_key) + len(old_value)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'evictions': self.evictions
+            }
+
+class RedisBackend:
+    """Store shared by every worker, on any redis-py compatible client
+
+    Memory is capped by the server's maxmemory/LRU policy; the TTL only
+    reclaims entries of versions nobody asks for any more.
+    """
+
+    def __init__(self, client, prefix='nfl_pickems:response:', ttl=RESPONSE_CACHE_TTL):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, value):
+        self.client.set(self.prefix + key, value, ex=self.ttl)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + '*'):
+            self.client.delete(key)
+
+    def stats(self):
+        return {'backend': 'redis', 'ttl_seconds': self.ttl}
+
+class ResponseCache:
+    """Serialized API payloads keyed by (endpoint, args, data version)
+
+    Nothing is ever invalidated by hand: a write bumps the data version,
+    so later lookups use new keys and stale payloads age out of the backend.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or MemoryBackend()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(endpoint, args, version, user_id=None):
+        query = urlencode(sorted(args.items(multi=True)))
+        return f"{endpoint}|{version}|{user_id or ''}|{query}"
+
+    def get(self, key):
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            # A shared backend being down must not take the API with it
+            current_app.logger.warning(f"Response cache read failed: {str(e)}")
+            value = None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key, value):
+        try:
+            self.backend.set(key, value)
+        except Exception as e:
+            current_app.logger.warning(f"Response cache write failed: {str(e)}")
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+        stats.update(self.backend.stats())
+        return stats
+
+def cached_response(per_user=False):
+    """Serve a GET view from the response cache at the current data version
+
+    Views whose payload depends on who is asking set per_user so the
+    session user is part of the key.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            key = response_cache.key(
+                request.endpoint, request.args, request_data_version(),
+                current_user.get_id() if per_user else None
+            )
+            body = response_cache.get(key)
+            if body is not None:
+                return current_app.response_class(body, mimetype='application/json')
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200:
+                response_cache.set(key, response.get_data())
+            return response
+        return decorated_function
+    return decorator
+
+def init_response_cache(app):
+    """Pick the response cache backend from the app config"""
+    url = app.config.get('RESPONSE_CACHE_URL')
+    if url:
+        # Optional dependency, only needed for a cache shared between workers
+        import redis
+        response_cache.backend = RedisBackend(redis.Redis.from_url(url))
+    else:
+        response_cache.backend = MemoryBackend(
+            max_bytes=app.config.get('RESPONSE_CACHE_MAX_BYTES', RESPONSE_CACHE_MAX_BYTES)
+        )
+
+response_cache = ResponseCache()
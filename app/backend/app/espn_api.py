@@ -1,43 +1,245 @@
+import asyncio
 import requests
+from requests.adapters import HTTPAdapter
 from datetime import datetime, timedelta
 import pytz
+from email.utils import parsedate_to_datetime
+import threading
 import time
 
 class ESPNAPIError(Exception):
     """Custom exception for ESPN API errors"""
     pass
 
+POOL_SIZE = 10  # Keep-alive connections kept per host
+REQUEST_TIMEOUT = 10  # Seconds
+
+_session = None
+_session_lock = threading.Lock()
+
+# Validators and parsed payloads of previous responses, keyed by request
+_conditional_cache = {}
+_conditional_cache_lock = threading.Lock()
+
+def get_session():
+    """Return the process-wide pooled session shared by all ESPNAPI instances"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            _session.mount('https://', adapter)
+            _session.mount('http://', adapter)
+        return _session
+
+def _seconds_until(value, now=None):
+    """Interpret a Retry-After / X-RateLimit-Reset value as seconds from now
+
+    Accepts delta seconds, epoch seconds or an HTTP date; returns None when
+    the value can't be understood.
+    """
+    if value is None:
+        return None
+    now = time.time() if now is None else now
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - now
+        except (TypeError, ValueError):
+            return None
+    else:
+        # Large values are absolute epoch timestamps rather than deltas
+        if seconds > 1e9:
+            seconds -= now
+    return max(seconds, 0.0)
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at `rate` tokens per second up to `capacity`
+
+    reserve() always takes a token, letting the balance go negative, and
+    returns how long the caller must wait for it; callers sleep however suits
+    them (time.sleep or asyncio.sleep). observe() adapts the bucket to the
+    server's own rate-limit headers.
+    """
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.clock = clock
+        self.tokens = float(capacity)
+        self.updated = clock()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+        self.acquisitions = 0
+        self.delayed = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self):
+        """Take a token and return the seconds until it may be used"""
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            self.tokens -= 1
+            wait = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+            wait = max(wait, self.blocked_until - now)
+
+            self.acquisitions += 1
+            if wait > 0:
+                self.delayed += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+            return wait
+
+    def acquire(self):
+        """Block the calling thread until a token is available"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds):
+        """Hold every caller back for at least `seconds`"""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, self.clock() + seconds)
+
+    def observe(self, status_code, headers):
+        """Adapt to a response's Retry-After and X-RateLimit-* headers"""
+        if status_code == 429:
+            with self._lock:
+                self.throttled += 1
+
+        retry_after = _seconds_until(headers.get('Retry-After'))
+        if retry_after is not None:
+            self.pause(retry_after)
+
+        remaining = headers.get('X-RateLimit-Remaining')
+        if remaining is None:
+            return
+        try:
+            remaining = int(remaining)
+        except (TypeError, ValueError):
+            return
+
+        with self._lock:
+            # Never spend more than the server says is left
+            self.tokens = min(self.tokens, float(remaining))
+        if remaining <= 0:
+            reset = _seconds_until(headers.get('X-RateLimit-Reset'))
+            self.pause(reset if reset is not None else 1.0 / self.rate)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'rate': self.rate,
+                'capacity': self.capacity,
+                'tokens': round(max(self.tokens, 0.0), 3),
+                'blocked_for': round(max(self.blocked_until - self.clock(), 0.0), 3),
+                'acquisitions': self.acquisitions,
+                'delayed': self.delayed,
+                'throttled': self.throttled,
+                'total_wait_seconds': round(self.total_wait, 3),
+                'max_wait_seconds': round(self.max_wait, 3),
+                'avg_wait_seconds': round(self.total_wait / self.acquisitions, 4) if self.acquisitions else 0.0
+            }
+
+RATE_LIMIT_RATE = 2.0  # Sustained requests per second, process-wide
+RATE_LIMIT_BURST = 10  # Requests allowed back to back
+
+# Shared by every ESPNAPI instance and thread in the process
+rate_limiter = TokenBucket(RATE_LIMIT_RATE, RATE_LIMIT_BURST)
+
+def clear_conditional_cache():
+    """Forget stored ETag/Last-Modified validators"""
+    with _conditional_cache_lock:
+        _conditional_cache.clear()
+
 class ESPNAPI:
     BASE_URL = 'https://site.api.espn.com/apis/site/v2/sports/football/nfl'
-    RATE_LIMIT_DELAY = 1.0  # Delay between requests in seconds
-
-    def __init__(self):
-        self.last_request_time = 0
-        self.headers = {
-            'X-RateLimit-Limit': '100',
-            'X-RateLimit-Remaining': '99'
-        }
-
-    def _make_request(self, url, params=None):
-        """Make a rate-limited request to the ESPN API"""
-        # Implement rate limiting
-        current_time = time.time()
-        time_since_last_request = current_time - self.last_request_time
-        if time_since_last_request < self.RATE_LIMIT_DELAY:
-            time.sleep(self.RATE_LIMIT_DELAY - time_since_last_request)
+
+    def __init__(self, limiter=None, defer_validators=False):
+        self.last_not_modified = False
+        # With defer_validators, new validators wait here for commit_validators()
+        self._pending_validators = {} if defer_validators else None
+        self.session = get_session()
+        self.rate_limiter = limiter or rate_limiter
+        # Extra request headers; rate limits are read from ESPN's responses
+        self.headers = {}
+
+    def _make_request(self, url, params=None, parse=None):
+        """Make a rate-limited, conditional request to the ESPN API"""
+        self.rate_limiter.acquire()
+        value, self.last_not_modified = self._send_request(url, params, parse)
+        return value
+
+    def _send_request(self, url, params=None, parse=None):
+        """Send one conditional GET and return (value, not_modified)
+
+        The parsed result of every 200 response is kept with its ETag and
+        Last-Modified validators (held back until commit_validators() when
+        deferring); a 304 Not Modified returns that result without decoding
+        or parsing anything.
+        """
+        cache_key = (url, tuple(sorted((params or {}).items())), getattr(parse, '__name__', None))
+        with _conditional_cache_lock:
+            cached = _conditional_cache.get(cache_key)
+        if self._pending_validators:
+            cached = self._pending_validators.get(cache_key, cached)
+        
+        headers = dict(self.headers)
+        if cached:
+            if cached['etag']:
+                headers['If-None-Match'] = cached['etag']
+            if cached['last_modified']:
+                headers['If-Modified-Since'] = cached['last_modified']
         
-        response = requests.get(url, params=params, headers=self.headers)
+        response = self.session.get(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
+        self.rate_limiter.observe(response.status_code, response.headers)
+        
+        if response.status_code == 304 and cached:
+            return cached['value'], True
         if response.status_code != 200:
             raise ESPNAPIError(f"ESPN API request failed with status code {response.status_code}")
         
-        self.last_request_time = time.time()
-        return response.json()
+        data = response.json()
+        value = parse(data) if parse else data
+        
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag or last_modified:
+            entry = {'etag': etag, 'last_modified': last_modified, 'value': value}
+            if self._pending_validators is not None:
+                self._pending_validators[cache_key] = entry
+            else:
+                with _conditional_cache_lock:
+                    _conditional_cache[cache_key] = entry
+        return value, False
+
+    def commit_validators(self):
+        """Keep the validators of deferred responses, once their data is stored
+
+        Until then a failed write can't be followed by a 304 that makes the
+        caller believe the data it never stored is unchanged.
+        """
+        if self._pending_validators:
+            with _conditional_cache_lock:
+                _conditional_cache.update(self._pending_validators)
+            self._pending_validators.clear()
+
+    def _parse_current_week(self, data):
+        """Extract the week number from a scoreboard payload"""
+        return data.get('week', {}).get('number', 1)
 
     def get_current_week(self):
         """Get the current NFL week number"""
         try:
-            data = self._make_request(f"{self.BASE_URL}/scoreboard")
-            return data.get('week', {}).get('number', 1)
+            return self._make_request(f"{self.BASE_URL}/scoreboard", parse=self._parse_current_week)
         except Exception as e:
             raise ESPNAPIError(f"Failed to get current week: {str(e)}")
 
@@ -64,7 +266,10 @@ class ESPNAPI:
                     'start_time': start_time,
                     'home_score': int(home_team['score']) if home_team.get('score') else None,
                     'away_score': int(away_team['score']) if away_team.get('score') else None,
-                    'is_finished': self._is_game_finished(competition)
+                    'is_finished': self._is_game_finished(competition),
+                    'favorite': self._parse_favorite(
+                        competition, home_team['team']['abbreviation'], away_team['team']['abbreviation']
+                    )
                 }
                 
                 games.append(game_data)
@@ -73,6 +278,20 @@ class ESPNAPI:
         except Exception as e:
             raise ESPNAPIError(f"Failed to parse game data: {str(e)}")
 
+    def _parse_favorite(self, competition, home_abbr, away_abbr):
+        """Abbreviation of the betting favorite, or None without a line (or a pick'em)"""
+        odds = competition.get('odds') or []
+        if not odds:
+            return None
+        line = odds[0]
+        if line.get('homeTeamOdds', {}).get('favorite'):
+            return home_abbr
+        if line.get('awayTeamOdds', {}).get('favorite'):
+            return away_abbr
+        # Older payloads only carry the summary, e.g. "KC -3.5" or "EVEN"
+        team = (line.get('details') or '').split(' ')[0]
+        return team if team in (home_abbr, away_abbr) else None
+
     def _is_game_finished(self, competition):
         """Check if a game is finished"""
         try:
@@ -84,26 +303,50 @@ class ESPNAPI:
     def get_games(self, week):
         """Get all games for a specific week"""
         try:
-            data = self._make_request(f"{self.BASE_URL}/scoreboard", params={'week': week})
-            if not data:
-                raise ESPNAPIError("Failed to fetch games: Empty response")
-            return self._parse_game_data(data)
+            return self._make_request(
+                f"{self.BASE_URL}/scoreboard",
+                params={'week': week},
+                parse=self._parse_scoreboard
+            )
         except Exception as e:
             raise ESPNAPIError(f"Failed to fetch games: {str(e)}")
 
+    def get_scoreboard(self, week=None):
+        """Get (week number, games) from one scoreboard call
+
+        Without a week ESPN serves the current week, so this replaces a
+        get_current_week() + get_games() pair.
+        """
+        try:
+            return self._make_request(
+                f"{self.BASE_URL}/scoreboard",
+                params={'week': week} if week is not None else None,
+                parse=self._parse_scoreboard_with_week
+            )
+        except Exception as e:
+            raise ESPNAPIError(f"Failed to fetch scoreboard: {str(e)}")
+
+    def _parse_scoreboard_with_week(self, data):
+        """Parse a scoreboard payload into (week number, game dicts)"""
+        return self._parse_current_week(data), self._parse_scoreboard(data)
+
+    def _parse_scoreboard(self, data):
+        """Parse a week's scoreboard payload into game dicts"""
+        if not data:
+            raise ESPNAPIError("Failed to fetch games: Empty response")
+        return self._parse_game_data(data)
+
+    def _parse_team_stats(self, data):
+        """Parse a team statistics payload into a name -> value dict"""
+        if not data or 'stats' not in data:
+            raise ESPNAPIError("Failed to fetch team stats: Invalid response format")
+        return {stat['name']: stat['value'] for stat in data['stats']}
+
     def get_team_stats(self, team_abbr):
         """Get statistics for a specific team"""
         try:
             url = f"{self.BASE_URL}/teams/{team_abbr}/statistics"
-            response = requests.get(url, headers=self.headers)
-            if response.status_code != 200:
-                raise ESPNAPIError(f"Failed to fetch team stats: Status code {response.status_code}")
-            
-            data = response.json()
-            if not data or 'stats' not in data:
-                raise ESPNAPIError("Failed to fetch team stats: Invalid response format")
-            
-            return {stat['name']: stat['value'] for stat in data['stats']}
+            return self._make_request(url, parse=self._parse_team_stats)
         except Exception as e:
             raise ESPNAPIError(f"Failed to fetch team stats: {str(e)}")
 
@@ -114,3 +357,65 @@ class ESPNAPI:
             return [game for game in games if game['is_finished']]
         except Exception as e:
             raise ESPNAPIError(f"Failed to update game scores for week {week}: {str(e)}")
+
+
+class AsyncESPNFetcher:
+    """Fetch many ESPN weeks and team stats concurrently
+
+    Requests run on worker threads over the shared pooled session, gated by
+    the client's token bucket instead of a fixed per-request sleep, and
+    return the same parsed structures as the synchronous client.
+    """
+    MAX_CONCURRENCY = 8
+
+    def __init__(self, api=None, max_concurrency=None):
+        self.api = api or ESPNAPI()
+        self.bucket = self.api.rate_limiter
+        self.max_concurrency = max_concurrency or self.MAX_CONCURRENCY
+
+    async def _fetch(self, semaphore, url, params=None, parse=None):
+        async with semaphore:
+            wait = self.bucket.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            value, _ = await asyncio.to_thread(self.api._send_request, url, params, parse)
+            return value
+
+    async def _fetch_week(self, semaphore, week):
+        try:
+            return await self._fetch(
+                semaphore,
+                f"{self.api.BASE_URL}/scoreboard",
+                params={'week': week},
+                parse=self.api._parse_scoreboard
+            )
+        except Exception as e:
+            raise ESPNAPIError(f"Failed to fetch games for week {week}: {str(e)}")
+
+    async def _fetch_team(self, semaphore, team_abbr):
+        try:
+            return await self._fetch(
+                semaphore,
+                f"{self.api.BASE_URL}/teams/{team_abbr}/statistics",
+                parse=self.api._parse_team_stats
+            )
+        except Exception as e:
+            raise ESPNAPIError(f"Failed to fetch team stats for {team_abbr}: {str(e)}")
+
+    async def fetch_weeks(self, weeks):
+        """Return {week: [game dicts]} for every requested week"""
+        weeks = list(weeks)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results = await asyncio.gather(*(self._fetch_week(semaphore, week) for week in weeks))
+        return dict(zip(weeks, results))
+
+    async def fetch_team_stats(self, team_abbrs):
+        """Return {team: stats dict} for every requested team"""
+        team_abbrs = list(team_abbrs)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results = await asyncio.gather(*(self._fetch_team(semaphore, team) for team in team_abbrs))
+        return dict(zip(team_abbrs, results))
+
+    def backfill(self, weeks):
+        """Synchronous entry point for fetching many weeks at once"""
+        return asyncio.run(self.fetch_weeks(weeks))
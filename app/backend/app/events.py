@@ -0,0 +1,237 @@
+import json
+import queue
+import threading
+from collections import deque
+from datetime import timedelta
+from sqlalchemy import func
+from app import db, logger
+from app.models import LiveEvent, Pick, User, WeeklyStanding
+
+EVENT_RETENTION = timedelta(hours=24)  # Long enough for any reconnect, short enough to stay tiny
+SUBSCRIBER_QUEUE_SIZE = 100  # Frames buffered per client before it is dropped as too slow
+REPLAY_SIZE = 256  # Recent frames kept for clients reconnecting with Last-Event-ID
+RELAY_INTERVAL = 1.0  # Seconds between reads of the event table
+RELAY_BATCH = 500
+KEEPALIVE_INTERVAL = 15  # Seconds; keeps proxies from closing idle streams
+
+def format_sse(event_id, kind, data):
+    """Serialize one Server-Sent Events frame"""
+    return f"id: {event_id}\nevent: {kind}\ndata: {data}\n\n"
+
+def _game_payload(row):
+    return {
+        'espn_id': row['espn_id'],
+        'week': row['week'],
+        'home_team': row['home_team'],
+        'away_team': row['away_team'],
+        'start_time': row['start_time'].isoformat() if row['start_time'] else None,
+        'final_score_home': row['final_score_home'],
+        'final_score_away': row['final_score_away'],
+        'winner': row['winner']
+    }
+
+def leaderboard_snapshot(game_ids):
+    """Season totals of every user who picked one of the given games
+
+    Returns {user_id: (username, correct_picks, total_picks)}; taken before
+    and after a standings refresh to compute the leaderboard delta.
+    """
+    game_ids = list(game_ids)
+    if not game_ids:
+        return {}
+
+    user_ids = db.session.query(Pick.user_id).filter(Pick.game_id.in_(game_ids)).distinct()
+    rows = db.session.query(
+        User.id,
+        User.username,
+        func.sum(WeeklyStanding.correct_picks),
+        func.sum(WeeklyStanding.total_picks)
+    ).join(WeeklyStanding, WeeklyStanding.user_id == User.id).filter(
+        User.id.in_(user_ids)
+    ).group_by(User.id, User.username).all()
+    return {user_id: (username, correct, total) for user_id, username, correct, total in rows}
+
+def leaderboard_delta(before, after):
+    """Leaderboard entries whose totals differ between two snapshots"""
+    changes = []
+    for user_id, (username, correct_picks, total_picks) in sorted(after.items()):
+        _, old_correct, old_total = before.get(user_id, (username, 0, 0))
+        if (old_correct, old_total) == (correct_picks, total_picks):
+            continue
+        accuracy = (correct_picks / total_picks * 100) if total_picks > 0 else 0
+        changes.append({
+            'username': username,
+            'correct_picks': correct_picks,
+            'total_picks': total_picks,
+            'accuracy': round(accuracy, 2),
+            'correct_picks_change': correct_picks - old_correct
+        })
+    return changes
+
+def record_ingest_events(week, changed_games, leaderboard_changes, now):
+    """Queue the live events of one ingested week in the caller's transaction
+
+    Writing them next to the game rows means a rolled-back sync never
+    announces anything, and web processes pick them up whichever process
+    ran the ingestion.
+    """
+    events = []
+    if changed_games:
+        events.append(LiveEvent(kind='scores', created_at=now, payload=json.dumps({
+            'week': week,
+            'games': [_game_payload(row) for row in changed_games]
+        })))
+    if leaderboard_changes:
+        events.append(LiveEvent(kind='leaderboard', created_at=now, payload=json.dumps({
+            'week': week,
+            'changes': leaderboard_changes
+        })))
+    if events:
+        db.session.add_all(events)
+        LiveEvent.query.filter(LiveEvent.created_at < now - EVENT_RETENTION).delete(synchronize_session=False)
+    return len(events)
+
+class Subscription:
+    """One client's bounded queue of pre-serialized frames"""
+
+    def __init__(self, maxsize):
+        self.queue = queue.Queue(maxsize)
+        self.closed = False
+
+    def get(self, timeout=None):
+        """Next frame, or None if nothing arrived within timeout"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+class EventBroker:
+    """In-process pub/sub fanning each published event out to every subscriber
+
+    An event is serialized once and the same frame is queued for all
+    listeners. A subscriber whose queue is full is dropped instead of
+    blocking the others; it reconnects with Last-Event-ID and catches up
+    from the replay buffer.
+    """
+
+    def __init__(self, queue_size=SUBSCRIBER_QUEUE_SIZE, replay_size=REPLAY_SIZE):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._replay = deque(maxlen=replay_size)
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def subscribe(self, last_event_id=None):
+        subscription = Subscription(self.queue_size)
+        with self._lock:
+            if last_event_id is not None:
+                for event_id, frame in self._replay:
+                    if event_id > last_event_id and not subscription.queue.full():
+                        subscription.queue.put_nowait(frame)
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+        subscription.closed = True
+
+    def publish(self, event_id, kind, data):
+        """Fan one event out; `data` is the already-encoded JSON payload"""
+        frame = format_sse(event_id, kind, data)
+        with self._lock:
+            self._replay.append((event_id, frame))
+            self.published += 1
+            for subscription in list(self._subscribers):
+                try:
+                    subscription.queue.put_nowait(frame)
+                    self.delivered += 1
+                except queue.Full:
+                    self._subscribers.discard(subscription)
+                    subscription.closed = True
+                    self.dropped += 1
+        return frame
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'published': self.published,
+                'delivered': self.delivered,
+                'dropped': self.dropped,
+                'last_event_id': self._replay[-1][0] if self._replay else None
+            }
+
+class EventRelay:
+    """Tail the live_event table and publish new rows into a broker
+
+    One relay per web process, so the database sees one small query per
+    interval however many clients are connected.
+    """
+
+    def __init__(self, flask_app, broker, interval=RELAY_INTERVAL):
+        self.app = flask_app
+        self.broker = broker
+        self.interval = interval
+        self.last_id = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def poll(self):
+        """Publish events written since the last poll; returns how many"""
+        with self.app.app_context():
+            if self.last_id is None:
+                # Start from the tip; older events are history, not news
+                self.last_id = db.session.query(func.max(LiveEvent.id)).scalar() or 0
+                return 0
+            events = LiveEvent.query.filter(LiveEvent.id > self.last_id).order_by(
+                LiveEvent.id
+            ).limit(RELAY_BATCH).all()
+            for event in events:
+                self.broker.publish(event.id, event.kind, event.payload)
+                self.last_id = event.id
+            return len(events)
+
+    def start(self):
+        if self._thread is None:
+            self.poll()
+            self._thread = threading.Thread(target=self._run, name='event-relay', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Event relay poll failed: {str(e)}")
+
+_relay_lock = threading.Lock()
+
+def start_relay(flask_app):
+    """Start the app's relay on first use, so importing and testing stay thread-free"""
+    with _relay_lock:
+        relay = flask_app.extensions.get('event_relay')
+        if relay is None:
+            relay = EventRelay(
+                flask_app, broker,
+                interval=flask_app.config.get('EVENT_RELAY_INTERVAL', RELAY_INTERVAL)
+            ).start()
+            flask_app.extensions['event_relay'] = relay
+        return relay
+
+def stop_relay(flask_app):
+    with _relay_lock:
+        relay = flask_app.extensions.pop('event_relay', None)
+    if relay is not None:
+        relay.stop()
+
+broker = EventBroker()
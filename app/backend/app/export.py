@@ -0,0 +1,82 @@
+import csv
+import io
+import json
+from sqlalchemy import select
+from app import db
+from app.models import Game, Pick, User
+
+EXPORT_BATCH = 1000  # Rows per server-side fetch and per chunk written to the response
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+EXPORT_COLUMNS = (
+    'week', 'username', 'espn_id', 'home_team', 'away_team', 'start_time',
+    'picked_team', 'winner', 'correct', 'final_score_home', 'final_score_away',
+    'mnf_total_points'
+)
+
+def export_query(week=None):
+    """Every pick with its game and user, grouped by week and user
+
+    The order matches ix_pick_week_user (whose entries end in the rowid), so
+    SQLite walks the index instead of sorting the season before the first row.
+    """
+    query = select(
+        Pick.week,
+        User.username,
+        Game.espn_id,
+        Game.home_team,
+        Game.away_team,
+        Game.start_time,
+        Pick.picked_team,
+        Game.winner,
+        Game.final_score_home,
+        Game.final_score_away,
+        Pick.mnf_total_points
+    ).join(Game, Pick.game_id == Game.id).join(User, Pick.user_id == User.id)
+    if week is not None:
+        query = query.where(Pick.week == week)
+    return query.order_by(Pick.week, Pick.user_id, Pick.id)
+
+def export_rows(week=None, batch_size=EXPORT_BATCH):
+    """Yield lists of export dicts, batch_size at a time, from a server-side cursor"""
+    result = db.session.execute(export_query(week).execution_options(yield_per=batch_size))
+    for partition in result.partitions():
+        yield [{
+            'week': row.week,
+            'username': row.username,
+            'espn_id': row.espn_id,
+            'home_team': row.home_team,
+            'away_team': row.away_team,
+            'start_time': row.start_time.isoformat() if row.start_time else None,
+            'picked_team': row.picked_team,
+            'winner': row.winner,
+            'correct': row.picked_team == row.winner if row.winner else None,
+            'final_score_home': row.final_score_home,
+            'final_score_away': row.final_score_away,
+            'mnf_total_points': row.mnf_total_points
+        } for row in partition]
+
+def generate_csv(week=None, batch_size=EXPORT_BATCH):
+    """Stream the export as CSV, one chunk per batch after an immediate header"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    yield buffer.getvalue()
+
+    for rows in export_rows(week, batch_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue()
+
+def generate_ndjson(week=None, batch_size=EXPORT_BATCH):
+    """Stream the export as newline-delimited JSON, one chunk per batch"""
+    for rows in export_rows(week, batch_size):
+        yield ''.join(json.dumps(row) + '\n' for row in rows)
+
+EXPORT_GENERATORS = {
+    'csv': generate_csv,
+    'ndjson': generate_ndjson
+}
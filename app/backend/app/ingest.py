@@ -0,0 +1,151 @@
+import pytz
+from datetime import timedelta
+from app import db
+from app.models import Game, WeekSync
+from app.scheduler import AdaptivePollPolicy, load_unfinished_games
+from app.utils import bulk_upsert
+
+STALE_AFTER = timedelta(hours=12)  # Re-check quiet weeks for schedule changes
+DISCOVERY_INTERVAL = timedelta(hours=6)  # Look for the next slate when nothing is pending
+EASTERN = pytz.timezone('US/Eastern')  # Where "Monday night" is reckoned
+
+# Columns owned by the ESPN feed (is_mnf is derived from its kickoffs)
+SYNCED_COLUMNS = (
+    'week', 'home_team', 'away_team', 'start_time',
+    'final_score_home', 'final_score_away', 'winner', 'favorite', 'is_mnf'
+)
+# A decided game whose columns change needs its pickers' standings refreshed
+RESULT_COLUMNS = ('winner', 'final_score_home', 'final_score_away', 'is_mnf')
+
+def _to_naive_utc(value):
+    """Store kickoff times as naive UTC, matching datetime.utcnow() comparisons"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(pytz.UTC).replace(tzinfo=None)
+    return value
+
+def _mnf_espn_id(rows):
+    """The week's MNF tiebreak game: its last kickoff on a Monday, US/Eastern
+
+    With a Monday doubleheader the later game closes the week, so only
+    one game carries the flag.
+    """
+    mondays = [
+        row for row in rows
+        if row['start_time'] is not None
+        and pytz.UTC.localize(row['start_time']).astimezone(EASTERN).weekday() == 0
+    ]
+    return max(mondays, key=lambda row: (row['start_time'], row['espn_id']))['espn_id'] if mondays else None
+
+def _game_row(week, game_data, existing=None):
+    """Translate parsed ESPN game data into a game table row"""
+    row = {
+        'espn_id': game_data['espn_id'],
+        'week': week,
+        'home_team': game_data['home_team'],
+        'away_team': game_data['away_team'],
+        'start_time': _to_naive_utc(game_data['start_time']),
+        'final_score_home': existing.final_score_home if existing else None,
+        'final_score_away': existing.final_score_away if existing else None,
+        'winner': existing.winner if existing else None,
+        # ESPN drops the line from some payloads; keep the last one seen
+        'favorite': game_data.get('favorite') or (existing.favorite if existing else None)
+    }
+
+    if game_data['is_finished']:
+        row['final_score_home'] = game_data['home_score']
+        row['final_score_away'] = game_data['away_score']
+        row['winner'] = game_data['home_team'] if game_data['home_score'] > game_data['away_score'] else game_data['away_team']
+
+    return row
+
+def sync_games(week, games_data):
+    """Write a week's ESPN games, touching only the rows that actually changed.
+
+    Existing games are loaded in one query keyed by espn_id and diffed in
+    memory; inserts and updates go out as one bulk upsert. The caller owns
+    the transaction. `games_data` is the week's whole slate, since is_mnf
+    is derived from it. Returns the inserted/updated/unchanged counts, the
+    changed rows and the ids of decided games whose result changed: the
+    winner, a corrected final score or the MNF flag.
+    """
+    espn_ids = [game_data['espn_id'] for game_data in games_data]
+    existing = {
+        game.espn_id: game
+        for game in Game.query.filter(Game.espn_id.in_(espn_ids)).all()
+    } if espn_ids else {}
+
+    changed_rows = []
+    decided_espn_ids = []
+    result = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+
+    rows = []
+    for game_data in games_data:
+        game = existing.get(game_data['espn_id'])
+        rows.append((game, _game_row(week, game_data, game)))
+    mnf_espn_id = _mnf_espn_id([row for _, row in rows])
+
+    for game, row in rows:
+        row['is_mnf'] = row['espn_id'] == mnf_espn_id
+
+        if game is None:
+            result['inserted'] += 1
+        elif all(getattr(game, column) == row[column] for column in SYNCED_COLUMNS):
+            result['unchanged'] += 1
+            continue
+        else:
+            result['updated'] += 1
+
+        changed_rows.append(row)
+        if row['winner'] is not None and (
+                game is None or any(getattr(game, column) != row[column] for column in RESULT_COLUMNS)):
+            decided_espn_ids.append(row['espn_id'])
+
+    bulk_upsert(db.session, Game, changed_rows, ['espn_id'], SYNCED_COLUMNS)
+    # Loaded games are stale once the upsert bypasses the unit of work
+    for game in existing.values():
+        db.session.expire(game)
+
+    result['changed_games'] = changed_rows
+    result['decided_game_ids'] = [
+        game_id for (game_id,) in db.session.query(Game.id).filter(Game.espn_id.in_(decided_espn_ids))
+    ] if decided_espn_ids else []
+    return result
+
+def plan_ingestion(now, policy=None):
+    """Decide from local state which weeks need an ESPN refresh
+
+    A week with unfinished games is refreshed while the poll policy considers
+    it live or active (games on, kickoff or pick lock near), or when its last
+    sync is older than STALE_AFTER. When no game is pending at all, `discover`
+    asks for the current scoreboard at most every DISCOVERY_INTERVAL so the
+    next slate gets picked up. `now` is naive UTC.
+    """
+    policy = policy or AdaptivePollPolicy()
+
+    games_by_week = {}
+    for week, start_time in load_unfinished_games():
+        games_by_week.setdefault(week, []).append((week, start_time))
+    last_synced = dict(db.session.query(WeekSync.week, WeekSync.last_synced_at).all())
+
+    weeks = []
+    for week, games in sorted(games_by_week.items()):
+        synced_at = last_synced.get(week)
+        if policy.phase(now, games) != 'idle' or synced_at is None or now - synced_at >= STALE_AFTER:
+            weeks.append(week)
+
+    discover = False
+    if not games_by_week:
+        latest_sync = max(last_synced.values(), default=None)
+        discover = latest_sync is None or now - latest_sync >= DISCOVERY_INTERVAL
+
+    return {'weeks': weeks, 'discover': discover}
+
+def record_sync(week, now, changed):
+    """Stamp a week's sync time, and its change time when rows were written"""
+    sync = db.session.get(WeekSync, week)
+    if sync is None:
+        sync = WeekSync(week=week)
+        db.session.add(sync)
+    sync.last_synced_at = now
+    if changed:
+        sync.last_changed_at = now
@@ -0,0 +1,282 @@
+import fcntl
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app, has_app_context
+from app import db, db_manager, logger
+from app.backup_store import _write_atomic
+from app.cache import week_schedule, bump_data_version
+
+JOB_WORKERS = 2  # Backups and restores running at once; more only adds disk contention
+JOB_HISTORY = 50  # Finished jobs kept for the status endpoint
+JOB_SAVE_INTERVAL = 0.5  # Seconds between progress writes to a job's state file
+
+class JobConflict(Exception):
+    """Raised when a job needs a lock another running job holds"""
+
+class RestoreLock:
+    """An flock on a file, held across threads and processes on one host
+
+    Same acquire(blocking)/release() shape as threading.Lock. The kernel
+    drops the lock if the holding process dies, so a crashed worker never
+    blocks restores for good.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def acquire(self, blocking=True):
+        f = open(self.path, 'a+b')
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            f.close()
+            return False
+        self._file = f
+        return True
+
+    def release(self):
+        f, self._file = self._file, None
+        fcntl.flock(f, fcntl.LOCK_UN)
+        f.close()
+
+class BackupJob:
+    """State and progress of one background backup or restore"""
+
+    def __init__(self, kind, params=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params or {}
+        self.status = 'queued'
+        self.phase = None
+        self.pages_done = 0
+        self.pages_total = 0
+        self.page_size = 0
+        self.result = None
+        self.error = None
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+        self._started = None
+        self._duration = None
+        self._lock = threading.Lock()
+        self.state_path = None
+        self._saved = 0.0
+
+    def progress(self, phase, pages_done=0, pages_total=0):
+        """Progress callback handed to the DatabaseManager"""
+        with self._lock:
+            new_phase = phase != self.phase
+            self.phase = phase
+            self.pages_done = pages_done
+            self.pages_total = pages_total
+        self.save(force=new_phase)
+
+    def start(self):
+        with self._lock:
+            self.status = 'running'
+            self.started_at = datetime.utcnow()
+            self._started = time.perf_counter()
+        self.save(force=True)
+
+    def finish(self, result=None, error=None):
+        with self._lock:
+            self.status = 'failed' if error is not None else 'succeeded'
+            self.result = result
+            self.error = error
+            self.phase = None
+            self.finished_at = datetime.utcnow()
+            self._duration = time.perf_counter() - self._started
+        self.save(force=True)
+
+    def save(self, force=False):
+        """Write the status to state_path, at most every JOB_SAVE_INTERVAL unless forced"""
+        if self.state_path is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._saved < JOB_SAVE_INTERVAL:
+            return
+        self._saved = now
+        _write_atomic(self.state_path, json.dumps(self.to_dict()).encode('utf-8'))
+
+    @property
+    def finished(self):
+        return self.status in ('succeeded', 'failed')
+
+    def to_dict(self):
+        with self._lock:
+            if self._duration is not None:
+                duration = self._duration
+            elif self._started is not None:
+                duration = time.perf_counter() - self._started
+            else:
+                duration = None
+            return {
+                'id': self.id,
+                'kind': self.kind,
+                'params': self.params,
+                'status': self.status,
+                'phase': self.phase,
+                'pages_done': self.pages_done,
+                'pages_total': self.pages_total,
+                'bytes_done': self.pages_done * self.page_size,
+                'bytes_total': self.pages_total * self.page_size,
+                'result': self.result,
+                'error': self.error,
+                'created_at': self.created_at.isoformat(),
+                'started_at': self.started_at.isoformat() if self.started_at else None,
+                'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+                'duration': round(duration, 3) if duration is not None else None
+            }
+
+class JobRunner:
+    """Run backup jobs on a small thread pool and share their status
+
+    A job runs in the web process that accepted it, but its status is also
+    written to BACKUP_DIR/jobs/<id>.json, so a poll that lands on another
+    web worker still finds it. Restores take an flock on
+    BACKUP_DIR/restore.lock, so two never overlap whichever workers accept
+    them. Both live next to the backups rather than in the database, because
+    a restore overwrites the database.
+    """
+
+    def __init__(self, max_workers=JOB_WORKERS, history=JOB_HISTORY):
+        self.max_workers = max_workers
+        self.history = history
+        self._executor = None
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def restore_lock(self):
+        """A handle on the current app's host-wide restore lock"""
+        return RestoreLock(os.path.join(db_manager.backup_dir, 'restore.lock'))
+
+    def submit(self, flask_app, job, target, lock=None):
+        """Queue target(job) in an app context; returns the job at once
+
+        With `lock`, it is taken before queuing (JobConflict if another job
+        holds it) and released when the job ends.
+        """
+        if lock is not None and not lock.acquire(blocking=False):
+            raise JobConflict(f"Another {job.kind} is already running")
+
+        try:
+            state_dir = os.path.join(flask_app.config['BACKUP_DIR'], 'jobs')
+            job.state_path = os.path.join(state_dir, f'{job.id}.json')
+            job.save(force=True)
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='backup-job')
+                self._jobs[job.id] = job
+                self._trim()
+            self._prune(state_dir)
+            self._executor.submit(self._run, flask_app, job, target, lock)
+        except Exception:
+            if lock is not None:
+                lock.release()
+            raise
+        return job
+
+    def _run(self, flask_app, job, target, lock):
+        job.start()
+        try:
+            with flask_app.app_context():
+                result = target(job)
+            job.finish(result=result)
+        except Exception as e:
+            logger.error(f"{job.kind} job {job.id} failed: {str(e)}")
+            job.finish(error=str(e))
+        finally:
+            if lock is not None:
+                lock.release()
+
+    def _trim(self):
+        """Forget the oldest finished jobs beyond the history limit"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
+
+    def _prune(self, state_dir):
+        """Delete the state files of the oldest finished jobs beyond the history limit"""
+        finished = [job for job in self._stored(state_dir) if job['finished_at']]
+        for job in finished[self.history:]:
+            try:
+                os.remove(os.path.join(state_dir, f"{job['id']}.json"))
+            except FileNotFoundError:
+                pass
+
+    def _stored(self, state_dir):
+        """Status of every job with a state file, newest first"""
+        stored = []
+        for filename in os.listdir(state_dir) if os.path.isdir(state_dir) else []:
+            if filename.endswith('.json'):
+                try:
+                    with open(os.path.join(state_dir, filename), 'rb') as f:
+                        stored.append(json.loads(f.read()))
+                except FileNotFoundError:
+                    pass  # Pruned by another worker
+        return sorted(stored, key=lambda job: job['created_at'], reverse=True)
+
+    def get(self, job_id):
+        """Status of a job run by this or, within an app context, any other process"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        if not job_id.isalnum() or not has_app_context():
+            return None
+        try:
+            with open(os.path.join(current_app.config['BACKUP_DIR'], 'jobs', f'{job_id}.json'), 'rb') as f:
+                return json.loads(f.read())
+        except FileNotFoundError:
+            return None
+
+    def list(self):
+        """Known jobs of every process, newest first"""
+        jobs = {job['id']: job for job in self._stored(os.path.join(current_app.config['BACKUP_DIR'], 'jobs'))}
+        with self._lock:
+            jobs.update((job_id, job.to_dict()) for job_id, job in self._jobs.items())
+        return sorted(jobs.values(), key=lambda job: job['created_at'], reverse=True)
+
+    def wait(self, job_id, timeout=None):
+        """Block until a job finishes or timeout passes; returns its status"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        job = self.get(job_id)
+        while job is not None and job['status'] not in ('succeeded', 'failed'):
+            if deadline is not None and time.monotonic() > deadline:
+                break
+            time.sleep(0.01)
+            job = self.get(job_id)
+        return job
+
+def backup_task(job):
+    """Job body: snapshot the live database; the result is the snapshot name"""
+    job.page_size = db_manager.page_size
+    return db_manager.create_backup(progress=job.progress, verify=job.params.get('verify'))
+
+def restore_task(job):
+    """Job body: restore job.params['backup_path'] over the live database"""
+    from app.espn_api import clear_conditional_cache
+
+    job.page_size = db_manager.page_size
+    db_manager.restore_backup(job.params['backup_path'], progress=job.progress)
+    # Everything may differ now; make clients and caches refetch
+    week_schedule.invalidate()
+    clear_conditional_cache()
+    bump_data_version()
+    db.session.commit()
+    relay = current_app.extensions.get('event_relay')
+    if relay is not None:
+        # The restored live_event table may stop below last_id; re-seed from its tip
+        relay.last_id = None
+        relay.poll()
+    return job.params['backup_path']
+
+jobs = JobRunner()
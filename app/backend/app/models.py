@@ -9,8 +9,16 @@ class User(UserMixin, db.Model):
     is_admin = db.Column(db.Boolean, default=False)
     first_login = db.Column(db.Boolean, default=True)
     picks = db.relationship('Pick', backref='user', lazy=True)
+    standings = db.relationship('WeeklyStanding', backref='user', lazy=True, cascade='all, delete-orphan')
 
 class Game(db.Model):
+    __table_args__ = (
+        db.Index('ix_game_week_start_time', 'week', 'start_time'),
+        db.Index('ix_game_unfinished', 'week', 'start_time',
+                 sqlite_where=db.text('winner IS NULL'),
+                 postgresql_where=db.text('winner IS NULL')),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     espn_id = db.Column(db.String(20), unique=True, nullable=False)
     week = db.Column(db.Integer, nullable=False)
@@ -21,6 +29,7 @@ class Game(db.Model):
     final_score_home = db.Column(db.Integer)
     final_score_away = db.Column(db.Integer)
     winner = db.Column(db.String(3))
+    favorite = db.Column(db.String(3))  # Betting favorite from the ESPN line, if any
     picks = db.relationship('Pick', backref='game', lazy=True)
 
     @property
@@ -28,6 +37,13 @@ class Game(db.Model):
         return self.winner is not None
 
 class Pick(db.Model):
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'game_id', name='uq_pick_user_game'),
+        db.Index('ix_pick_user_week', 'user_id', 'week'),
+        db.Index('ix_pick_week_user', 'week', 'user_id'),
+        db.Index('ix_pick_game_id', 'game_id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     game_id = db.Column(db.Integer, db.ForeignKey('game.id'), nullable=False)
@@ -39,3 +55,42 @@ class Pick(db.Model):
     @property
     def is_correct(self):
         return self.game.winner == self.picked_team if self.game.winner else None
+
+class WeeklyStanding(db.Model):
+    """Materialized per-user, per-week pick results backing the leaderboard"""
+    __table_args__ = (
+        # Covers the weekly leader and tiebreak aggregates of the standings engine
+        db.Index('ix_weekly_standing_rank', 'week', 'correct_picks', 'mnf_distance', 'user_id'),
+    )
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    week = db.Column(db.Integer, primary_key=True, index=True)
+    correct_picks = db.Column(db.Integer, nullable=False, default=0)
+    total_picks = db.Column(db.Integer, nullable=False, default=0)
+    mnf_distance = db.Column(db.Integer)  # |MNF total guess - actual|, once the MNF game is final
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class WeekSync(db.Model):
+    """When each week was last pulled from ESPN and last seen to change"""
+    week = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    last_synced_at = db.Column(db.DateTime, nullable=False)
+    last_changed_at = db.Column(db.DateTime)
+
+class SchedulerLease(db.Model):
+    """Database-backed lease electing the single process that runs scheduled jobs"""
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(120), nullable=False)
+    acquired_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+class LiveEvent(db.Model):
+    """Outbox of live updates written by ingestion and relayed to SSE clients"""
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+class DataVersion(db.Model):
+    """Counter bumped in the same transaction as every write that changes API responses"""
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
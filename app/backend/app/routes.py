@@ -1,13 +1,23 @@
-from flask import jsonify, request, send_file
+from flask import Blueprint, Response, current_app, jsonify, request, send_file, stream_with_context
 from flask_login import login_required, current_user, login_user, logout_user
-from app import app, db, bcrypt, User, Game, Pick
+from app import db, bcrypt, User, Pick, WeeklyStanding
 from datetime import datetime, timedelta
 import json
-from sqlalchemy import case, func
-from app.utils import require_admin
+import os
+from app.utils import require_admin, bulk_upsert, BACKUP_VERIFY_MODES
+from app.standings import refresh_standings, season_standings, team_stats, week_standings
+from app.cache import week_schedule, bump_data_version, conditional_get, cached_response, response_cache
+from app.events import broker, start_relay, KEEPALIVE_INTERVAL
+from app.export import EXPORT_FORMATS, EXPORT_GENERATORS
+from app.jobs import BackupJob, JobConflict, backup_task, jobs, restore_task
 from app import db_manager
 
-@app.route('/api/login', methods=['POST'])
+api = Blueprint('api', __name__)
+
+BACKUP_PAGE_SIZE = 100  # Default page of /api/admin/backups
+BACKUP_PAGE_SIZE_MAX = 1000
+
+@api.route('/api/login', methods=['POST'])
 def login():
     data = request.get_json()
     user = User.query.filter_by(username=data['username']).first()
@@ -20,7 +30,7 @@ def login():
         })
     return jsonify({'success': False, 'message': 'Invalid credentials'}), 401
 
-@app.route('/api/change_password', methods=['POST'])
+@api.route('/api/change_password', methods=['POST'])
 @login_required
 def change_password():
     data = request.get_json()
@@ -29,39 +39,59 @@ def change_password():
     db.session.commit()
     return jsonify({'success': True})
 
-@app.route('/api/picks', methods=['GET', 'POST'])
+@api.route('/api/picks', methods=['GET', 'POST'])
 @login_required
+@conditional_get
 def picks():
     if request.method == 'POST':
         data = request.get_json()
         week = data['week']
         
+        schedule = week_schedule.get(week)
+        
         # Check if picks can be modified
-        first_game = Game.query.filter_by(week=week).order_by(Game.start_time).first()
-        if first_game and datetime.utcnow() > first_game.start_time - timedelta(hours=2):
+        if schedule.first_kickoff and datetime.utcnow() > schedule.first_kickoff - timedelta(hours=2):
             if not current_user.is_admin:
                 return jsonify({'success': False, 'message': 'Picks are locked'}), 403
-
-        # Process picks
-        for pick in data['picks']:
-            game_pick = Pick.query.filter_by(
-                user_id=current_user.id,
-                game_id=pick['game_id']
-            ).first()
+        
+        submitted = {pick['game_id']: pick for pick in data['picks']}
+        invalid_game_ids = sorted(set(submitted) - schedule.game_ids)
+        if invalid_game_ids:
+            return jsonify({
+                'success': False,
+                'message': f"Games {invalid_game_ids} are not part of week {week}"
+            }), 400
+        
+        # Prefetch the user's picks for the week and only write what changed
+        existing = {
+            pick.game_id: pick
+            for pick in Pick.query.filter_by(user_id=current_user.id, week=week).all()
+        }
+        rows = []
+        for game_id, pick in submitted.items():
+            current = existing.get(game_id)
+            if 'mnf_total_points' in pick:
+                mnf_total_points = pick['mnf_total_points']
+            else:
+                mnf_total_points = current.mnf_total_points if current else None
             
-            if not game_pick:
-                game_pick = Pick(
-                    user_id=current_user.id,
-                    game_id=pick['game_id'],
-                    week=week
-                )
-                db.session.add(game_pick)
+            if current and current.picked_team == pick['team'] and current.mnf_total_points == mnf_total_points:
+                continue
             
-            game_pick.picked_team = pick['team']
-            if 'mnf_total_points' in pick:
-                game_pick.mnf_total_points = pick['mnf_total_points']
+            rows.append({
+                'user_id': current_user.id,
+                'game_id': game_id,
+                'week': week,
+                'picked_team': pick['team'],
+                'mnf_total_points': mnf_total_points
+            })
         
-        db.session.commit()
+        if rows:
+            bulk_upsert(db.session, Pick, rows, ['user_id', 'game_id'],
+                        ('week', 'picked_team', 'mnf_total_points'))
+            refresh_standings(week, [current_user.id])
+            bump_data_version()
+            db.session.commit()
         return jsonify({'success': True})
 
     # GET request
@@ -75,7 +105,7 @@ def picks():
         } for pick in picks]
     })
 
-@app.route('/api/admin/users', methods=['GET', 'POST', 'PUT', 'DELETE'])
+@api.route('/api/admin/users', methods=['GET', 'POST', 'PUT', 'DELETE'])
 @login_required
 @require_admin
 def manage_users():
@@ -108,6 +138,8 @@ def manage_users():
         
         if 'username' in data:
             user.username = data['username']
+            # Usernames appear on the leaderboard
+            bump_data_version()
         if 'is_admin' in data:
             user.is_admin = data['is_admin']
         if 'password' in data:
@@ -123,26 +155,31 @@ def manage_users():
             return jsonify({'success': False, 'message': 'User not found'}), 404
         
         db.session.delete(user)
+        bump_data_version()
         db.session.commit()
         return jsonify({'success': True})
 
-@app.route('/api/admin/backup', methods=['POST'])
+@api.route('/api/admin/backup', methods=['POST'])
 @login_required
 @require_admin
 def create_backup():
-    try:
-        backup_path = db_manager.create_backup()
-        return jsonify({
-            'success': True,
-            'backup_path': backup_path
-        })
-    except Exception as e:
+    """Start a backup job; poll /api/admin/jobs/<id> for its progress"""
+    data = request.get_json(silent=True) or {}
+    verify = data.get('verify')
+    if verify is not None and verify not in BACKUP_VERIFY_MODES:
         return jsonify({
             'success': False,
-            'message': str(e)
-        }), 500
+            'message': f"Unknown verification mode {verify}; use one of {', '.join(BACKUP_VERIFY_MODES)}"
+        }), 400
+    
+    params = {'verify': verify} if verify else {}
+    job = jobs.submit(current_app._get_current_object(), BackupJob('backup', params), backup_task)
+    return jsonify({
+        'success': True,
+        'job': job.to_dict()
+    }), 202
 
-@app.route('/api/admin/backup/restore', methods=['POST'])
+@api.route('/api/admin/backup/restore', methods=['POST'])
 @login_required
 @require_admin
 def restore_backup():
@@ -155,24 +192,99 @@ def restore_backup():
             'message': 'Backup path not provided'
         }), 400
     
+    if not os.path.isfile(backup_path) and not db_manager.store.exists(backup_path):
+        return jsonify({
+            'success': False,
+            'message': f"Backup not found: {backup_path}"
+        }), 404
+    
     try:
-        db_manager.restore_backup(backup_path)
-        return jsonify({'success': True})
+        job = jobs.submit(
+            current_app._get_current_object(),
+            BackupJob('restore', {'backup_path': backup_path}),
+            restore_task,
+            lock=jobs.restore_lock
+        )
+    except JobConflict as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 409
+    
+    return jsonify({
+        'success': True,
+        'job': job.to_dict()
+    }), 202
+
+@api.route('/api/admin/jobs', methods=['GET'])
+@login_required
+@require_admin
+def list_jobs():
+    return jsonify({
+        'success': True,
+        'jobs': jobs.list()
+    })
+
+@api.route('/api/admin/jobs/<job_id>', methods=['GET'])
+@login_required
+@require_admin
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+    
+    return jsonify({
+        'success': True,
+        'job': job
+    })
+
+@api.route('/api/admin/backups', methods=['GET'])
+@login_required
+@require_admin
+def list_backups():
+    """Page through the backup index, newest first"""
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = min(max(request.args.get('limit', BACKUP_PAGE_SIZE, type=int), 1), BACKUP_PAGE_SIZE_MAX)
+    try:
+        since = request.args.get('since')
+        until = request.args.get('until')
+        since = datetime.fromisoformat(since) if since else None
+        until = datetime.fromisoformat(until) if until else None
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'since and until must be ISO 8601 dates'
+        }), 400
+    
+    try:
+        total, backups = db_manager.query_backups(
+            offset, limit, since=since, until=until,
+            schema_version=request.args.get('schema_version')
+        )
+        return jsonify({
+            'success': True,
+            'backups': backups,
+            'total': total,
+            'offset': offset,
+            'limit': limit
+        })
     except Exception as e:
         return jsonify({
             'success': False,
             'message': str(e)
         }), 500
 
-@app.route('/api/admin/backups', methods=['GET'])
+@api.route('/api/admin/backups/reconcile', methods=['POST'])
 @login_required
 @require_admin
-def list_backups():
+def reconcile_backups():
+    """Rebuild the backup index from what is actually on disk"""
     try:
-        backups = db_manager.list_backups()
+        result = db_manager.reconcile_backups()
         return jsonify({
             'success': True,
-            'backups': backups
+            'result': result,
+            'store': db_manager.store.stats()
         })
     except Exception as e:
         return jsonify({
@@ -180,55 +292,122 @@ def list_backups():
             'message': str(e)
         }), 500
 
-@app.route('/api/leaderboard', methods=['GET'])
+@api.route('/api/admin/export', methods=['GET'])
 @login_required
-def leaderboard():
+@require_admin
+def export_picks():
+    """Stream every pick with its game and result as CSV or NDJSON"""
+    export_format = request.args.get('format', 'csv')
     week = request.args.get('week', type=int)
     
-    # Get all picks for the week
-    picks_query = db.session.query(
-        Pick.user_id,
-        func.count(case([(Pick.picked_team == Game.winner, 1)])).label('correct_picks'),
-        func.count(Pick.id).label('total_picks')
-    ).join(Game).filter(Pick.week == week)
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({
+            'success': False,
+            'message': f"Unsupported format {export_format}; use one of {', '.join(EXPORT_FORMATS)}"
+        }), 400
     
-    if week is None:
-        picks_query = picks_query.group_by(Pick.user_id)
-    else:
-        picks_query = picks_query.filter(Pick.week == week).group_by(Pick.user_id)
+    filename = f"picks_week{week}.{export_format}" if week is not None else f"picks.{export_format}"
+    # stream_with_context keeps the session open while the cursor is read
+    return Response(
+        stream_with_context(EXPORT_GENERATORS[export_format](week)),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+@api.route('/api/admin/cache', methods=['GET', 'DELETE'])
+@login_required
+@require_admin
+def cache_stats():
+    if request.method == 'DELETE':
+        week_schedule.invalidate(request.args.get('week', type=int))
+        response_cache.clear()
     
-    picks_results = picks_query.all()
+    return jsonify({
+        'success': True,
+        'week_schedule': week_schedule.stats(),
+        'responses': response_cache.stats()
+    })
+
+@api.route('/api/admin/espn/rate-limit', methods=['GET'])
+@login_required
+@require_admin
+def espn_rate_limit():
+    from app.espn_api import rate_limiter
     
-    # Calculate accuracy and create leaderboard
-    leaderboard = []
-    for user_id, correct_picks, total_picks in picks_results:
-        user = User.query.get(user_id)
-        accuracy = (correct_picks / total_picks * 100) if total_picks > 0 else 0
-        leaderboard.append({
-            'username': user.username,
-            'correct_picks': correct_picks,
-            'total_picks': total_picks,
-            'accuracy': round(accuracy, 2)
-        })
+    return jsonify({
+        'success': True,
+        'rate_limiter': rate_limiter.stats()
+    })
+
+@api.route('/api/admin/stream', methods=['GET'])
+@login_required
+@require_admin
+def stream_stats():
+    return jsonify({
+        'success': True,
+        'stream': broker.stats()
+    })
+
+@api.route('/api/stream', methods=['GET'])
+@login_required
+def stream():
+    """Server-Sent Events: score changes and leaderboard deltas as ingestion finds them"""
+    start_relay(current_app._get_current_object())
+    keepalive = current_app.config.get('SSE_KEEPALIVE_INTERVAL', KEEPALIVE_INTERVAL)
+    subscription = broker.subscribe(request.headers.get('Last-Event-ID', type=int))
+    
+    def generate():
+        try:
+            yield 'retry: 5000\n\n'
+            while not subscription.closed:
+                frame = subscription.get(timeout=keepalive)
+                yield frame if frame is not None else ': keepalive\n\n'
+        finally:
+            broker.unsubscribe(subscription)
     
-    # Sort by correct picks (descending) and username (ascending)
-    leaderboard.sort(key=lambda x: (-x['correct_picks'], x['username']))
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@api.route('/api/leaderboard', methods=['GET'])
+@login_required
+@conditional_get
+@cached_response()
+def leaderboard():
+    week = request.args.get('week', type=int)
+    
+    if week is not None:
+        standings = week_standings(week)
+        return jsonify({
+            'week': week,
+            'complete': standings['complete'],
+            'winners': standings['winners'],
+            'leaderboard': standings['standings']
+        })
     
-    return jsonify({'leaderboard': leaderboard})
+    standings = season_standings()
+    return jsonify({
+        'leaderboard': standings['standings'],
+        'weekly_winners': standings['weekly_winners']
+    })
 
-@app.route('/api/stats', methods=['GET'])
+@api.route('/api/stats', methods=['GET'])
 @login_required
+@conditional_get
+@cached_response(per_user=True)
 def stats():
     user_id = request.args.get('user_id', type=int) or current_user.id
     
-    # Get user's picks
-    picks_query = db.session.query(
-        Pick.week,
-        func.count(case([(Pick.picked_team == Game.winner, 1)])).label('correct_picks'),
-        func.count(Pick.id).label('total_picks')
-    ).join(Game).filter(Pick.user_id == user_id).group_by(Pick.week)
-    
-    picks_results = picks_query.all()
+    # Get user's weekly results from the materialized standings
+    picks_results = db.session.query(
+        WeeklyStanding.week,
+        WeeklyStanding.correct_picks,
+        WeeklyStanding.total_picks
+    ).filter(WeeklyStanding.user_id == user_id).order_by(WeeklyStanding.week).all()
     
     # Calculate weekly and overall stats
     weekly_stats = []
@@ -255,5 +434,28 @@ def stats():
             'correct_picks': total_correct,
             'total_picks': total_picks,
             'accuracy': round(overall_accuracy, 2)
-        }
+        },
+        **team_stats(user_id)
     })
+
+@api.route('/api/stats/pool', methods=['GET'])
+@login_required
+@conditional_get
+@cached_response()
+def pool_stats():
+    """Team breakdowns over every pick in the pool"""
+    return jsonify(team_stats())
+
+@api.route('/api/scenarios', methods=['GET'])
+@login_required
+@conditional_get
+@cached_response()
+def scenarios():
+    """Who can still win a week, and how likely, over the remaining games"""
+    week = request.args.get('week', type=int)
+    if week is None:
+        return jsonify({'success': False, 'message': 'Week is required'}), 400
+
+    # numpy is only needed here; keep it off the import path of every other request
+    from app.scenarios import week_scenarios
+    return jsonify(week_scenarios(week))
@@ -0,0 +1,135 @@
+import numpy as np
+from app import db
+from app.models import Game, Pick, User
+
+ENUMERATION_LIMIT = 20  # Remaining games up to which every outcome is enumerated (2^20 ~ 1M)
+SAMPLE_SIZE = 1 << 17  # Outcomes drawn when there are more remaining games than that
+CHUNK_SIZE = 1 << 13  # Outcomes scored per matrix product, bounding memory to chunk x users
+
+def load_week_picks(week):
+    """Every pick of a week with its game, in one query"""
+    return db.session.query(
+        Pick.user_id,
+        User.username,
+        Pick.picked_team,
+        Pick.mnf_total_points,
+        Game.id,
+        Game.home_team,
+        Game.away_team,
+        Game.winner,
+        Game.is_mnf,
+        Game.final_score_home,
+        Game.final_score_away
+    ).join(Game, Pick.game_id == Game.id).join(User, Pick.user_id == User.id).filter(
+        Pick.week == week
+    ).all()
+
+def build_pick_matrix(rows):
+    """Turn pick rows into the engine's arrays
+
+    Returns (usernames, base, swing, tiebreak, game_ids): base holds each
+    user's points from decided games plus the points they get if every
+    remaining game goes to the away team; swing is the users x games
+    matrix of +1 (picked home), -1 (picked away) or 0 (no pick), so a
+    user's score in outcome o (1 = home win) is base + swing @ o.
+    tiebreak is each user's MNF distance (lower is better, no guess worst)
+    once the MNF game is final, else None.
+    """
+    users = {}
+    remaining = {}
+    mnf_distances = {}
+    mnf_final = False
+    for (user_id, username, picked_team, mnf_total_points, game_id, home_team,
+         away_team, winner, is_mnf, final_home, final_away) in rows:
+        users.setdefault(user_id, username)
+        if winner is None:
+            remaining.setdefault(game_id, len(remaining))
+        elif is_mnf:
+            mnf_final = True
+            if mnf_total_points is not None:
+                mnf_distances[user_id] = abs(mnf_total_points - (final_home + final_away))
+
+    user_index = {user_id: index for index, user_id in enumerate(users)}
+    base = np.zeros(len(users), dtype=np.float32)
+    swing = np.zeros((len(users), len(remaining)), dtype=np.float32)
+    for (user_id, _, picked_team, _, game_id, home_team, away_team, winner, *_rest) in rows:
+        row = user_index[user_id]
+        if winner is not None:
+            base[row] += picked_team == winner
+        elif picked_team == home_team:
+            swing[row, remaining[game_id]] = 1
+        elif picked_team == away_team:
+            swing[row, remaining[game_id]] = -1
+            base[row] += 1
+
+    tiebreak = None
+    if mnf_final:
+        no_guess = max(mnf_distances.values(), default=0) + 1
+        tiebreak = np.array([mnf_distances.get(user_id, no_guess) for user_id in users], dtype=np.float32)
+
+    return list(users.values()), base, swing, tiebreak, list(remaining)
+
+def _outcome_bits(codes, games):
+    """Rows of 0/1 game results (1 = home win) for integer-coded outcomes"""
+    return ((codes[:, None] >> np.arange(games, dtype=np.int64)) & 1).astype(np.float32)
+
+def _win_shares(scores, tiebreak):
+    """Per user, the summed share of first place over a block of outcomes
+
+    Players tied for first split it evenly; with the MNF game final the
+    closer guess decides between them first.
+    """
+    if tiebreak is not None:
+        scores = scores * (tiebreak.max() + 1) - tiebreak
+    winners = scores == scores.max(axis=1, keepdims=True)
+    return (winners / winners.sum(axis=1, keepdims=True, dtype=np.float32)).sum(axis=0)
+
+def simulate(base, swing, tiebreak=None, rng=None):
+    """Win probability of every user over the remaining outcomes
+
+    Enumerates all 2^n results of the n remaining games (each equally
+    likely), or samples SAMPLE_SIZE of them past ENUMERATION_LIMIT games.
+    Outcomes are scored in chunks as one matrix product each. Returns
+    (probabilities, outcomes considered, exact).
+    """
+    users, games = swing.shape
+    if users == 0:
+        return np.zeros(0), 0, True
+
+    exact = games <= ENUMERATION_LIMIT
+    total = 1 << games if exact else SAMPLE_SIZE
+    rng = rng or np.random.default_rng()
+    shares = np.zeros(users, dtype=np.float64)
+    for start in range(0, total, CHUNK_SIZE):
+        size = min(CHUNK_SIZE, total - start)
+        if exact:
+            outcomes = _outcome_bits(np.arange(start, start + size, dtype=np.int64), games)
+        else:
+            outcomes = rng.integers(0, 2, size=(size, games)).astype(np.float32)
+        shares += _win_shares(outcomes @ swing.T + base, tiebreak)
+    return shares / total, total, exact
+
+def week_scenarios(week, rng=None):
+    """What-if summary of a week: who can still win it, and how likely"""
+    usernames, base, swing, tiebreak, game_ids = build_pick_matrix(load_week_picks(week))
+    probabilities, outcomes, exact = simulate(base, swing, tiebreak, rng)
+
+    best_case = base + np.clip(swing, 0, None).sum(axis=1)
+    current = base - (swing < 0).sum(axis=1)
+    scenarios = [{
+        'username': username,
+        'correct_picks': int(current[index]),
+        'max_possible': int(best_case[index]),
+        'win_probability': round(float(probabilities[index]), 4),
+        # Only provable when every outcome was scored
+        'eliminated': bool(exact and probabilities[index] == 0)
+    } for index, username in enumerate(usernames)]
+    scenarios.sort(key=lambda entry: (-entry['win_probability'], entry['username']))
+
+    return {
+        'week': week,
+        'remaining_games': len(game_ids),
+        'outcomes': outcomes,
+        'method': 'enumerated' if exact else 'sampled',
+        'scenarios': scenarios
+    }
@@ -0,0 +1,84 @@
+from datetime import timedelta
+from app import db
+from app.models import Game
+
+class AdaptivePollPolicy:
+    """Decide how long to wait before the next ESPN poll from the stored schedule
+
+    Only unfinished games are considered, so weeks whose games are all final
+    never keep the poller busy. All times are naive UTC, like Game.start_time.
+    """
+    LIVE_INTERVAL = timedelta(minutes=1)  # A game is in progress
+    ACTIVE_INTERVAL = timedelta(minutes=5)  # Picks about to lock or a kickoff is near
+    IDLE_INTERVAL = timedelta(hours=1)  # Between game windows
+    GAME_DURATION = timedelta(hours=4)
+    OVERDUE_LIMIT = timedelta(hours=24)  # Unfinished this long after kickoff: postponed or cancelled, stop waiting
+    LOCK_LEAD = timedelta(hours=2)  # Picks lock this long before a week's first kickoff
+    LOOKAHEAD = timedelta(minutes=30)  # Speed up this long before a lock or kickoff
+
+    def phase(self, now, games):
+        """Classify `now` as 'live', 'active' or 'idle' for (week, start_time) pairs of unfinished games"""
+        first_kickoffs = {}
+        phase = 'idle'
+        for week, start_time in games:
+            first_kickoffs[week] = min(start_time, first_kickoffs.get(week, start_time))
+            if start_time <= now < start_time + self.GAME_DURATION:
+                return 'live'
+            if start_time + self.OVERDUE_LIMIT <= now:
+                # Postponed, cancelled or never scored; the hourly poll still picks it up
+                continue
+            if start_time + self.GAME_DURATION <= now:
+                # Overdue: delayed, suspended or not yet marked final
+                phase = 'active'
+            elif start_time - self.LOOKAHEAD <= now:
+                phase = 'active'
+
+        for first_kickoff in first_kickoffs.values():
+            lock_time = first_kickoff - self.LOCK_LEAD
+            if lock_time - self.LOOKAHEAD <= now <= first_kickoff:
+                phase = 'active'
+        return phase
+
+    def next_delay(self, now, games):
+        """Return the timedelta until the next poll"""
+        games = list(games)
+        phase = self.phase(now, games)
+        if phase == 'live':
+            return self.LIVE_INTERVAL
+        if phase == 'active':
+            return self.ACTIVE_INTERVAL
+
+        # Sleep until the next window opens, but never longer than the idle interval
+        delay = self.IDLE_INTERVAL
+        first_kickoffs = {}
+        for week, start_time in games:
+            first_kickoffs[week] = min(start_time, first_kickoffs.get(week, start_time))
+            window_start = start_time - self.LOOKAHEAD
+            if window_start > now:
+                delay = min(delay, window_start - now)
+        for first_kickoff in first_kickoffs.values():
+            window_start = first_kickoff - self.LOCK_LEAD - self.LOOKAHEAD
+            if window_start > now:
+                delay = min(delay, window_start - now)
+        return max(delay, self.LIVE_INTERVAL)
+
+def load_unfinished_games():
+    """(week, start_time) of every game that has no winner yet"""
+    return db.session.query(Game.week, Game.start_time).filter(Game.winner.is_(None)).all()
+
+def simulate_schedule(policy, games, start, end, on_poll=None):
+    """Replay the poll schedule between start and end on a simulated clock
+
+    `games` is a list of (week, start_time) for unfinished games; `on_poll`
+    may return an updated list (e.g. with finished games removed). Returns
+    the list of simulated poll times.
+    """
+    polls = []
+    now = start
+    games = list(games)
+    while now < end:
+        polls.append(now)
+        if on_poll is not None:
+            games = list(on_poll(now, games))
+        now = now + policy.next_delay(now, games)
+    return polls
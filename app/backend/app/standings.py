@@ -0,0 +1,300 @@
+from sqlalchemy import and_, case, func, insert, literal, or_, select, union_all
+from app import db
+from app.models import Pick, Game, User, WeeklyStanding
+
+def live_standings_query(week=None, user_ids=None):
+    """Aggregate pick results per user and week directly from the picks table"""
+    query = db.session.query(
+        Pick.user_id,
+        Pick.week,
+        func.count(case((Pick.picked_team == Game.winner, 1))).label('correct_picks'),
+        func.count(Pick.id).label('total_picks'),
+        func.min(case((
+            and_(Game.is_mnf, Game.winner.isnot(None), Pick.mnf_total_points.isnot(None)),
+            func.abs(Pick.mnf_total_points - (Game.final_score_home + Game.final_score_away))
+        ))).label('mnf_distance')
+    ).join(Game, Pick.game_id == Game.id)
+
+    if week is not None:
+        query = query.filter(Pick.week == week)
+    if user_ids is not None:
+        query = query.filter(Pick.user_id.in_(user_ids))
+
+    return query.group_by(Pick.user_id, Pick.week)
+
+def _insert_standings(rows):
+    """Bulk insert aggregated (user_id, week, correct, total, mnf_distance) rows"""
+    if rows:
+        db.session.execute(insert(WeeklyStanding), [{
+            'user_id': user_id,
+            'week': week,
+            'correct_picks': correct_picks,
+            'total_picks': total_picks,
+            'mnf_distance': mnf_distance
+        } for user_id, week, correct_picks, total_picks, mnf_distance in rows])
+    return len(rows)
+
+def refresh_standings(week, user_ids=None):
+    """Recompute the materialized standings of one week, optionally for a subset of users.
+
+    The caller owns the transaction; rows are only flushed to the session.
+    """
+    stale = WeeklyStanding.query.filter(WeeklyStanding.week == week)
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        if not user_ids:
+            return 0
+        stale = stale.filter(WeeklyStanding.user_id.in_(user_ids))
+    stale.delete(synchronize_session='fetch')
+
+    return _insert_standings(live_standings_query(week, user_ids).all())
+
+def refresh_standings_for_games(game_ids):
+    """Refresh the standings of every user who picked one of the given games"""
+    game_ids = list(game_ids)
+    if not game_ids:
+        return 0
+
+    affected = db.session.query(Pick.week, Pick.user_id).filter(
+        Pick.game_id.in_(game_ids)
+    ).distinct().all()
+
+    users_by_week = {}
+    for week, user_id in affected:
+        users_by_week.setdefault(week, set()).add(user_id)
+
+    return sum(refresh_standings(week, user_ids) for week, user_ids in users_by_week.items())
+
+def rebuild_standings():
+    """Drop and recompute the whole standings table from the picks table"""
+    from app.cache import bump_data_version
+
+    WeeklyStanding.query.delete(synchronize_session='fetch')
+    count = _insert_standings(live_standings_query().all())
+    bump_data_version()
+    db.session.commit()
+    return count
+
+def check_standings(week=None):
+    """Compare the materialized standings against the live aggregation.
+
+    Returns a list of mismatches; an empty list means the table is consistent.
+    """
+    live = {
+        (user_id, row_week): (correct_picks, total_picks, mnf_distance)
+        for user_id, row_week, correct_picks, total_picks, mnf_distance in live_standings_query(week).all()
+    }
+
+    materialized_query = WeeklyStanding.query
+    if week is not None:
+        materialized_query = materialized_query.filter(WeeklyStanding.week == week)
+    materialized = {
+        (row.user_id, row.week): (row.correct_picks, row.total_picks, row.mnf_distance)
+        for row in materialized_query.all()
+    }
+
+    mismatches = []
+    for key in sorted(set(live) | set(materialized)):
+        expected = live.get(key)
+        actual = materialized.get(key)
+        if expected != actual:
+            mismatches.append({
+                'user_id': key[0],
+                'week': key[1],
+                'expected': expected,
+                'actual': actual
+            })
+    return mismatches
+
+def _accuracy(correct_picks, total_picks):
+    return round(correct_picks / total_picks * 100, 2) if total_picks > 0 else 0
+
+def _dense_ranks(entries, rank_key):
+    """Assign 'rank' to entries already sorted by rank_key; equal keys share a rank"""
+    rank, previous = 0, object()
+    for entry in entries:
+        key = rank_key(entry)
+        if key != previous:
+            rank += 1
+            previous = key
+        entry['rank'] = rank
+    return entries
+
+def _unfinished_games(week=None):
+    """Per week, how many games have no winner yet"""
+    query = select(
+        Game.week,
+        (func.count(Game.id) - func.count(Game.winner)).label('unfinished')
+    ).group_by(Game.week)
+    if week is not None:
+        query = query.where(Game.week == week)
+    return query.subquery()
+
+def weekly_winners_query(week=None):
+    """(user_id, week) of every weekly winner, as plain aggregates
+
+    A week is won by the users with the most correct picks, closest to the
+    MNF total among those (or all of them if nobody guessed), once every
+    game of the week is final.
+    """
+    leaders = select(
+        WeeklyStanding.week,
+        func.max(WeeklyStanding.correct_picks).label('top_correct')
+    ).group_by(WeeklyStanding.week)
+    if week is not None:
+        leaders = leaders.where(WeeklyStanding.week == week)
+    leaders = leaders.subquery()
+
+    closest = select(
+        WeeklyStanding.week,
+        leaders.c.top_correct,
+        func.min(WeeklyStanding.mnf_distance).label('top_distance')
+    ).join(leaders, and_(
+        leaders.c.week == WeeklyStanding.week,
+        WeeklyStanding.correct_picks == leaders.c.top_correct
+    )).group_by(WeeklyStanding.week, leaders.c.top_correct).subquery()
+
+    unfinished = _unfinished_games(week)
+    return select(WeeklyStanding.user_id, WeeklyStanding.week).join(closest, and_(
+        closest.c.week == WeeklyStanding.week,
+        WeeklyStanding.correct_picks == closest.c.top_correct,
+        or_(
+            WeeklyStanding.mnf_distance == closest.c.top_distance,
+            and_(WeeklyStanding.mnf_distance.is_(None), closest.c.top_distance.is_(None))
+        )
+    )).join(unfinished, and_(unfinished.c.week == WeeklyStanding.week, unfinished.c.unfinished == 0))
+
+def season_standings():
+    """Season table with dense ranks, plus the winners of every finished week
+
+    Ranks by total correct picks, then by weekly wins. Totals and wins are
+    aggregated in SQL (no window functions; SQLite's are several times
+    slower than plain GROUP BYs here), so only one row per user comes back.
+    """
+    wins = weekly_winners_query().subquery()
+    correct_picks = func.sum(WeeklyStanding.correct_picks)
+    weekly_wins = func.count(wins.c.week)
+    rows = db.session.execute(select(
+        User.username,
+        correct_picks,
+        func.sum(WeeklyStanding.total_picks),
+        weekly_wins
+    ).join(User, WeeklyStanding.user_id == User.id).outerjoin(wins, and_(
+        wins.c.user_id == WeeklyStanding.user_id,
+        wins.c.week == WeeklyStanding.week
+    )).group_by(User.id, User.username).order_by(
+        correct_picks.desc(), weekly_wins.desc(), User.username
+    ))
+
+    standings = _dense_ranks([{
+        'username': username,
+        'correct_picks': correct,
+        'total_picks': total,
+        'accuracy': _accuracy(correct, total),
+        'weekly_wins': won
+    } for username, correct, total, won in rows], lambda entry: (entry['correct_picks'], entry['weekly_wins']))
+
+    winners = {}
+    for week, username in db.session.execute(
+        select(wins.c.week, User.username).join(User, User.id == wins.c.user_id).order_by(wins.c.week, User.username)
+    ):
+        winners.setdefault(week, []).append(username)
+
+    return {
+        'standings': standings,
+        'weekly_winners': [{'week': week, 'winners': names} for week, names in winners.items()]
+    }
+
+def week_standings(week):
+    """One week's table with dense ranks and MNF distances, from one query
+
+    Ranks by correct picks, then by MNF distance (closest first, no guess
+    last). The rank-1 users are the winners once every game is final.
+    """
+    unfinished = _unfinished_games(week)
+    rows = db.session.execute(select(
+        User.username,
+        WeeklyStanding.correct_picks,
+        WeeklyStanding.total_picks,
+        WeeklyStanding.mnf_distance,
+        unfinished.c.unfinished
+    ).join(User, WeeklyStanding.user_id == User.id).outerjoin(
+        unfinished, unfinished.c.week == WeeklyStanding.week
+    ).where(WeeklyStanding.week == week).order_by(
+        WeeklyStanding.correct_picks.desc(),
+        WeeklyStanding.mnf_distance.is_(None),
+        WeeklyStanding.mnf_distance,
+        User.username
+    )).all()
+
+    standings = _dense_ranks([{
+        'username': username,
+        'correct_picks': correct,
+        'total_picks': total,
+        'accuracy': _accuracy(correct, total),
+        'mnf_distance': mnf_distance
+    } for username, correct, total, mnf_distance, _ in rows], lambda entry: (entry['correct_picks'], entry['mnf_distance']))
+
+    complete = bool(rows) and rows[0].unfinished == 0
+    return {
+        'week': week,
+        'complete': complete,
+        'winners': [entry['username'] for entry in standings if complete and entry['rank'] == 1],
+        'standings': standings
+    }
+
+def team_stats(user_id=None):
+    """Pick results broken down by team, opponent, home/away and favorite/underdog
+
+    Picks are first grouped by (team, opponent, side, line) in a CTE, which
+    holds at most a few rows per matchup; each breakdown is a GROUP BY over
+    that, all in one UNION ALL statement. Leave out user_id for the whole
+    pool. Like the standings, total_picks includes picks on open games.
+    Games without a betting line are left out of the favorite split.
+    """
+    picked_home = Pick.picked_team == Game.home_team
+    groups = select(
+        Pick.picked_team.label('team'),
+        case((picked_home, Game.away_team), else_=Game.home_team).label('opponent'),
+        case((picked_home, 'home'), else_='away').label('side'),
+        case(
+            (Game.favorite.is_(None), None),
+            (Pick.picked_team == Game.favorite, 'favorite'),
+            else_='underdog'
+        ).label('line'),
+        func.count(Pick.id).label('total_picks'),
+        func.count(case((Pick.picked_team == Game.winner, 1))).label('correct_picks')
+    ).join(Game, Pick.game_id == Game.id)
+    if user_id is not None:
+        groups = groups.where(Pick.user_id == user_id)
+    groups = groups.group_by('team', 'opponent', 'side', 'line').cte('pick_groups')
+
+    def breakdown(name, column):
+        return select(
+            literal(name).label('breakdown'),
+            column.label('key'),
+            func.sum(groups.c.total_picks),
+            func.sum(groups.c.correct_picks)
+        ).where(column.isnot(None)).group_by(column)
+
+    rows = db.session.execute(union_all(
+        breakdown('team', groups.c.team),
+        breakdown('opponent', groups.c.opponent),
+        breakdown('side', groups.c.side),
+        breakdown('line', groups.c.line)
+    ).order_by('breakdown', 'key'))
+
+    stats = {'team': [], 'opponent': [], 'side': {}, 'line': {}}
+    for name, key, total, correct in rows:
+        entry = {'total_picks': total, 'correct_picks': correct, 'accuracy': _accuracy(correct, total)}
+        if name in ('team', 'opponent'):
+            stats[name].append({'team': key, **entry})
+        else:
+            stats[name][key] = entry
+
+    return {
+        'team_stats': stats['team'],
+        'against_stats': stats['opponent'],
+        'home_away': stats['side'],
+        'favorite_underdog': stats['line']
+    }
@@ -0,0 +1,174 @@
+"""Standalone ingestion worker.
+
+Runs the ESPN polling scheduler outside the web process. Start any number of
+copies; a database lease makes sure only one of them schedules jobs at a time:
+
+    python -m app.worker
+"""
+import os
+import signal
+import socket
+import threading
+import uuid
+import pytz
+from datetime import datetime, timedelta
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.base import BaseTrigger
+from sqlalchemy import case, or_
+from sqlalchemy.exc import IntegrityError
+from app import create_app, db, logger, update_games
+from app.models import SchedulerLease
+from app.scheduler import AdaptivePollPolicy, load_unfinished_games
+
+LEASE_NAME = 'ingestion'
+LEASE_TTL = timedelta(seconds=60)
+RENEW_INTERVAL = 20  # Seconds; well inside the TTL so a healthy leader never lapses
+
+def default_holder():
+    """Identify this process in the lease table"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+def acquire_lease(name, holder, ttl=LEASE_TTL, now=None):
+    """Take or renew a lease; returns True when `holder` owns it afterwards
+
+    The conditional UPDATE only succeeds for the current holder or once the
+    lease has expired, so two processes can't both win the same round.
+    """
+    now = now or datetime.utcnow()
+    claimed = SchedulerLease.query.filter(
+        SchedulerLease.name == name,
+        or_(SchedulerLease.holder == holder, SchedulerLease.expires_at <= now)
+    ).update({
+        SchedulerLease.holder: holder,
+        SchedulerLease.expires_at: now + ttl,
+        SchedulerLease.acquired_at: case(
+            (SchedulerLease.holder == holder, SchedulerLease.acquired_at),
+            else_=now
+        )
+    }, synchronize_session=False)
+
+    if claimed:
+        db.session.commit()
+        return True
+
+    try:
+        db.session.add(SchedulerLease(name=name, holder=holder, acquired_at=now, expires_at=now + ttl))
+        db.session.commit()
+        return True
+    except IntegrityError:
+        # Somebody else holds a live lease
+        db.session.rollback()
+        return False
+
+def release_lease(name, holder, now=None):
+    """Give up a lease early so a standby can take over on its next round"""
+    now = now or datetime.utcnow()
+    SchedulerLease.query.filter_by(name=name, holder=holder).update(
+        {SchedulerLease.expires_at: now}, synchronize_session=False
+    )
+    db.session.commit()
+
+class GameDayTrigger(BaseTrigger):
+    """APScheduler trigger that fires on the AdaptivePollPolicy's schedule
+
+    `games_source` is called every time the next fire time is computed and
+    must return (week, start_time) pairs of unfinished games.
+    """
+
+    def __init__(self, games_source, policy=None):
+        self.games_source = games_source
+        self.policy = policy or AdaptivePollPolicy()
+
+    def get_next_fire_time(self, previous_fire_time, now):
+        naive_now = now.astimezone(pytz.UTC).replace(tzinfo=None)
+        try:
+            games = self.games_source()
+        except Exception:
+            # Can't see the schedule; fall back to the safe, frequent cadence
+            return now + self.policy.ACTIVE_INTERVAL
+        return now + self.policy.next_delay(naive_now, games)
+
+    def __str__(self):
+        return 'game-day adaptive'
+
+class IngestionWorker:
+    """Hold the ingestion lease and run the scheduler only while leader"""
+
+    def __init__(self, flask_app=None, holder=None, scheduler_factory=None):
+        self.app = flask_app or create_app()
+        self.holder = holder or default_holder()
+        self.scheduler_factory = scheduler_factory or BackgroundScheduler
+        self.scheduler = None
+        self.is_leader = False
+        self._stop = threading.Event()
+
+    def tick(self):
+        """One election round: renew or take the lease, then start/stop the scheduler"""
+        with self.app.app_context():
+            try:
+                leader = acquire_lease(LEASE_NAME, self.holder)
+            except Exception as e:
+                logger.error(f"Lease renewal failed: {str(e)}")
+                db.session.rollback()
+                leader = False
+
+        if leader and not self.is_leader:
+            logger.info(f"{self.holder} acquired the ingestion lease")
+            self._start_scheduler()
+        elif not leader and self.is_leader:
+            logger.warning(f"{self.holder} lost the ingestion lease")
+            self._stop_scheduler()
+        self.is_leader = leader
+        return leader
+
+    def run_update(self):
+        """Scheduled job: only the current leader may write"""
+        if not self.is_leader:
+            return None
+        with self.app.app_context():
+            return update_games()
+
+    def games_source(self):
+        with self.app.app_context():
+            return load_unfinished_games()
+
+    def _start_scheduler(self):
+        self.scheduler = self.scheduler_factory()
+        self.scheduler.add_job(
+            func=self.run_update,
+            trigger=GameDayTrigger(self.games_source),
+            id='update_games',
+            max_instances=1,
+            coalesce=True
+        )
+        self.scheduler.start()
+
+    def _stop_scheduler(self):
+        if self.scheduler is not None:
+            self.scheduler.shutdown(wait=False)
+            self.scheduler = None
+
+    def stop(self, *args):
+        self._stop.set()
+
+    def run_forever(self, renew_interval=RENEW_INTERVAL):
+        """Run election rounds until stopped, then release the lease"""
+        while not self._stop.is_set():
+            self.tick()
+            self._stop.wait(renew_interval)
+
+        self._stop_scheduler()
+        if self.is_leader:
+            with self.app.app_context():
+                release_lease(LEASE_NAME, self.holder)
+            self.is_leader = False
+
+def main():
+    worker = IngestionWorker()
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    logger.info(f"Ingestion worker {worker.holder} starting")
+    worker.run_forever()
+
+if __name__ == '__main__':
+    main()
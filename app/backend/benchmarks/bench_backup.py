@@ -0,0 +1,116 @@
+"""Backup latency and request latency during a backup: file copy vs online backup API.
+
+Builds a synthetic database of the requested size, then runs each backup
+method while a client thread keeps issuing short reads and writes:
+
+    cd app/backend && python -m benchmarks.bench_backup --size-mb 300
+
+Pass --wal to put the database in WAL mode, as a production deployment
+under write load should be.
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from app.utils import copy_database
+
+ROW_BYTES = 4000
+
+def build_database(path, size_mb, wal):
+    conn = sqlite3.connect(path, isolation_level=None)
+    if wal:
+        conn.execute('PRAGMA journal_mode=wal')
+    conn.execute('CREATE TABLE filler (id INTEGER PRIMARY KEY, payload BLOB)')
+    conn.execute('CREATE TABLE request_log (id INTEGER PRIMARY KEY, at REAL)')
+    rows = size_mb * 1024 * 1024 // ROW_BYTES
+    conn.execute('BEGIN')
+    conn.executemany('INSERT INTO filler (payload) VALUES (?)', (
+        (os.urandom(ROW_BYTES),) for _ in range(rows)
+    ))
+    conn.execute('COMMIT')
+    conn.close()
+    return rows
+
+class RequestLoad:
+    """A client thread issuing one indexed read and one small write per request"""
+
+    def __init__(self, path, rows, write_every):
+        self.path = path
+        self.rows = rows
+        self.write_every = write_every
+        self.latencies = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        count = 0
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            conn.execute('SELECT length(payload) FROM filler WHERE id = ?', (count * 7919 % self.rows + 1,)).fetchone()
+            if count % self.write_every == 0:
+                conn.execute('INSERT INTO request_log (at) VALUES (?)', (started,))
+            self.latencies.append(time.perf_counter() - started)
+            count += 1
+            time.sleep(0.001)
+        conn.close()
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=300)
+    parser.add_argument('--pages', type=int, default=1024, help='Pages per online backup step')
+    parser.add_argument('--pause', type=float, default=0.005, help='Seconds between steps')
+    parser.add_argument('--write-every', type=int, default=10, help='One write per this many requests')
+    parser.add_argument('--wal', action='store_true')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='bench_backup_')
+    source = os.path.join(work_dir, 'live.db')
+    try:
+        rows = build_database(source, args.size_mb, args.wal)
+        print(f"database: {os.path.getsize(source) / 1e6:.0f}MB, {'wal' if args.wal else 'rollback journal'}")
+
+        methods = [
+            ('idle (no backup)', lambda target: time.sleep(2)),
+            ('shutil.copy2', lambda target: shutil.copy2(source, target)),
+            ('backup API, one step', lambda target: copy_database(source, target, pages=-1)),
+            (f'backup API, {args.pages} pages/step', lambda target: copy_database(
+                source, target, pages=args.pages, pause=args.pause
+            ))
+        ]
+        print(f"{'method':32} {'backup':>8} {'requests':>9} {'p50':>8} {'p99':>8} {'max':>8}")
+        for name, run in methods:
+            target = os.path.join(work_dir, 'copy.db')
+            with RequestLoad(source, rows, args.write_every) as load:
+                time.sleep(0.2)
+                started = time.perf_counter()
+                result = run(target)
+                elapsed = time.perf_counter() - started
+            if os.path.exists(target):
+                os.remove(target)
+            latencies = load.latencies
+            restarts = f" ({result['restarts']} restarts)" if isinstance(result, dict) and result['restarts'] else ''
+            print(f"{name:32} {elapsed:7.2f}s {len(latencies):9d} "
+                  f"{percentile(latencies, 0.5) * 1000:6.2f}ms {percentile(latencies, 0.99) * 1000:6.2f}ms "
+                  f"{max(latencies, default=0) * 1000:6.1f}ms{restarts}")
+    finally:
+        shutil.rmtree(work_dir)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Size and throughput of the backup store against plain full-copy backups.
+
+Takes a series of snapshots of a synthetic database, changing a few rows
+between them, and compares the store's size with keeping every copy:
+
+    cd app/backend && python -m benchmarks.bench_backup_store --size-mb 100 --snapshots 24
+
+zstd is measured too when the `zstandard` package is installed.
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from app.backup_store import BackupStore, CHUNK_SIZE
+
+ROW_BYTES = 1000
+
+def build_database(path, size_mb):
+    """Rows that are partly random and partly repetitive, like real table pages"""
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute('CREATE TABLE item (id INTEGER PRIMARY KEY, payload BLOB)')
+    rows = size_mb * 1024 * 1024 // ROW_BYTES
+    conn.execute('BEGIN')
+    conn.executemany('INSERT INTO item (payload) VALUES (?)', (
+        (os.urandom(ROW_BYTES // 4) + b'pick' * (ROW_BYTES * 3 // 16),) for _ in range(rows)
+    ))
+    conn.execute('COMMIT')
+    return conn, rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=100)
+    parser.add_argument('--snapshots', type=int, default=24)
+    parser.add_argument('--change-rows', type=int, default=50, help='Rows updated between snapshots')
+    parser.add_argument('--chunk-kb', type=int, default=CHUNK_SIZE // 1024)
+    args = parser.parse_args()
+
+    codecs = ['gzip']
+    try:
+        import zstandard  # noqa: F401
+        codecs.append('zstd')
+    except ImportError:
+        pass
+
+    work_dir = tempfile.mkdtemp(prefix='bench_backup_store_')
+    try:
+        database = os.path.join(work_dir, 'live.db')
+        conn, rows = build_database(database, args.size_mb)
+        size = os.path.getsize(database)
+        print(f"database: {size / 1e6:.0f}MB, {args.snapshots} snapshots, "
+              f"{args.change_rows} rows changed between them, {args.chunk_kb}KB chunks")
+        print(f"plain copies would take {size * args.snapshots / 1e6:.0f}MB")
+
+        for codec in codecs:
+            store = BackupStore(os.path.join(work_dir, codec), codec=codec, chunk_size=args.chunk_kb * 1024)
+            add_seconds = []
+            for i in range(args.snapshots):
+                conn.execute('BEGIN')
+                for j in range(args.change_rows):
+                    conn.execute('UPDATE item SET payload = ? WHERE id = ?', (
+                        os.urandom(ROW_BYTES), (i * 7919 + j * 104729) % rows + 1
+                    ))
+                conn.execute('COMMIT')
+                started = time.perf_counter()
+                store.add(f'snap{i:03d}', database)
+                add_seconds.append(time.perf_counter() - started)
+
+            restored = os.path.join(work_dir, 'restored.db')
+            started = time.perf_counter()
+            store.restore_to(f'snap{args.snapshots - 1:03d}', restored)
+            restore_seconds = time.perf_counter() - started
+            os.remove(restored)
+
+            stats = store.stats()
+            print(f"{codec:5} store {stats['stored_bytes'] / 1e6:8.1f}MB ({stats['ratio']}x) | "
+                  f"first snapshot {size / 1e6 / add_seconds[0]:6.0f}MB/s, "
+                  f"later {size / 1e6 / (sum(add_seconds[1:]) / max(1, len(add_seconds) - 1)):6.0f}MB/s | "
+                  f"restore {size / 1e6 / restore_seconds:6.0f}MB/s")
+        conn.close()
+    finally:
+        shutil.rmtree(work_dir)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Full-season ESPN backfill: serial ESPNAPI vs AsyncESPNFetcher.
+
+Runs against a local fake ESPN server, so no network access is needed:
+
+    cd app/backend && python -m benchmarks.bench_espn_backfill --latency 0.08
+
+Both clients get an identical token bucket; pass --rate/--burst to match
+the process-wide limiter (2/s, burst 10), where both end up rate-bound.
+"""
+import argparse
+import time
+from app.espn_api import (
+    ESPNAPI, AsyncESPNFetcher, TokenBucket, clear_conditional_cache
+)
+from tests.fake_espn import FakeESPNServer
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--weeks', type=int, default=18)
+    parser.add_argument('--latency', type=float, default=0.08, help='Simulated server latency in seconds')
+    parser.add_argument('--rate', type=float, default=20.0, help='Token bucket requests per second')
+    parser.add_argument('--burst', type=int, default=18, help='Token bucket capacity')
+    args = parser.parse_args()
+
+    server = FakeESPNServer(latency=args.latency).start()
+    weeks = range(1, args.weeks + 1)
+    try:
+        api = ESPNAPI(limiter=TokenBucket(args.rate, args.burst))
+        api.BASE_URL = server.url
+        clear_conditional_cache()
+        started = time.perf_counter()
+        for week in weeks:
+            api.get_games(week)
+        serial = time.perf_counter() - started
+
+        fetch_api = ESPNAPI(limiter=TokenBucket(args.rate, args.burst))
+        fetch_api.BASE_URL = server.url
+        clear_conditional_cache()
+        fetcher = AsyncESPNFetcher(api=fetch_api)
+        started = time.perf_counter()
+        fetcher.backfill(weeks)
+        concurrent = time.perf_counter() - started
+    finally:
+        server.stop()
+
+    print(f"weeks={args.weeks} latency={args.latency}s rate={args.rate}/s burst={args.burst}")
+    print(f"serial ESPNAPI:        {serial:8.3f}s")
+    print(f"AsyncESPNFetcher:      {concurrent:8.3f}s")
+    print(f"speedup:               {serial / concurrent:8.1f}x")
+
+if __name__ == '__main__':
+    main()
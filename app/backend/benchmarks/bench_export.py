@@ -0,0 +1,50 @@
+"""Pick export throughput and time to first byte for a full season.
+
+Seeds a throwaway SQLite database with every member picking every game
+of a season, then streams the export the way the endpoint does:
+
+    cd app/backend && python -m benchmarks.bench_export --users 500 --weeks 17
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from app import create_app, db
+from app.export import EXPORT_GENERATORS
+from tests.helpers import seed_season
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--weeks', type=int, default=17)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='bench_export_')
+    try:
+        flask_app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(work_dir, 'bench.db'),
+            'BACKUP_DIR': os.path.join(work_dir, 'backups')
+        })
+        with flask_app.app_context():
+            db.create_all()
+            picks = seed_season(args.users, args.weeks)
+            print(f"{picks} picks ({args.users} members x {args.weeks} weeks)")
+
+            for export_format, generate in EXPORT_GENERATORS.items():
+                started = time.perf_counter()
+                chunks = generate()
+                exported = len(next(chunks))
+                first_byte = time.perf_counter() - started
+                for chunk in chunks:
+                    exported += len(chunk)
+                elapsed = time.perf_counter() - started
+                print(f"{export_format:7} {exported / 1e6:6.1f}MB in {elapsed:5.2f}s "
+                      f"({picks / elapsed:8.0f} picks/s), first byte after {first_byte * 1000:.0f}ms")
+            db.session.remove()
+    finally:
+        shutil.rmtree(work_dir)
+
+if __name__ == '__main__':
+    main()
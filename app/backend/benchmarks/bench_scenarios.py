@@ -0,0 +1,35 @@
+"""Scenario simulation for a large pool: exact enumeration and sampling.
+
+Builds a random pick matrix (each player on either side of each game, or
+no pick) and times simulate():
+
+    cd app/backend && python -m benchmarks.bench_scenarios --users 1000 --games 16
+"""
+import argparse
+import time
+import numpy as np
+from unittest.mock import patch
+from app.scenarios import simulate
+from tests.helpers import pick_matrix
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--games', type=int, default=16)
+    args = parser.parse_args()
+
+    base, swing = pick_matrix(args.users, args.games)
+    started = time.perf_counter()
+    _, outcomes, exact = simulate(base, swing)
+    elapsed = time.perf_counter() - started
+    print(f"{'enumerated' if exact else 'sampled'}: {outcomes} outcomes x {args.users} players "
+          f"in {elapsed * 1000:.0f}ms")
+
+    with patch('app.scenarios.ENUMERATION_LIMIT', 0):
+        started = time.perf_counter()
+        _, outcomes, _ = simulate(base, swing, rng=np.random.default_rng(7))
+        elapsed = time.perf_counter() - started
+    print(f"sampled:    {outcomes} outcomes x {args.users} players in {elapsed * 1000:.0f}ms")
+
+if __name__ == '__main__':
+    main()
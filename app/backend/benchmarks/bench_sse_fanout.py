@@ -0,0 +1,53 @@
+"""Event fan-out latency from one publish to every subscriber.
+
+Subscribes N threads to an in-process EventBroker, the way each open
+/api/stream does, publishes a burst of events and measures how long the
+slowest subscriber takes to receive all of them:
+
+    cd app/backend && python -m benchmarks.bench_sse_fanout --subscribers 300
+
+This is the broker's share of delivery; the relay adds up to one
+EVENT_RELAY_INTERVAL on top, since it polls the live_event table.
+"""
+import argparse
+import json
+import threading
+import time
+from app.events import EventBroker
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--subscribers', type=int, default=300)
+    parser.add_argument('--events', type=int, default=2)
+    args = parser.parse_args()
+
+    broker = EventBroker()
+    subscriptions = [broker.subscribe() for _ in range(args.subscribers)]
+    received = []
+    lock = threading.Lock()
+
+    def consume(subscription):
+        for _ in range(args.events):
+            if subscription.get(timeout=30) is None:
+                return
+        with lock:
+            received.append(time.perf_counter())
+
+    threads = [threading.Thread(target=consume, args=(subscription,)) for subscription in subscriptions]
+    for thread in threads:
+        thread.start()
+
+    started = time.perf_counter()
+    for event_id in range(1, args.events + 1):
+        broker.publish(event_id, 'scores', json.dumps({'week': 1, 'games': [{'id': event_id}]}))
+    published = time.perf_counter() - started
+    for thread in threads:
+        thread.join()
+
+    stats = broker.stats()
+    print(f"{args.subscribers} subscribers x {args.events} events: published in {published * 1000:.1f}ms, "
+          f"all received after {(max(received) - started) * 1000:.1f}ms "
+          f"({len(received)} complete, {stats['dropped']} dropped)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Season and weekly standings over a large synthetic pool.
+
+Seeds a throwaway SQLite database with materialized weekly standings and
+times season_standings() and week_standings():
+
+    cd app/backend && python -m benchmarks.bench_standings --users 1000 --weeks 18
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from app import create_app, db
+from app.standings import season_standings, week_standings
+from tests.helpers import seed_standings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--weeks', type=int, default=18)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='bench_standings_')
+    try:
+        flask_app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(work_dir, 'bench.db'),
+            'BACKUP_DIR': os.path.join(work_dir, 'backups')
+        })
+        with flask_app.app_context():
+            db.create_all()
+            seed_standings(args.users, args.weeks)
+
+            season_timings, week_timings = [], []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                season_standings()
+                season_timings.append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                week_standings(args.weeks // 2)
+                week_timings.append(time.perf_counter() - started)
+            db.session.remove()
+
+        print(f"{args.users} players x {args.weeks} weeks, best of {args.repeat}")
+        print(f"season standings: {min(season_timings) * 1000:8.1f}ms")
+        print(f"one week:         {min(week_timings) * 1000:8.1f}ms")
+    finally:
+        shutil.rmtree(work_dir)
+
+if __name__ == '__main__':
+    main()
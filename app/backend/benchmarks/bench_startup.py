@@ -0,0 +1,54 @@
+"""Cold import and first-request latency in fresh interpreters.
+
+Each run starts a new Python process that imports the app, creates an
+in-memory database and serves one request:
+
+    cd app/backend && python -m benchmarks.bench_startup --runs 10
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP_SCRIPT = '''
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+flask_app = app.create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'BACKUP_DIR': sys.argv[1]})
+with flask_app.app_context():
+    app.db.create_all()
+flask_app.test_client().get('/api/leaderboard')
+served = time.perf_counter()
+print(json.dumps({'import_seconds': imported - started, 'first_request_seconds': served - imported}))
+'''
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='bench_startup_')
+    try:
+        runs = []
+        for _ in range(args.runs):
+            result = subprocess.run(
+                [sys.executable, '-c', STARTUP_SCRIPT, os.path.join(work_dir, 'backups')],
+                cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+            )
+            runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    finally:
+        shutil.rmtree(work_dir)
+
+    for key, label in (('import_seconds', 'import'), ('first_request_seconds', 'first request')):
+        timings = [run[key] * 1000 for run in runs]
+        print(f"{label:14} median {statistics.median(timings):6.0f}ms, best {min(timings):6.0f}ms")
+
+if __name__ == '__main__':
+    main()
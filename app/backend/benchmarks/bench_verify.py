@@ -0,0 +1,49 @@
+"""Cost of each backup verification mode against the copy it checks.
+
+Copies a synthetic database with the online backup API, then times the
+checks each mode runs on the copy and the store pass, which takes the
+snapshot's SHA-256 and, when checksummed, round-trips its chunks:
+
+    cd app/backend && python -m benchmarks.bench_verify --size-mb 300
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from app.backup_store import BackupStore
+from app.utils import DatabaseManager, copy_database
+from benchmarks.bench_backup import build_database
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=300)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='bench_verify_')
+    manager = DatabaseManager()
+    try:
+        source = os.path.join(work_dir, 'live.db')
+        build_database(source, args.size_mb, wal=False)
+        target = os.path.join(work_dir, 'copy.db')
+        started = time.perf_counter()
+        stats = copy_database(source, target, count_rows=True)
+        print(f"database: {os.path.getsize(source) / 1e6:.0f}MB, copied in {time.perf_counter() - started:.2f}s")
+
+        for mode in ('quick', 'full'):
+            report = manager._verify_backup(target, mode, source_rows=stats['row_counts'])
+            checks = ', '.join(f"{check} {seconds:.2f}s" for check, seconds in report['timings'].items())
+            print(f"{mode:12} {sum(report['timings'].values()):6.2f}s  ({checks})")
+
+        for verify in (False, True):
+            store = BackupStore(os.path.join(work_dir, f'store_{verify}'))
+            started = time.perf_counter()
+            manifest = store.add('snap', target, verify=verify)
+            extra = f", {manifest['verify_seconds']:.2f}s of it round-tripping chunks" if verify else ''
+            print(f"store pass {'with' if verify else 'without'} chunk checks: "
+                  f"{time.perf_counter() - started:.2f}s{extra}")
+    finally:
+        shutil.rmtree(work_dir)
+
+if __name__ == '__main__':
+    main()
@@ -16,7 +16,8 @@ if config.config_file_name is not None:
 
 # add your model's MetaData object here
 # for 'autogenerate' support
-from app import app, db
+from app import create_app, db
+app = create_app()
 target_metadata = db.metadata
 
 # other values from the config, defined by the needs of env.py,
@@ -0,0 +1,29 @@
+"""Add data version counter for HTTP caching
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    data_version = op.create_table('data_version',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(data_version, [{'name': 'api', 'version': 0}])
+
+
+def downgrade() -> None:
+    op.drop_table('data_version')
@@ -0,0 +1,26 @@
+"""Add betting favorite to games
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('game') as batch_op:
+        batch_op.add_column(sa.Column('favorite', sa.String(length=3), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('game') as batch_op:
+        batch_op.drop_column('favorite')
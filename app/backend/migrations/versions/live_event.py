@@ -0,0 +1,32 @@
+"""Add live event outbox for server-sent events
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('live_event',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('payload', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_live_event_created_at', 'live_event', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_live_event_created_at', table_name='live_event')
+    op.drop_table('live_event')
@@ -0,0 +1,44 @@
+"""Add MNF tiebreak distance and ranking index to weekly standings
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('weekly_standing') as batch_op:
+        batch_op.add_column(sa.Column('mnf_distance', sa.Integer(), nullable=True))
+
+    # Backfill from the MNF guesses of finished weeks
+    op.execute("""
+        UPDATE weekly_standing SET mnf_distance = (
+            SELECT MIN(ABS(pick.mnf_total_points - (game.final_score_home + game.final_score_away)))
+            FROM pick JOIN game ON pick.game_id = game.id
+            WHERE pick.user_id = weekly_standing.user_id
+              AND pick.week = weekly_standing.week
+              AND game.is_mnf
+              AND game.winner IS NOT NULL
+              AND pick.mnf_total_points IS NOT NULL
+        )
+    """)
+
+
+    op.create_index('ix_weekly_standing_rank', 'weekly_standing',
+                    ['week', 'correct_picks', 'mnf_distance', 'user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_weekly_standing_rank', table_name='weekly_standing')
+    with op.batch_alter_table('weekly_standing') as batch_op:
+        batch_op.drop_column('mnf_distance')
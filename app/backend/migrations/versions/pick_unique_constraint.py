@@ -0,0 +1,45 @@
+"""One pick per user and game
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keep the most recent pick where duplicates slipped in before the constraint
+    op.execute("""
+        DELETE FROM pick
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM pick GROUP BY user_id, game_id
+        )
+    """)
+    with op.batch_alter_table('pick') as batch_op:
+        batch_op.create_unique_constraint('uq_pick_user_game', ['user_id', 'game_id'])
+
+    # Standings were backfilled from the duplicated rows
+    op.execute("DELETE FROM weekly_standing")
+    op.execute("""
+        INSERT INTO weekly_standing (user_id, week, correct_picks, total_picks, updated_at)
+        SELECT pick.user_id, pick.week,
+               COUNT(CASE WHEN pick.picked_team = game.winner THEN 1 END),
+               COUNT(pick.id),
+               CURRENT_TIMESTAMP
+        FROM pick JOIN game ON pick.game_id = game.id
+        GROUP BY pick.user_id, pick.week
+    """)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('pick') as batch_op:
+        batch_op.drop_constraint('uq_pick_user_game', type_='unique')
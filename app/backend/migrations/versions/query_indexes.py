@@ -0,0 +1,35 @@
+"""Indexes for the pick and game query shapes
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-18 11:00:00.000000
+
+The unique (user_id, game_id) constraint on pick was added in 003.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # A user's picks for a week (GET/POST /api/picks)
+    op.create_index('ix_pick_user_week', 'pick', ['user_id', 'week'], unique=False)
+    # Everyone's picks for a week (standings refresh)
+    op.create_index('ix_pick_week_user', 'pick', ['week', 'user_id'], unique=False)
+    # Picks on a game that was just decided
+    op.create_index('ix_pick_game_id', 'pick', ['game_id'], unique=False)
+    # A week's slate in kickoff order (pick lock, ingestion)
+    op.create_index('ix_game_week_start_time', 'game', ['week', 'start_time'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_game_week_start_time', table_name='game')
+    op.drop_index('ix_pick_game_id', table_name='pick')
+    op.drop_index('ix_pick_week_user', table_name='pick')
+    op.drop_index('ix_pick_user_week', table_name='pick')
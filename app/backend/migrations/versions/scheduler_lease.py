@@ -0,0 +1,30 @@
+"""Add scheduler leader lease
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('scheduler_lease',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('holder', sa.String(length=120), nullable=False),
+        sa.Column('acquired_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('scheduler_lease')
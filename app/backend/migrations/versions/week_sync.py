@@ -0,0 +1,34 @@
+"""Track per-week ESPN sync times
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('week_sync',
+        sa.Column('week', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('last_synced_at', sa.DateTime(), nullable=False),
+        sa.Column('last_changed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('week')
+    )
+    # Unfinished games drive both the poll cadence and the ingestion plan
+    op.create_index('ix_game_unfinished', 'game', ['week', 'start_time'], unique=False,
+                    sqlite_where=sa.text('winner IS NULL'),
+                    postgresql_where=sa.text('winner IS NULL'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_game_unfinished', table_name='game')
+    op.drop_table('week_sync')
@@ -0,0 +1,45 @@
+"""Add materialized weekly standings
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('weekly_standing',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('week', sa.Integer(), nullable=False),
+        sa.Column('correct_picks', sa.Integer(), nullable=False),
+        sa.Column('total_picks', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('user_id', 'week')
+    )
+    op.create_index('ix_weekly_standing_week', 'weekly_standing', ['week'], unique=False)
+
+    # Backfill from the picks already on file
+    op.execute("""
+        INSERT INTO weekly_standing (user_id, week, correct_picks, total_picks, updated_at)
+        SELECT pick.user_id, pick.week,
+               COUNT(CASE WHEN pick.picked_team = game.winner THEN 1 END),
+               COUNT(pick.id),
+               CURRENT_TIMESTAMP
+        FROM pick JOIN game ON pick.game_id = game.id
+        GROUP BY pick.user_id, pick.week
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_weekly_standing_week', table_name='weekly_standing')
+    op.drop_table('weekly_standing')
@@ -1,13 +1,27 @@
+import os
+import tempfile
 import pytest
-from app import app as flask_app
-from app import db, User, Game, Pick
-from datetime import datetime, timedelta
+import pytz
+
+import app as app_module
+from app import create_app, db, User, Game, Pick
+from app.cache import week_schedule
+from datetime import datetime, time, timedelta
+
+_test_dir = tempfile.mkdtemp(prefix='nfl_pickems_test_')
+
+flask_app = create_app({
+    'TESTING': True,
+    'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(_test_dir, 'test.db'),
+    'BACKUP_DIR': os.path.join(_test_dir, 'backups'),
+    'WTF_CSRF_ENABLED': False
+})
 
 @pytest.fixture
 def app():
     """Create and configure a new app instance for each test."""
     # Configure app to use in-memory SQLite database
-    flask_app.config.update({
+    flask_app = create_app({
         'TESTING': True,
         'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
         'WTF_CSRF_ENABLED': False,
@@ -87,3 +101,75 @@ def _populate_test_data():
     db.session.add(pick1)
 
     db.session.commit()
+
+@pytest.fixture
+def fake_espn():
+    """A local fake ESPN server, torn down after the test."""
+    from tests.fake_espn import FakeESPNServer
+
+    server = FakeESPNServer().start()
+    yield server
+    server.stop()
+
+@pytest.fixture
+def pool_app():
+    """An app instance seeded with a small, model-consistent pool."""
+    with flask_app.app_context():
+        db.drop_all()
+        db.create_all()
+        _populate_pool_data()
+    week_schedule.invalidate()
+    app_module._committed_syncs.clear()
+
+    yield flask_app
+
+    with flask_app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def pool_client(pool_app):
+    """A test client for the seeded pool."""
+    return pool_app.test_client()
+
+def _monday_night_after(moment):
+    """The first Monday 8:15 pm US/Eastern kickoff on a later day than naive-UTC `moment`."""
+    eastern = pytz.timezone('US/Eastern')
+    local = pytz.UTC.localize(moment).astimezone(eastern)
+    day = local.date() + timedelta(days=(7 - local.weekday()) % 7 or 7)
+    return eastern.localize(datetime.combine(day, time(20, 15))).astimezone(pytz.UTC).replace(tzinfo=None)
+
+def _populate_pool_data():
+    """Populate an admin, two players and one week of games and picks."""
+    from app import bcrypt
+
+    password_hash = bcrypt.generate_password_hash('password').decode('utf-8')
+    admin = User(username='admin', password_hash=password_hash, is_admin=True, first_login=False)
+    alice = User(username='alice', password_hash=password_hash, first_login=False)
+    bob = User(username='bob', password_hash=password_hash, first_login=False)
+    db.session.add_all([admin, alice, bob])
+
+    kickoff = datetime.utcnow() + timedelta(days=2)
+    games = [
+        Game(espn_id='401547417', week=1, home_team='DET', away_team='KC',
+             start_time=kickoff),
+        Game(espn_id='401547418', week=1, home_team='NYG', away_team='DAL',
+             start_time=kickoff + timedelta(hours=3)),
+        Game(espn_id='401547419', week=1, home_team='NYJ', away_team='BUF',
+             start_time=_monday_night_after(kickoff + timedelta(hours=3)), is_mnf=True),
+    ]
+    db.session.add_all(games)
+    db.session.flush()
+
+    db.session.add_all([
+        Pick(user_id=alice.id, game_id=games[0].id, picked_team='DET', week=1),
+        Pick(user_id=alice.id, game_id=games[1].id, picked_team='DAL', week=1),
+        Pick(user_id=alice.id, game_id=games[2].id, picked_team='NYJ', week=1,
+             mnf_total_points=41),
+        Pick(user_id=bob.id, game_id=games[0].id, picked_team='KC', week=1),
+        Pick(user_id=bob.id, game_id=games[1].id, picked_team='DAL', week=1),
+    ])
+    db.session.commit()
+
+    from app.standings import rebuild_standings
+    rebuild_standings()
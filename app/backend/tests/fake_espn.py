@@ -0,0 +1,116 @@
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+def scoreboard_payload(week, games_per_week=16, completed=True):
+    """A scoreboard payload shaped like ESPN's, for one week."""
+    events = []
+    for i in range(games_per_week):
+        events.append({
+            'id': f'4015{week:02d}{i:03d}',
+            'date': f'2026-09-{10 + (i % 5):02d}T17:00Z',
+            'competitions': [{
+                'competitors': [
+                    {'homeAway': 'home', 'team': {'abbreviation': f'H{i:02d}'}, 'score': '24'},
+                    {'homeAway': 'away', 'team': {'abbreviation': f'A{i:02d}'}, 'score': '17'}
+                ],
+                'status': {'type': {'completed': completed}}
+            }]
+        })
+    return {'week': {'number': week}, 'events': events}
+
+class FakeESPNServer:
+    """A local HTTP/1.1 stand-in for the ESPN site API.
+
+    Counts TCP connections and requests, serves ETags and answers
+    If-None-Match with 304, and can add latency or extra response headers.
+    """
+
+    def __init__(self, current_week=1, games_per_week=16, latency=0.0):
+        self.current_week = current_week
+        self.games_per_week = games_per_week
+        self.latency = latency
+        self.extra_headers = {}
+        self.status_override = None
+        self.connections = 0
+        self.requests = []
+        self.not_modified = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    def payload_for(self, path, query):
+        if path.endswith('/scoreboard'):
+            week = int(query.get('week', [self.current_week])[0])
+            return scoreboard_payload(week, self.games_per_week)
+        if path.endswith('/statistics'):
+            team = path.rstrip('/').split('/')[-2]
+            return {'stats': [{'name': 'Points Per Game', 'value': float(len(team))}]}
+        return None
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                with fake._lock:
+                    fake.connections += 1
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                with fake._lock:
+                    fake.requests.append((parsed.path, dict(self.headers)))
+                if fake.latency:
+                    time.sleep(fake.latency)
+
+                if fake.status_override:
+                    status, headers = fake.status_override
+                    self._send(status, b'', headers)
+                    return
+
+                payload = fake.payload_for(parsed.path, parse_qs(parsed.query))
+                if payload is None:
+                    self._send(404, b'')
+                    return
+
+                body = json.dumps(payload).encode('utf-8')
+                etag = '"%s"' % hashlib.sha1(body).hexdigest()
+                if self.headers.get('If-None-Match') == etag:
+                    with fake._lock:
+                        fake.not_modified += 1
+                    self._send(304, b'', {'ETag': etag})
+                    return
+                self._send(200, body, {'ETag': etag, 'Content-Type': 'application/json'})
+
+            def _send(self, status, body, headers=None):
+                self.send_response(status)
+                for name, value in {**fake.extra_headers, **(headers or {})}.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if body:
+                    self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,70 @@
+import random
+import numpy as np
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from app import db, Game, Pick, User, WeeklyStanding
+
+def login(client, username, password='password'):
+    """Log a pool member in through the API."""
+    return client.post('/api/login', json={
+        'username': username,
+        'password': password
+    })
+
+def seed_standings(users, weeks, games_per_week=16):
+    """Users with a standings row for every week, and decided games for weeks 2 on"""
+    rng = random.Random(17)
+    start = db.session.query(db.func.max(User.id)).scalar() or 0
+    db.session.execute(db.insert(User), [
+        {'id': start + index + 1, 'username': f'player{index:04d}', 'first_login': False}
+        for index in range(users)
+    ])
+    db.session.execute(db.insert(Game), [{
+        'espn_id': f'bench-{week}-{slot}',
+        'week': week + 1,
+        'home_team': 'HOM',
+        'away_team': 'AWY',
+        'start_time': datetime(2026, 9, 10) + timedelta(days=7 * week, hours=slot),
+        'is_mnf': slot == games_per_week - 1,
+        'final_score_home': 20,
+        'final_score_away': 17,
+        'winner': 'HOM'
+    } for week in range(1, weeks) for slot in range(games_per_week)])
+    db.session.execute(db.insert(WeeklyStanding), [{
+        'user_id': start + index + 1,
+        'week': week,
+        'correct_picks': rng.randint(4, games_per_week),
+        'total_picks': games_per_week,
+        'mnf_distance': rng.choice([None] + list(range(30)))
+    } for index in range(users) for week in range(1, weeks + 1)])
+    db.session.commit()
+
+def pick_matrix(users, games, seed=2024):
+    """(base, swing) as build_pick_matrix() returns them, at random"""
+    rng = np.random.default_rng(seed)
+    swing = rng.choice(np.array([-1, 0, 1], dtype=np.float32), size=(users, games), p=[0.45, 0.1, 0.45])
+    base = (swing < 0).sum(axis=1).astype(np.float32)
+    return base, swing
+
+def seed_season(users, weeks, games_per_week=16):
+    """A season of games with every member picking every home team; returns the pick count"""
+    kickoff = datetime(2026, 9, 10, 17, 0)
+    db.session.execute(insert(Game), [{
+        'espn_id': f'5{week:02d}{game:03d}',
+        'week': week,
+        'home_team': f'H{game:02d}',
+        'away_team': f'A{game:02d}',
+        'start_time': kickoff + timedelta(weeks=week - 1, hours=game),
+        'winner': f'H{game:02d}' if game % 2 else f'A{game:02d}'
+    } for week in range(1, weeks + 1) for game in range(games_per_week)])
+    db.session.execute(insert(User), [{
+        'username': f'member{i:03d}', 'password_hash': 'x', 'first_login': False
+    } for i in range(users)])
+
+    games = db.session.query(Game.id, Game.week, Game.home_team).filter(Game.espn_id.like('5%')).all()
+    members = [user_id for (user_id,) in db.session.query(User.id).filter(User.username.like('member%'))]
+    db.session.execute(insert(Pick), [{
+        'user_id': user_id, 'game_id': game_id, 'picked_team': home_team, 'week': week
+    } for user_id in members for game_id, week, home_team in games])
+    db.session.commit()
+    return len(games) * len(members)
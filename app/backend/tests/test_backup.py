@@ -1,158 +1,426 @@
 import pytest
-import json
 import os
 import sqlite3
-from app import db, User, Game, Pick
-
-def test_create_backup(client):
-    """Test creating a database backup."""
-    # Login as admin
-    client.post('/api/login', json={
-        'username': 'admin',
-        'password': 'password'
-    })
-    
-    # Create backup
-    response = client.post('/api/admin/backup')
-    assert response.status_code == 200
-    data = json.loads(response.data)
-    assert data['success'] is True
-    assert 'backup_path' in data
-    
-    # Verify backup file exists and is a valid SQLite database
-    backup_path = data['backup_path']
-    assert os.path.exists(backup_path)
-    
-    # Try opening the backup file as SQLite database
-    conn = sqlite3.connect(backup_path)
-    cursor = conn.cursor()
-    
-    # Check if essential tables exist
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-    tables = {row[0] for row in cursor.fetchall()}
-    assert 'user' in tables
-    assert 'game' in tables
-    assert 'pick' in tables
-    
-    conn.close()
-
-def test_list_backups(client):
-    """Test listing available backups."""
-    # Login as admin
-    client.post('/api/login', json={
-        'username': 'admin',
-        'password': 'password'
-    })
-    
-    # First create a backup
-    client.post('/api/admin/backup')
-    
-    # List backups
-    response = client.get('/api/admin/backups')
-    assert response.status_code == 200
-    data = json.loads(response.data)
-    assert 'backups' in data
-    backups = data['backups']
-    assert len(backups) > 0
-    
-    # Verify backup entry structure
-    backup = backups[0]
-    assert 'filename' in backup
-    assert 'path' in backup
-    assert 'created_at' in backup
-    assert 'size' in backup
-    assert backup['size'] > 0
-
-def test_restore_backup(client, app):
-    """Test restoring from a backup."""
-    # Login as admin
-    client.post('/api/login', json={
-        'username': 'admin',
-        'password': 'password'
-    })
-    
-    # Create initial backup
-    response = client.post('/api/admin/backup')
-    backup_path = json.loads(response.data)['backup_path']
-    
-    # Make some changes to the database
-    with app.app_context():
-        new_user = User(
-            username='tempuser',
-            password_hash='temp',
-            is_admin=False
-        )
-        db.session.add(new_user)
+from app import db, db_manager, User, LiveEvent
+from app.utils import copy_database
+from tests.helpers import login
+
+def _make_database(path, journal_mode='delete', rows=2000):
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute(f'PRAGMA journal_mode={journal_mode}')
+    conn.execute('CREATE TABLE item (id INTEGER PRIMARY KEY, payload TEXT)')
+    conn.executemany('INSERT INTO item (payload) VALUES (?)', [('x' * 200,) for _ in range(rows)])
+    return conn
+
+def _count_items(path):
+    conn = sqlite3.connect(path)
+    try:
+        assert conn.execute('PRAGMA integrity_check').fetchone()[0] == 'ok'
+        return conn.execute('SELECT COUNT(*) FROM item').fetchone()[0]
+    finally:
+        conn.close()
+
+def test_copy_database_in_steps(tmp_path):
+    _make_database(tmp_path / 'live.db').close()
+    copied = []
+    stats = copy_database(str(tmp_path / 'live.db'), str(tmp_path / 'copy.db'), pages=10, pause=0,
+                          progress=lambda done, total: copied.append((done, total)))
+
+    assert stats['steps'] > 1 and stats['restarts'] == 0
+    assert copied[-1] == (stats['pages'], stats['pages'])
+    assert _count_items(tmp_path / 'copy.db') == 2000
+
+def test_copy_database_restarts_on_concurrent_write(tmp_path):
+    """In rollback mode a write between steps restarts the copy, which then includes it."""
+    writer = _make_database(tmp_path / 'live.db')
+    written = []
+
+    def write_once(done, total):
+        if not written:
+            writer.execute("INSERT INTO item (payload) VALUES ('late')")
+            written.append(done)
+
+    stats = copy_database(str(tmp_path / 'live.db'), str(tmp_path / 'copy.db'), pages=10, pause=0,
+                          progress=write_once)
+    writer.close()
+
+    assert stats['restarts'] == 1
+    assert _count_items(tmp_path / 'copy.db') == 2001
+
+def test_copy_database_falls_back_to_one_step(tmp_path):
+    """A source written between every step is copied in one go after a few restarts."""
+    from app.utils import BACKUP_MAX_RESTARTS
+
+    writer = _make_database(tmp_path / 'live.db')
+    stats = copy_database(str(tmp_path / 'live.db'), str(tmp_path / 'copy.db'), pages=10, pause=0,
+                          progress=lambda done, total: writer.execute("INSERT INTO item (payload) VALUES ('w')"))
+    writer.close()
+
+    assert stats['restarts'] == BACKUP_MAX_RESTARTS + 1
+    assert _count_items(tmp_path / 'copy.db') >= 2000
+
+def test_copy_database_snapshots_wal(tmp_path):
+    """In WAL mode writers carry on and the copy is the snapshot it started from."""
+    writer = _make_database(tmp_path / 'live.db', journal_mode='wal')
+    stats = copy_database(str(tmp_path / 'live.db'), str(tmp_path / 'copy.db'), pages=10, pause=0,
+                          checkpoint=True,
+                          progress=lambda done, total: writer.execute("INSERT INTO item (payload) VALUES ('w')"))
+
+    assert stats['restarts'] == 0
+    assert _count_items(tmp_path / 'copy.db') == 2000
+    assert writer.execute('SELECT COUNT(*) FROM item').fetchone()[0] == 2000 + stats['steps']
+    writer.close()
+
+@pytest.fixture
+def backup_dir(pool_app, tmp_path, monkeypatch):
+    """An empty backup directory for the pool app."""
+    monkeypatch.setitem(pool_app.config, 'BACKUP_DIR', str(tmp_path / 'backups'))
+    return tmp_path / 'backups'
+
+def _finished_job(client, response):
+    """Wait for the job a 202 response started and return its final status."""
+    from app.jobs import jobs
+
+    assert response.status_code == 202
+    job_id = response.get_json()['job']['id']
+    jobs.wait(job_id, timeout=30)
+    status = client.get(f'/api/admin/jobs/{job_id}')
+    assert status.status_code == 200
+    return status.get_json()['job']
+
+def test_backup_and_restore_round_trip(pool_client, pool_app, backup_dir):
+    """Backups are written through the online API and restore over the live database."""
+    login(pool_client, 'admin')
+    job = _finished_job(pool_client, pool_client.post('/api/admin/backup'))
+    assert job['status'] == 'succeeded'
+    assert job['pages_done'] == job['pages_total'] > 0
+    assert job['bytes_done'] == job['pages_done'] * 4096
+    assert job['duration'] > 0
+    backup_path = job['result']
+    with pool_app.app_context():
+        assert [backup['path'] for backup in db_manager.list_backups()] == [backup_path]
+        assert not [name for name in os.listdir(db_manager.backup_dir) if name.endswith('.tmp')]
+
+    with pool_app.app_context():
+        db.session.add(User(username='tempuser', password_hash='x'))
         db.session.commit()
-    
-    # Restore from backup
-    response = client.post('/api/admin/restore', json={
-        'backup_path': backup_path
-    })
-    assert response.status_code == 200
-    data = json.loads(response.data)
-    assert data['success'] is True
-    
-    # Verify the changes were reverted
-    with app.app_context():
+
+    response = pool_client.post('/api/admin/backup/restore', json={'backup_path': backup_path})
+    assert _finished_job(pool_client, response)['status'] == 'succeeded'
+
+    with pool_app.app_context():
         assert User.query.filter_by(username='tempuser').first() is None
+        assert User.query.count() == 3
+        # The safety snapshot taken before restoring shares nearly every chunk
+        assert len(db_manager.list_backups()) == 2
+        assert db_manager.store.stats()['ratio'] > 1
 
-def test_backup_as_regular_user(client):
-    """Test that regular users cannot access backup functionality."""
-    # Login as regular user
-    client.post('/api/login', json={
-        'username': 'testuser',
-        'password': 'password'
-    })
-    
-    # Try to create backup
-    response = client.post('/api/admin/backup')
-    assert response.status_code == 403
-    
-    # Try to list backups
-    response = client.get('/api/admin/backups')
-    assert response.status_code == 403
-    
-    # Try to restore backup
-    response = client.post('/api/admin/restore', json={
-        'backup_path': 'some/path'
-    })
+def test_restore_resets_relay_and_validators(pool_client, pool_app, backup_dir):
+    """Events written after a restore are delivered even though the restored ids go backwards."""
+    from app import espn_api
+    from app.events import EventBroker, EventRelay
+
+    login(pool_client, 'admin')
+    backup_path = _finished_job(pool_client, pool_client.post('/api/admin/backup'))['result']
+
+    local = EventBroker()
+    relay = EventRelay(pool_app, local)
+    pool_app.extensions['event_relay'] = relay
+    try:
+        relay.poll()
+        with pool_app.app_context():
+            db.session.add_all([LiveEvent(kind='scores', payload='{"lost": true}') for _ in range(3)])
+            db.session.commit()
+        assert relay.poll() == 3
+        espn_api._conditional_cache['scoreboard'] = ('"etag"', None)
+
+        response = pool_client.post('/api/admin/backup/restore', json={'backup_path': backup_path})
+        assert _finished_job(pool_client, response)['status'] == 'succeeded'
+        assert not espn_api._conditional_cache
+
+        subscription = local.subscribe()
+        with pool_app.app_context():
+            db.session.add(LiveEvent(kind='scores', payload='{"week": 1}'))
+            db.session.commit()
+        assert relay.poll() == 1
+        assert 'data: {"week": 1}' in subscription.get(timeout=0)
+    finally:
+        pool_app.extensions.pop('event_relay', None)
+
+def test_restore_legacy_backup_file(pool_client, pool_app, backup_dir, tmp_path):
+    """Plain backup_*.db files from before the snapshot store still restore."""
+    legacy = tmp_path / 'backup_20250101_000000.db'
+    with pool_app.app_context():
+        copy_database(db_manager.db_path, str(legacy))
+        db.session.add(User(username='tempuser', password_hash='x'))
+        db.session.commit()
+
+    login(pool_client, 'admin')
+    response = pool_client.post('/api/admin/backup/restore', json={'backup_path': str(legacy)})
+    assert _finished_job(pool_client, response)['status'] == 'succeeded'
+    with pool_app.app_context():
+        assert User.query.filter_by(username='tempuser').first() is None
+
+def test_restores_cannot_overlap(pool_client, pool_app, backup_dir):
+    """A second restore is refused while one is running."""
+    import threading
+    from unittest.mock import patch
+
+    login(pool_client, 'admin')
+    backup_path = _finished_job(pool_client, pool_client.post('/api/admin/backup'))['result']
+
+    release = threading.Event()
+    with patch.object(db_manager, 'restore_backup', side_effect=lambda *args, **kwargs: release.wait(10)):
+        first = pool_client.post('/api/admin/backup/restore', json={'backup_path': backup_path})
+        second = pool_client.post('/api/admin/backup/restore', json={'backup_path': backup_path})
+        assert first.status_code == 202
+        assert second.status_code == 409
+        assert pool_client.get(f"/api/admin/jobs/{first.get_json()['job']['id']}").get_json()['job']['status'] in ('queued', 'running')
+        release.set()
+        assert _finished_job(pool_client, first)['status'] == 'succeeded'
+
+    third = pool_client.post('/api/admin/backup/restore', json={'backup_path': backup_path})
+    assert _finished_job(pool_client, third)['status'] == 'succeeded'
+
+def test_restore_lock_is_shared_across_processes(pool_client, backup_dir):
+    """A restore held by another web worker refuses this one until it ends."""
+    import subprocess
+    import sys
+
+    login(pool_client, 'admin')
+    backup_path = _finished_job(pool_client, pool_client.post('/api/admin/backup'))['result']
+
+    holder = subprocess.Popen(
+        [sys.executable, '-c', 'import fcntl, sys; f = open(sys.argv[1], "a"); fcntl.flock(f, fcntl.LOCK_EX); print(flush=True); sys.stdin.read()',
+         os.path.join(backup_dir, 'restore.lock')],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    try:
+        holder.stdout.readline()
+        assert pool_client.post('/api/admin/backup/restore', json={'backup_path': backup_path}).status_code == 409
+    finally:
+        holder.communicate()
+
+    response = pool_client.post('/api/admin/backup/restore', json={'backup_path': backup_path})
+    assert _finished_job(pool_client, response)['status'] == 'succeeded'
+
+def test_job_status_from_another_worker(pool_client, backup_dir):
+    """Any web worker can answer for a job another one ran."""
+    from unittest.mock import patch
+    from app.jobs import JobRunner
+
+    login(pool_client, 'admin')
+    job = _finished_job(pool_client, pool_client.post('/api/admin/backup'))
+    with patch('app.routes.jobs', JobRunner()):
+        assert pool_client.get(f"/api/admin/jobs/{job['id']}").get_json()['job'] == job
+        assert [listed['id'] for listed in pool_client.get('/api/admin/jobs').get_json()['jobs']] == [job['id']]
+
+def test_failed_job_reports_error(pool_client, backup_dir):
+    from unittest.mock import patch
+
+    login(pool_client, 'admin')
+    with patch.object(db_manager, 'create_backup', side_effect=Exception('disk full')):
+        job = _finished_job(pool_client, pool_client.post('/api/admin/backup'))
+    assert (job['status'], job['error']) == ('failed', 'disk full')
+
+def test_restore_unknown_backup(pool_client, backup_dir):
+    login(pool_client, 'admin')
+    for backup_path in ('backup_nope', '../backup_nope', 'nonexistent/backup.db'):
+        response = pool_client.post('/api/admin/backup/restore', json={'backup_path': backup_path})
+        assert response.status_code == 404
+    assert pool_client.get('/api/admin/jobs/nope').status_code == 404
+
+def test_backup_requires_admin(pool_client):
+    login(pool_client, 'alice')
+    assert pool_client.post('/api/admin/backup').status_code == 403
+    assert pool_client.get('/api/admin/backups').status_code == 403
+    assert pool_client.get('/api/admin/jobs').status_code == 403
+    response = pool_client.post('/api/admin/backup/restore', json={'backup_path': 'some/path'})
     assert response.status_code == 403
 
-def test_restore_invalid_backup(client):
-    """Test restoring from an invalid backup file."""
-    # Login as admin
-    client.post('/api/login', json={
-        'username': 'admin',
-        'password': 'password'
-    })
-    
-    # Try to restore from non-existent file
-    response = client.post('/api/admin/restore', json={
-        'backup_path': 'nonexistent/backup.db'
-    })
-    assert response.status_code == 500
-    data = json.loads(response.data)
-    assert data['success'] is False
-    assert 'error' in data['message'].lower()
-
-def test_backup_verification(client, tmp_path):
-    """Test backup file verification."""
-    # Login as admin
-    client.post('/api/login', json={
-        'username': 'admin',
-        'password': 'password'
-    })
-    
-    # Create an invalid backup file
-    invalid_backup = tmp_path / "invalid_backup.db"
-    invalid_backup.write_text("This is not a SQLite database")
-    
-    # Try to restore from invalid file
-    response = client.post('/api/admin/restore', json={
-        'backup_path': str(invalid_backup)
-    })
-    assert response.status_code == 500
-    data = json.loads(response.data)
-    assert data['success'] is False
-    assert 'invalid' in data['message'].lower()
+def test_restore_rejects_invalid_file(pool_client, pool_app, backup_dir, tmp_path):
+    """A file that is not a SQLite database fails the job and leaves the live data alone."""
+    invalid_backup = tmp_path / 'invalid_backup.db'
+    invalid_backup.write_text('This is not a SQLite database')
+
+    login(pool_client, 'admin')
+    response = pool_client.post('/api/admin/backup/restore', json={'backup_path': str(invalid_backup)})
+    job = _finished_job(pool_client, response)
+    assert job['status'] == 'failed'
+    assert job['error']
+    with pool_app.app_context():
+        assert User.query.count() == 3
+
+def test_backup_index_records_metadata(pool_client, pool_app, backup_dir):
+    """Listing reads the index alone; it carries checksum and row counts."""
+    from unittest.mock import patch
+    from app.backup_store import BackupStore
+
+    login(pool_client, 'admin')
+    name = _finished_job(pool_client, pool_client.post('/api/admin/backup'))['result']
+
+    with patch.object(BackupStore, 'manifest', side_effect=AssertionError('listing opened a manifest')), \
+            patch.object(os, 'listdir', side_effect=AssertionError('listing scanned the directory')):
+        response = pool_client.get('/api/admin/backups')
+    assert response.status_code == 200
+    backup = response.get_json()['backups'][0]
+    assert backup['name'] == name and not backup['legacy']
+    assert backup['row_counts']['user'] == 3
+    assert backup['row_counts']['game'] == 3
+    with pool_app.app_context():
+        assert backup['sha256'] == db_manager.store.manifest(name)['sha256']
+
+def test_backup_listing_pages_and_filters(pool_client, backup_dir):
+    login(pool_client, 'admin')
+    names = [_finished_job(pool_client, pool_client.post('/api/admin/backup'))['result'] for _ in range(3)]
+
+    first = pool_client.get('/api/admin/backups?limit=2').get_json()
+    assert first['total'] == 3
+    assert [backup['name'] for backup in first['backups']] == names[:0:-1]
+    rest = pool_client.get('/api/admin/backups?limit=2&offset=2').get_json()
+    assert [backup['name'] for backup in rest['backups']] == names[:1]
+
+    assert pool_client.get('/api/admin/backups?since=2999-01-01').get_json()['total'] == 0
+    assert pool_client.get('/api/admin/backups?until=2999-01-01&schema_version=nope').get_json()['total'] == 0
+    assert pool_client.get('/api/admin/backups?since=yesterday').status_code == 400
+
+def test_reconcile_backup_index(pool_client, pool_app, backup_dir):
+    """The index is rebuilt from the store and legacy files when it drifts."""
+    login(pool_client, 'admin')
+    names = [_finished_job(pool_client, pool_client.post('/api/admin/backup'))['result'] for _ in range(2)]
+    with pool_app.app_context():
+        legacy = os.path.join(db_manager.backup_dir, 'backup_20250101_000000.db')
+        copy_database(db_manager.db_path, legacy)
+        db_manager.store.delete(names[0])
+
+    response = pool_client.post('/api/admin/backups/reconcile')
+    assert response.status_code == 200
+    result = response.get_json()['result']
+    assert (result['added'], result['removed']) == (['backup_20250101_000000.db'], [names[0]])
+
+    backups = pool_client.get('/api/admin/backups').get_json()['backups']
+    assert {backup['name'] for backup in backups} == {names[1], 'backup_20250101_000000.db'}
+    legacy_entry = next(backup for backup in backups if backup['legacy'])
+    assert legacy_entry['path'] == legacy and legacy_entry['row_counts']['user'] == 3
+
+    # A lost index is rebuilt on the next listing
+    os.remove(backup_dir / 'index.json')
+    assert pool_client.get('/api/admin/backups').get_json()['total'] == 2
+
+def test_copy_database_counts_rows_of_the_copy(tmp_path):
+    """Source row counts match the copied snapshot, or are withheld when they can't."""
+    writer = _make_database(tmp_path / 'wal.db', journal_mode='wal')
+    stats = copy_database(str(tmp_path / 'wal.db'), str(tmp_path / 'wal_copy.db'), pages=10, pause=0, count_rows=True,
+                          progress=lambda done, total: writer.execute("INSERT INTO item (payload) VALUES ('w')"))
+    writer.close()
+    assert stats['row_counts'] == {'item': 2000}
+
+    _make_database(tmp_path / 'quiet.db').close()
+    stats = copy_database(str(tmp_path / 'quiet.db'), str(tmp_path / 'quiet_copy.db'), count_rows=True)
+    assert stats['row_counts'] == {'item': 2000}
+
+    writer = _make_database(tmp_path / 'busy.db')
+    stats = copy_database(str(tmp_path / 'busy.db'), str(tmp_path / 'busy_copy.db'), pages=10, pause=0, count_rows=True,
+                          progress=lambda done, total: writer.execute("INSERT INTO item (payload) VALUES ('w')"))
+    writer.close()
+    assert stats['row_counts'] is None
+
+def test_verification_catches_bad_backups(pool_app, tmp_path):
+    _make_database(tmp_path / 'good.db').close()
+    with open(tmp_path / 'good.db', 'rb') as f:
+        good = f.read()
+
+    with pool_app.app_context():
+        report = db_manager._verify_backup(str(tmp_path / 'good.db'), 'full',
+                                           source_rows={'item': 2000})
+        assert set(report['timings']) == {'header', 'schema', 'quick_check', 'integrity_check', 'row_counts'}
+
+        with pytest.raises(Exception, match='row counts differ in item'):
+            db_manager._verify_backup(str(tmp_path / 'good.db'), 'full', source_rows={'item': 1999})
+
+        (tmp_path / 'text.db').write_text('This is not a SQLite database')
+        with pytest.raises(Exception, match='invalid SQLite header'):
+            db_manager._verify_backup(str(tmp_path / 'text.db'))
+
+        (tmp_path / 'torn.db').write_bytes(good[:len(good) - 100])
+        with pytest.raises(Exception, match='whole number of pages'):
+            db_manager._verify_backup(str(tmp_path / 'torn.db'))
+
+        # Scribble over the last table page: the header and schema still look fine
+        page_size = 4096
+        (tmp_path / 'corrupt.db').write_bytes(good[:-page_size] + b'\xff' * page_size)
+        with pytest.raises(Exception, match='quick_check'):
+            db_manager._verify_backup(str(tmp_path / 'corrupt.db'))
+
+@pytest.mark.parametrize('mode, checks', [
+    ('quick', {'header', 'schema', 'quick_check'}),
+    ('checksummed', {'header', 'schema', 'quick_check', 'chunks'}),
+    ('full', {'header', 'schema', 'quick_check', 'chunks', 'integrity_check', 'row_counts'})
+])
+def test_backup_verification_modes(pool_client, backup_dir, mode, checks):
+    """Each backup records which checks ran and how long each took."""
+    login(pool_client, 'admin')
+    job = _finished_job(pool_client, pool_client.post('/api/admin/backup', json={'verify': mode}))
+    assert job['status'] == 'succeeded'
+
+    verification = pool_client.get('/api/admin/backups').get_json()['backups'][0]['verification']
+    assert verification['mode'] == mode
+    assert set(verification['timings']) == checks
+    assert all(seconds >= 0 for seconds in verification['timings'].values())
+
+def test_checksummed_backup_reads_the_copy_once(pool_app, backup_dir):
+    """The store's single pass is the checksum; the finished copy is never re-read to hash it."""
+    import builtins
+    from unittest.mock import patch
+
+    read = {'bytes': 0}
+    real_open = builtins.open
+
+    class CountingFile:
+        def __init__(self, f):
+            self._f = f
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            self._f.close()
+
+        def __getattr__(self, name):
+            return getattr(self._f, name)
+
+        def read(self, *args):
+            data = self._f.read(*args)
+            read['bytes'] += len(data)
+            return data
+
+    def counting_open(file, *args, **kwargs):
+        f = real_open(file, *args, **kwargs)
+        return CountingFile(f) if str(file).endswith('.db.tmp') else f
+
+    with pool_app.app_context():
+        with patch('builtins.open', counting_open):
+            name = db_manager.create_backup(verify='checksummed')
+        manifest = db_manager.store.manifest(name)
+        # One pass through the store, plus the 100-byte header check
+        assert read['bytes'] == manifest['size'] + 100
+        assert manifest['verify_seconds'] >= 0
+
+def test_backup_rejects_unknown_verification_mode(pool_client, backup_dir):
+    login(pool_client, 'admin')
+    assert pool_client.post('/api/admin/backup', json={'verify': 'thorough'}).status_code == 400
+
+def test_live_database_backs_up_without_restarts(pool_app, backup_dir):
+    """The app runs SQLite in WAL mode, so writes during a backup never restart the copy."""
+    with pool_app.app_context():
+        assert db.session.execute(db.text('PRAGMA journal_mode')).scalar() == 'wal'
+        writer = sqlite3.connect(db_manager.db_path, isolation_level=None)
+        target = os.path.join(db_manager.backup_dir, 'copy.db')
+        stats = copy_database(db_manager.db_path, target, pages=1, pause=0,
+                              progress=lambda done, total: writer.execute(
+                                  "INSERT INTO user (username, password_hash) VALUES (?, 'x')", (f'writer{done}',)))
+        writer.close()
+
+        assert stats['steps'] > 1 and stats['restarts'] == 0
+        copy = sqlite3.connect(target)
+        assert copy.execute('SELECT COUNT(*) FROM user').fetchone()[0] == 3
+        copy.close()
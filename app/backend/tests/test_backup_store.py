@@ -0,0 +1,158 @@
+import pytest
+import gzip
+import hashlib
+import os
+import sqlite3
+import zlib
+from datetime import datetime, timedelta
+from app.backup_store import BackupStore, retained_snapshots
+
+def _make_database(path, rows):
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute('CREATE TABLE item (id INTEGER PRIMARY KEY, payload BLOB)')
+    conn.execute('BEGIN')
+    conn.executemany('INSERT INTO item (payload) VALUES (?)', (
+        (os.urandom(100) + b'\0' * 400,) for _ in range(rows)
+    ))
+    conn.execute('COMMIT')
+    return conn
+
+def _sha256(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def test_snapshots_share_unchanged_chunks(tmp_path):
+    """A second snapshot after a one-row change only stores the chunks that changed."""
+    database = tmp_path / 'live.db'
+    conn = _make_database(database, 4000)
+    store = BackupStore(str(tmp_path / 'store'), chunk_size=64 * 1024)
+
+    first = store.add('first', str(database))
+    conn.execute("UPDATE item SET payload = x'00' WHERE id = 2000")
+    conn.close()
+    second = store.add('second', str(database))
+
+    assert first['new_chunks'] == len(first['chunks'])
+    assert second['new_chunks'] <= 2
+    assert first['stored_bytes'] < first['size']
+    stats = store.stats()
+    assert stats['snapshots'] == 2
+    assert stats['logical_bytes'] > 2.5 * stats['stored_bytes']
+
+def test_restore_streams_identical_bytes(tmp_path):
+    database = tmp_path / 'live.db'
+    _make_database(database, 1000).close()
+    store = BackupStore(str(tmp_path / 'store'), chunk_size=16 * 1024)
+    manifest = store.add('snap', str(database))
+
+    restored = tmp_path / 'restored.db'
+    store.restore_to('snap', str(restored))
+    assert _sha256(restored) == _sha256(database) == manifest['sha256']
+
+def test_gzip_chunks_are_real_gzip(tmp_path):
+    database = tmp_path / 'live.db'
+    _make_database(database, 100).close()
+    store = BackupStore(str(tmp_path / 'store'), chunk_size=16 * 1024)
+    manifest = store.add('snap', str(database))
+
+    digest = manifest['chunks'][0]
+    with gzip.open(store._chunk_path(digest), 'rb') as f:
+        assert hashlib.sha256(f.read()).hexdigest() == digest
+
+def test_restores_chunks_written_as_raw_zlib(tmp_path):
+    database = tmp_path / 'live.db'
+    _make_database(database, 1000).close()
+    store = BackupStore(str(tmp_path / 'store'), chunk_size=16 * 1024)
+    manifest = store.add('snap', str(database))
+
+    # Stores from before the gzip fix hold raw zlib streams under .gz
+    for digest in manifest['chunks']:
+        path = store._chunk_path(digest)
+        with open(path, 'rb') as f:
+            data = gzip.decompress(f.read())
+        with open(path, 'wb') as f:
+            f.write(zlib.compress(data, 6))
+
+    restored = tmp_path / 'restored.db'
+    store.restore_to('snap', str(restored))
+    assert _sha256(restored) == manifest['sha256']
+
+def test_corrupt_chunk_is_detected(tmp_path):
+    database = tmp_path / 'live.db'
+    _make_database(database, 1000).close()
+    store = BackupStore(str(tmp_path / 'store'), chunk_size=16 * 1024)
+    manifest = store.add('snap', str(database))
+
+    victim = store._chunk_path(manifest['chunks'][3])
+    with open(victim, 'wb') as f:
+        f.write(store.codec.compress(b'not the page you are looking for'))
+
+    with pytest.raises(Exception, match='corrupt'):
+        store.restore_to('snap', str(tmp_path / 'restored.db'))
+
+def test_rejects_names_outside_the_store(tmp_path):
+    store = BackupStore(str(tmp_path / 'store'))
+    with pytest.raises(Exception, match='Invalid snapshot name'):
+        store.manifest('../../etc/passwd')
+
+def test_retention_policy():
+    """Newest per hour, day and week, within each limit, plus the latest few."""
+    now = datetime(2026, 10, 18, 12, 30)
+    snapshots = [(f'h{hours}', now - timedelta(hours=hours)) for hours in range(0, 24 * 21, 6)]
+
+    keep = retained_snapshots(snapshots, {'latest': 2, 'hourly': 3, 'daily': 2, 'weekly': 3})
+
+    # Latest and hourly: h0, h6, h12. Daily adds h18 (Oct 17). Weekly adds
+    # the Sunday evenings closing the two ISO weeks before: h162, h330
+    assert keep == {'h0', 'h6', 'h12', 'h18', 'h162', 'h330'}
+
+def test_apply_retention_collects_orphaned_chunks(tmp_path):
+    database = tmp_path / 'live.db'
+    conn = _make_database(database, 500)
+    store = BackupStore(str(tmp_path / 'store'), chunk_size=16 * 1024)
+
+    start = datetime(2026, 10, 1, 9)
+    for day in range(4):
+        conn.execute('UPDATE item SET payload = ? WHERE id = 1', (os.urandom(500),))
+        store.add(f'day{day}', str(database), created=start + timedelta(days=day))
+    conn.close()
+    before = store.stats()['chunks']
+
+    expired = store.apply_retention({'daily': 2})
+    assert sorted(expired) == ['day0', 'day1']
+    assert [manifest['name'] for manifest in store.snapshots()] == ['day3', 'day2']
+    assert store.stats()['chunks'] == before - 2
+    store.restore_to('day2', str(tmp_path / 'restored.db'))
+
+def test_store_compresses_database(tmp_path):
+    """A 20 MB database is stored in under half its size; timings are in bench_backup_store."""
+    database = tmp_path / 'live.db'
+    _make_database(database, 40000).close()
+    store = BackupStore(str(tmp_path / 'store'))
+
+    manifest = store.add('snap', str(database))
+    store.restore_to('snap', str(tmp_path / 'restored.db'))
+
+    assert manifest['stored_bytes'] < os.path.getsize(database) / 2
+    assert _sha256(tmp_path / 'restored.db') == manifest['sha256']
+
+def test_verified_add_rejects_chunks_that_do_not_round_trip(tmp_path):
+    """Checked in memory before writing, so a verified add costs no extra read."""
+    database = tmp_path / 'live.db'
+    _make_database(database, 500).close()
+    store = BackupStore(str(tmp_path / 'store'), chunk_size=16 * 1024)
+
+    manifest = store.add('good', str(database), verify=True)
+    assert manifest['verify_seconds'] >= 0
+    assert store.add('unverified', str(database))['verify_seconds'] is None
+
+    store.codec.decompress = lambda data: b'garbage'
+    with pytest.raises(Exception, match='does not survive compression'):
+        store.add('bad', _changed_copy(database, tmp_path), verify=True)
+    assert not store.exists('bad')
+
+def _changed_copy(database, tmp_path):
+    """A copy of database with one new page, so adding it writes a new chunk"""
+    copy = tmp_path / 'changed.db'
+    copy.write_bytes(database.read_bytes() + os.urandom(4096))
+    return str(copy)
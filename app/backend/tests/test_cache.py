@@ -0,0 +1,382 @@
+import pytest
+import json
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from app import db, Game, update_games
+from app.cache import WeekSchedule, WeekScheduleCache, week_schedule
+from app.utils import count_queries
+from tests.helpers import login
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_week_schedule_cache_ttl():
+    """Entries are served from memory until the TTL runs out."""
+    clock = FakeClock()
+    loads = []
+
+    def loader(week):
+        loads.append(week)
+        return WeekSchedule(datetime(2026, 9, 10), None, frozenset({week}))
+
+    cache = WeekScheduleCache(loader, ttl=60, clock=clock)
+    cache.get(1)
+    cache.get(1)
+    clock.now = 59
+    cache.get(1)
+    assert loads == [1]
+
+    clock.now = 61
+    cache.get(1)
+    assert loads == [1, 1]
+    assert cache.stats()['hits'] == 2
+    assert cache.stats()['misses'] == 2
+
+def test_week_schedule_cache_invalidation():
+    """Invalidating one week leaves the others cached."""
+    loads = []
+    cache = WeekScheduleCache(lambda week: loads.append(week) or WeekSchedule(None, None, frozenset()))
+    cache.get(1)
+    cache.get(2)
+    cache.invalidate(1)
+    cache.get(1)
+    cache.get(2)
+    assert loads == [1, 2, 1]
+
+    cache.invalidate()
+    assert cache.stats()['entries'] == 0
+
+def test_week_schedule_cache_checks_version():
+    """An entry loaded at an older version is reloaded before its TTL runs out."""
+    loads = []
+    versions = {1: 'a'}
+    cache = WeekScheduleCache(lambda week: loads.append(week) or WeekSchedule(None, None, frozenset()),
+                              version=versions.get)
+    cache.get(1)
+    cache.get(1)
+    versions[1] = 'b'
+    cache.get(1)
+    assert loads == [1, 1]
+
+def test_schedule_follows_ingest_in_another_process(pool_client, pool_app):
+    """Games changed by the worker are seen without this process invalidating anything."""
+    from app.ingest import record_sync
+
+    login(pool_client, 'alice')
+    with pool_app.app_context():
+        assert week_schedule.get(1).first_kickoff > datetime.utcnow()
+        # What the worker commits: a moved kickoff and the week's change stamp
+        Game.query.filter_by(week=1).update({Game.start_time: datetime.utcnow() + timedelta(minutes=30)})
+        record_sync(1, datetime.utcnow(), changed=True)
+        db.session.commit()
+        game_id = Game.query.filter_by(is_mnf=True).one().id
+
+    response = pool_client.post('/api/picks', json={
+        'week': 1, 'picks': [{'game_id': game_id, 'team': 'BUF', 'mnf_total_points': 40}]
+    })
+    assert response.status_code == 403
+
+def test_week_schedule_contents(pool_app):
+    """The schedule carries the first kickoff, MNF game and game ids."""
+    with pool_app.app_context():
+        schedule = week_schedule.get(1)
+        games = Game.query.filter_by(week=1).order_by(Game.start_time).all()
+        assert schedule.first_kickoff == games[0].start_time
+        assert schedule.mnf_game_id == next(game.id for game in games if game.is_mnf)
+        assert schedule.game_ids == {game.id for game in games}
+
+def test_pick_submission_uses_cached_schedule(pool_client, pool_app):
+    """After the first submission the lock check needs no game query."""
+    login(pool_client, 'alice')
+    with pool_app.app_context():
+        engine = db.engine
+        game_id = Game.query.filter_by(is_mnf=True).one().id
+
+    payload = {'week': 1, 'picks': [{'game_id': game_id, 'team': 'BUF', 'mnf_total_points': 40}]}
+    assert pool_client.post('/api/picks', json=payload).status_code == 200
+
+    payload['picks'][0]['team'] = 'NYJ'
+    with count_queries(engine) as counter:
+        assert pool_client.post('/api/picks', json=payload).status_code == 200
+    assert not [s for s, _ in counter.statements if 'FROM game' in s]
+
+def test_update_games_invalidates_schedule(pool_client, pool_app):
+    """A kickoff moved by ingestion is reflected in the lock check."""
+    login(pool_client, 'alice')
+    with pool_app.app_context():
+        game_id = Game.query.filter_by(is_mnf=True).one().id
+        assert week_schedule.get(1).first_kickoff > datetime.utcnow()
+
+        slate = [{
+            'espn_id': game.espn_id,
+            'week': 1,
+            'home_team': game.home_team,
+            'away_team': game.away_team,
+            'start_time': datetime.utcnow() + timedelta(minutes=30) if game.is_mnf else game.start_time,
+            'home_score': None,
+            'away_score': None,
+            'is_finished': False
+        } for game in Game.query.filter_by(week=1)]
+        with patch('app.espn_api.ESPNAPI') as mock_api:
+            mock_api.return_value.get_scoreboard.return_value = (1, slate)
+            mock_api.return_value.last_not_modified = False
+            update_games()
+
+    response = pool_client.post('/api/picks', json={
+        'week': 1,
+        'picks': [{'game_id': game_id, 'team': 'BUF', 'mnf_total_points': 40}]
+    })
+    assert response.status_code == 403
+
+def test_admin_cache_endpoint(pool_client):
+    """Admins can read hit/miss counters and clear the cache."""
+    login(pool_client, 'alice')
+    assert pool_client.get('/api/admin/cache').status_code == 403
+
+    login(pool_client, 'admin')
+    response = pool_client.get('/api/admin/cache')
+    assert response.status_code == 200
+    stats = json.loads(response.data)['week_schedule']
+    assert {'hits', 'misses', 'entries', 'hit_rate'} <= set(stats)
+
+    response = pool_client.delete('/api/admin/cache')
+    assert json.loads(response.data)['week_schedule']['entries'] == 0
+
+def test_admin_rate_limit_endpoint(pool_client):
+    """Admins can read the ESPN limiter's wait-time metrics."""
+    login(pool_client, 'admin')
+    response = pool_client.get('/api/admin/espn/rate-limit')
+    assert response.status_code == 200
+    stats = json.loads(response.data)['rate_limiter']
+    assert {'acquisitions', 'delayed', 'total_wait_seconds', 'max_wait_seconds'} <= set(stats)
+
+def test_leaderboard_etag_round_trip(pool_client, pool_app):
+    """A repeat poll with If-None-Match gets a bodiless 304 without re-aggregating."""
+    login(pool_client, 'alice')
+    first = pool_client.get('/api/leaderboard')
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+    etag = first.headers['ETag']
+
+    with pool_app.app_context():
+        with count_queries(db.engine) as counter:
+            second = pool_client.get('/api/leaderboard', headers={'If-None-Match': etag})
+    assert second.status_code == 304
+    assert second.data == b''
+    assert second.headers['ETag'] == etag
+    assert not any('weekly_standing' in statement for statement, _ in counter.statements)
+
+def test_etag_scoped_to_query_and_user(pool_client):
+    login(pool_client, 'alice')
+    season = pool_client.get('/api/leaderboard').headers['ETag']
+    week = pool_client.get('/api/leaderboard?week=1').headers['ETag']
+    alice_picks = pool_client.get('/api/picks?week=1').headers['ETag']
+    assert season != week
+
+    login(pool_client, 'bob')
+    bob = pool_client.get('/api/picks?week=1', headers={'If-None-Match': alice_picks})
+    assert bob.status_code == 200
+    assert bob.headers['ETag'] != alice_picks
+
+def test_pick_write_changes_etag(pool_client, pool_app):
+    """Saving a pick bumps the data version; an unchanged resubmission does not."""
+    login(pool_client, 'bob')
+    with pool_app.app_context():
+        mnf_game_id = Game.query.filter_by(is_mnf=True).first().id
+    etag = pool_client.get('/api/stats').headers['ETag']
+
+    pick = {'week': 1, 'picks': [{'game_id': mnf_game_id, 'team': 'BUF', 'mnf_total_points': 44}]}
+    pool_client.post('/api/picks', json=pick)
+    response = pool_client.get('/api/stats', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+    etag = response.headers['ETag']
+    pool_client.post('/api/picks', json=pick)
+    assert pool_client.get('/api/stats', headers={'If-None-Match': etag}).status_code == 304
+
+def test_ingestion_changes_etag_only_on_change(pool_client, pool_app):
+    login(pool_client, 'alice')
+    etag = pool_client.get('/api/leaderboard').headers['ETag']
+
+    with pool_app.app_context():
+        games = Game.query.filter_by(week=1).all()
+        slate = [{
+            'espn_id': game.espn_id, 'week': 1,
+            'home_team': game.home_team, 'away_team': game.away_team,
+            'start_time': game.start_time,
+            'home_score': None, 'away_score': None, 'is_finished': False
+        } for game in games]
+        with patch('app.espn_api.ESPNAPI') as mock_api:
+            mock_api.return_value.get_scoreboard.return_value = (1, slate)
+            mock_api.return_value.last_not_modified = False
+            update_games()
+    assert pool_client.get('/api/leaderboard', headers={'If-None-Match': etag}).status_code == 304
+
+    slate[0].update({'home_score': 30, 'away_score': 3, 'is_finished': True})
+    with pool_app.app_context():
+        # The week was just synced and kickoff is days away, so force a refresh
+        with patch('app.espn_api.ESPNAPI') as mock_api, \
+                patch('app.plan_ingestion', return_value={'weeks': [1], 'discover': False}):
+            mock_api.return_value.get_scoreboard.return_value = (1, slate)
+            mock_api.return_value.last_not_modified = False
+            update_games()
+    assert pool_client.get('/api/leaderboard', headers={'If-None-Match': etag}).status_code == 200
+
+def test_data_version_never_repeats():
+    """Versions keep rising even if the stored counter moves backwards, e.g. after a restore."""
+    from app import create_app
+    from app.cache import bump_data_version, current_data_version
+    from app.models import DataVersion
+
+    flask_app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+    with flask_app.app_context():
+        db.create_all()
+        assert current_data_version() == 0
+        bump_data_version()
+        first = current_data_version()
+        bump_data_version()
+        second = current_data_version()
+        assert second > first > 0
+
+        db.session.get(DataVersion, 'api').version = 5
+        db.session.flush()
+        bump_data_version()
+        assert current_data_version() > second
+
+class FakeRedis:
+    """Just enough of the redis-py client for the shared backend."""
+
+    def __init__(self):
+        self.store = {}
+        self.expiry = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, value, ex=None):
+        self.store[key] = value
+        self.expiry[key] = ex
+
+    def delete(self, key):
+        self.store.pop(key, None)
+
+    def scan_iter(self, match):
+        prefix = match.rstrip('*')
+        return [key for key in list(self.store) if key.startswith(prefix)]
+
+def test_memory_backend_lru_byte_cap():
+    """The least recently used payloads are evicted once the byte cap is hit."""
+    from app.cache import MemoryBackend
+
+    backend = MemoryBackend(max_bytes=30)
+    backend.set('a', b'0123456789')
+    backend.set('b', b'0123456789')
+    backend.get('a')
+    backend.set('c', b'0123456789')
+
+    assert backend.get('b') is None
+    assert backend.get('a') and backend.get('c')
+    assert backend.stats()['bytes'] <= 30
+    assert backend.stats()['evictions'] == 1
+
+    backend.set('huge', b'x' * 100)
+    assert backend.get('huge') is None
+
+def test_memory_backend_entry_cap():
+    from app.cache import MemoryBackend
+
+    backend = MemoryBackend(max_entries=2)
+    for key in 'abc':
+        backend.set(key, b'1')
+    assert backend.get('a') is None
+    assert backend.stats()['entries'] == 2
+
+def test_leaderboard_served_from_response_cache(pool_client, pool_app):
+    """Identical leaderboard requests aggregate once, across users."""
+    from app.cache import response_cache
+
+    response_cache.clear()
+    login(pool_client, 'alice')
+    first = pool_client.get('/api/leaderboard')
+
+    login(pool_client, 'bob')
+    with pool_app.app_context():
+        with count_queries(db.engine) as counter:
+            second = pool_client.get('/api/leaderboard')
+    assert second.data == first.data
+    assert not any('weekly_standing' in statement for statement, _ in counter.statements)
+    assert response_cache.stats()['hits'] >= 1
+
+def test_response_cache_follows_data_version(pool_client, pool_app):
+    """Saving a pick moves the stats to a new key instead of serving the old payload."""
+    login(pool_client, 'bob')
+    with pool_app.app_context():
+        mnf_game_id = Game.query.filter_by(is_mnf=True).first().id
+    before = json.loads(pool_client.get('/api/stats').data)
+
+    pool_client.post('/api/picks', json={
+        'week': 1, 'picks': [{'game_id': mnf_game_id, 'team': 'BUF', 'mnf_total_points': 44}]
+    })
+    after = json.loads(pool_client.get('/api/stats').data)
+    assert after['overall_stats']['total_picks'] == before['overall_stats']['total_picks'] + 1
+
+def test_stats_cache_is_per_user(pool_client):
+    login(pool_client, 'alice')
+    alice = json.loads(pool_client.get('/api/stats').data)
+    login(pool_client, 'bob')
+    bob = json.loads(pool_client.get('/api/stats').data)
+    assert alice['overall_stats']['total_picks'] == 3
+    assert bob['overall_stats']['total_picks'] == 2
+
+def test_redis_backend_shared_between_workers(pool_app):
+    """Two processes' caches on one Redis-compatible store share payloads."""
+    from werkzeug.datastructures import MultiDict
+    from app.cache import RedisBackend, ResponseCache
+
+    store = FakeRedis()
+    first_worker = ResponseCache(RedisBackend(store))
+    second_worker = ResponseCache(RedisBackend(store))
+    key = ResponseCache.key('api.leaderboard', MultiDict({'week': '1'}), 42)
+
+    with pool_app.app_context():
+        assert first_worker.get(key) is None
+        first_worker.set(key, b'{"leaderboard": []}')
+        assert second_worker.get(key) == b'{"leaderboard": []}'
+    assert set(store.expiry.values()) == {3600}
+    assert second_worker.stats()['hit_rate'] == 1.0
+
+    first_worker.clear()
+    assert store.store == {}
+
+def test_broken_backend_falls_through(pool_client):
+    """A failing shared cache degrades to computing the payload."""
+    from app.cache import response_cache
+
+    class Broken:
+        def get(self, key):
+            raise ConnectionError('cache down')
+
+        def set(self, key, value):
+            raise ConnectionError('cache down')
+
+    backend = response_cache.backend
+    response_cache.backend = Broken()
+    try:
+        login(pool_client, 'alice')
+        assert pool_client.get('/api/leaderboard').status_code == 200
+    finally:
+        response_cache.backend = backend
+
+def test_admin_cache_endpoint_reports_response_cache(pool_client):
+    login(pool_client, 'admin')
+    pool_client.get('/api/leaderboard')
+    stats = json.loads(pool_client.get('/api/admin/cache').data)['responses']
+    assert {'hits', 'misses', 'hit_rate', 'entries', 'bytes', 'evictions'} <= set(stats)
+
+    stats = json.loads(pool_client.delete('/api/admin/cache').data)['responses']
+    assert stats['entries'] == 0
@@ -2,6 +2,14 @@ import pytest
 from unittest.mock import patch, MagicMock
 from app.espn_api import ESPNAPI
 from datetime import datetime
+import asyncio
+
+@pytest.fixture(autouse=True)
+def isolated_rate_limiter(monkeypatch):
+    """Give each test its own generous process-wide limiter."""
+    from app import espn_api as espn_module
+
+    monkeypatch.setattr(espn_module, 'rate_limiter', espn_module.TokenBucket(1000, 1000))
 
 @pytest.fixture
 def espn_api():
@@ -41,11 +49,12 @@ def mock_game_response():
 
 def test_get_current_week():
     """Test getting current NFL week."""
-    with patch('app.espn_api.requests.get') as mock_get:
+    with patch('app.espn_api.requests.Session.get') as mock_get:
         mock_get.return_value.json.return_value = {
             "week": {"number": 5}
         }
         mock_get.return_value.status_code = 200
+        mock_get.return_value.headers = {}
         
         api = ESPNAPI()
         week = api.get_current_week()
@@ -55,9 +64,10 @@ def test_get_current_week():
 
 def test_get_games(espn_api, mock_game_response):
     """Test getting games for a specific week."""
-    with patch('app.espn_api.requests.get') as mock_get:
+    with patch('app.espn_api.requests.Session.get') as mock_get:
         mock_get.return_value.json.return_value = mock_game_response
         mock_get.return_value.status_code = 200
+        mock_get.return_value.headers = {}
         
         games = espn_api.get_games(week=1)
         
@@ -72,9 +82,10 @@ def test_get_games(espn_api, mock_game_response):
 
 def test_get_games_error_handling(espn_api):
     """Test error handling when getting games."""
-    with patch('app.espn_api.requests.get') as mock_get:
+    with patch('app.espn_api.requests.Session.get') as mock_get:
         # Simulate API error
         mock_get.return_value.status_code = 500
+        mock_get.return_value.headers = {}
         
         with pytest.raises(Exception) as exc_info:
             espn_api.get_games(week=1)
@@ -94,10 +105,24 @@ def test_parse_game_data(espn_api, mock_game_response):
     assert game['away_score'] == 20
     assert game['is_finished'] is True
     assert isinstance(game['start_time'], datetime)
+    assert game['favorite'] is None
+
+def test_parse_favorite(espn_api, mock_game_response):
+    """The favorite comes from the line's flags, or its summary in older payloads."""
+    competition = mock_game_response['events'][0]['competitions'][0]
+
+    competition['odds'] = [{'details': 'KC -3.5', 'awayTeamOdds': {'favorite': True}}]
+    assert espn_api._parse_game_data(mock_game_response)[0]['favorite'] == 'KC'
+
+    competition['odds'] = [{'details': 'DET -1'}]
+    assert espn_api._parse_game_data(mock_game_response)[0]['favorite'] == 'DET'
+
+    competition['odds'] = [{'details': 'EVEN'}]
+    assert espn_api._parse_game_data(mock_game_response)[0]['favorite'] is None
 
 def test_get_team_stats():
     """Test getting team statistics."""
-    with patch('app.espn_api.requests.get') as mock_get:
+    with patch('app.espn_api.requests.Session.get') as mock_get:
         mock_get.return_value.json.return_value = {
             "stats": [{
                 "name": "Total Offense",
@@ -108,6 +133,7 @@ def test_get_team_stats():
             }]
         }
         mock_get.return_value.status_code = 200
+        mock_get.return_value.headers = {}
         
         api = ESPNAPI()
         stats = api.get_team_stats("KC")
@@ -119,8 +145,9 @@ def test_get_team_stats():
 
 def test_get_team_stats_error():
     """Test error handling for team statistics."""
-    with patch('app.espn_api.requests.get') as mock_get:
+    with patch('app.espn_api.requests.Session.get') as mock_get:
         mock_get.return_value.status_code = 404
+        mock_get.return_value.headers = {}
         
         api = ESPNAPI()
         with pytest.raises(Exception) as exc_info:
@@ -130,9 +157,10 @@ def test_get_team_stats_error():
 
 def test_update_game_scores(espn_api, mock_game_response):
     """Test updating game scores."""
-    with patch('app.espn_api.requests.get') as mock_get:
+    with patch('app.espn_api.requests.Session.get') as mock_get:
         mock_get.return_value.json.return_value = mock_game_response
         mock_get.return_value.status_code = 200
+        mock_get.return_value.headers = {}
         
         updated_games = espn_api.update_game_scores(week=1)
         
@@ -175,9 +203,10 @@ def test_game_status_parsing(espn_api):
 
 def test_rate_limiting():
     """Test API rate limiting functionality."""
-    with patch('app.espn_api.requests.get') as mock_get:
+    with patch('app.espn_api.requests.Session.get') as mock_get:
         mock_get.return_value.json.return_value = {"week": {"number": 1}}
         mock_get.return_value.status_code = 200
+        mock_get.return_value.headers = {}
         
         api = ESPNAPI()
         
@@ -185,8 +214,184 @@ def test_rate_limiting():
         for _ in range(5):
             api.get_current_week()
         
-        # Verify rate limiting headers are respected
+        # Rate limits are response headers; the client never sends its own
         assert mock_get.call_count == 5
         for call in mock_get.call_args_list:
             headers = call.kwargs.get('headers', {})
-            assert 'X-RateLimit-Limit' in headers
+            assert not [name for name in headers if name.startswith('X-RateLimit')]
+
+def _local_api(server, limiter=None):
+    from app.espn_api import TokenBucket
+
+    api = ESPNAPI(limiter=limiter or TokenBucket(1000, 1000))
+    api.BASE_URL = server.url
+    return api
+
+def test_requests_reuse_pooled_connection(fake_espn):
+    """Successive requests, even from new instances, share one keep-alive connection."""
+    for week in range(1, 6):
+        _local_api(fake_espn).get_games(week)
+    _local_api(fake_espn).get_team_stats('KC')
+
+    assert len(fake_espn.requests) == 6
+    assert fake_espn.connections == 1
+
+def test_conditional_get_skips_parsing_on_304(fake_espn):
+    """A repeat request sends If-None-Match and reuses the parsed games on 304."""
+    api = _local_api(fake_espn)
+    first = api.get_games(3)
+    assert api.last_not_modified is False
+
+    with patch.object(ESPNAPI, '_parse_game_data') as mock_parse:
+        second = api.get_games(3)
+        mock_parse.assert_not_called()
+
+    assert api.last_not_modified is True
+    assert second == first
+    assert fake_espn.not_modified == 1
+    assert 'If-None-Match' in fake_espn.requests[-1][1]
+
+def test_conditional_get_refetches_changed_payload(fake_espn):
+    """A changed payload gets a new ETag and is parsed again."""
+    api = _local_api(fake_espn)
+    assert len(api.get_games(4)) == 16
+
+    fake_espn.games_per_week = 15
+    assert len(api.get_games(4)) == 15
+    assert api.last_not_modified is False
+    assert fake_espn.not_modified == 0
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_token_bucket_burst_then_rate():
+    """A full bucket allows a burst, then spaces requests at the refill rate."""
+    from app.espn_api import TokenBucket
+
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=3, clock=clock)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+
+    clock.now = 10
+    assert bucket.reserve() == 0.0
+
+def test_async_fetcher_matches_sync_client(fake_espn):
+    """The concurrent fetcher returns the same parsed games as get_games."""
+    from app.espn_api import AsyncESPNFetcher
+
+    fetcher = AsyncESPNFetcher(api=_local_api(fake_espn))
+    results = fetcher.backfill(range(1, 4))
+    assert sorted(results) == [1, 2, 3]
+    for week, games in results.items():
+        assert games == _local_api(fake_espn).get_games(week)
+
+    stats = asyncio.run(fetcher.fetch_team_stats(['KC', 'DET']))
+    assert stats['KC'] == {'Points Per Game': 2.0}
+
+def test_async_fetcher_reports_failed_week(fake_espn):
+    """A failing week surfaces as an ESPNAPIError naming the week."""
+    from app.espn_api import AsyncESPNFetcher, ESPNAPIError
+
+    fake_espn.status_override = (503, {})
+    fetcher = AsyncESPNFetcher(api=_local_api(fake_espn))
+    with pytest.raises(ESPNAPIError) as exc_info:
+        fetcher.backfill([7])
+    assert 'week 7' in str(exc_info.value)
+
+def test_season_backfill_matches_serial(fake_espn):
+    """A concurrent 18-week backfill returns what the serial client does, one request per week.
+
+    benchmarks/bench_espn_backfill.py compares their speed.
+    """
+    from app.espn_api import AsyncESPNFetcher, TokenBucket, clear_conditional_cache
+
+    weeks = range(1, 19)
+    clear_conditional_cache()
+    serial = {week: _local_api(fake_espn).get_games(week) for week in weeks}
+
+    clear_conditional_cache()
+    requests_before = len(fake_espn.requests)
+    fetcher = AsyncESPNFetcher(api=_local_api(fake_espn, TokenBucket(rate=200, capacity=18)))
+    assert fetcher.backfill(weeks) == serial
+    assert len(fake_espn.requests) - requests_before == 18
+
+def test_token_bucket_shared_across_instances():
+    """ESPNAPI instances created per tick draw from one process-wide bucket."""
+    from app import espn_api as espn_module
+
+    assert ESPNAPI().rate_limiter is ESPNAPI().rate_limiter is espn_module.rate_limiter
+
+def test_token_bucket_thread_safe():
+    """Concurrent reservations never hand out more than the burst without waiting."""
+    import threading
+    from app.espn_api import TokenBucket
+
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1, capacity=10, clock=clock)
+    waits = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(25):
+            wait = bucket.reserve()
+            with lock:
+                waits.append(wait)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(waits) == 200
+    assert waits.count(0.0) == 10
+    assert sorted(waits)[-1] == pytest.approx(190.0)
+    assert bucket.stats()['delayed'] == 190
+
+def test_token_bucket_honors_retry_after():
+    """A 429 with Retry-After holds every caller back."""
+    from app.espn_api import TokenBucket
+
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, capacity=10, clock=clock)
+    bucket.observe(429, {'Retry-After': '30'})
+    assert bucket.reserve() == pytest.approx(30.0)
+
+    clock.now = 31
+    assert bucket.reserve() == 0.0
+    stats = bucket.stats()
+    assert stats['throttled'] == 1
+    assert stats['max_wait_seconds'] == pytest.approx(30.0)
+
+def test_token_bucket_follows_rate_limit_headers():
+    """Remaining caps the bucket and an exhausted quota waits for the reset."""
+    from app.espn_api import TokenBucket
+
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, capacity=10, clock=clock)
+    bucket.observe(200, {'X-RateLimit-Remaining': '2'})
+    assert [bucket.reserve() for _ in range(2)] == [0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(0.1)
+
+    bucket.observe(200, {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': '12'})
+    assert bucket.reserve() == pytest.approx(12.0)
+
+def test_rate_limit_headers_from_server(fake_espn):
+    """Throttling headers on real responses feed the client's limiter."""
+    from app.espn_api import ESPNAPIError, TokenBucket
+
+    limiter = TokenBucket(rate=100, capacity=100)
+    api = _local_api(fake_espn, limiter)
+    fake_espn.status_override = (429, {'Retry-After': '5'})
+    with pytest.raises(ESPNAPIError):
+        api.get_games(1)
+
+    stats = limiter.stats()
+    assert stats['throttled'] == 1
+    assert stats['blocked_for'] > 4
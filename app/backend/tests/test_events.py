@@ -0,0 +1,177 @@
+import pytest
+import http.client
+import json
+import threading
+import time
+from unittest.mock import patch
+from werkzeug.serving import make_server
+from app import db, Game, LiveEvent, update_games
+from app.events import EventBroker, EventRelay, broker, stop_relay
+from tests.helpers import login
+
+SUBSCRIBERS = 300
+
+def _run_update_games(finished):
+    games = Game.query.filter_by(week=1).order_by(Game.id).all()
+    slate = [{
+        'espn_id': game.espn_id,
+        'week': 1,
+        'home_team': game.home_team,
+        'away_team': game.away_team,
+        'start_time': game.start_time,
+        'home_score': finished.get(game.espn_id, (None, None))[0],
+        'away_score': finished.get(game.espn_id, (None, None))[1],
+        'is_finished': game.espn_id in finished
+    } for game in games]
+    with patch('app.espn_api.ESPNAPI') as mock_api:
+        mock_api.return_value.get_scoreboard.return_value = (1, slate)
+        mock_api.return_value.last_not_modified = False
+        update_games()
+
+def _read_event(response):
+    """Read one SSE frame, skipping comments and the retry hint."""
+    fields = {}
+    while True:
+        line = response.readline().decode('utf-8')
+        if line in ('\n', ''):
+            if 'event' in fields or line == '':
+                return fields
+            continue
+        if line.startswith(':'):
+            continue
+        name, _, value = line.rstrip('\n').partition(': ')
+        fields[name] = value
+
+@pytest.fixture
+def stream_app(pool_app):
+    """The pool app with a fast relay and keepalive, stopped after the test."""
+    pool_app.config.update({'EVENT_RELAY_INTERVAL': 0.05, 'SSE_KEEPALIVE_INTERVAL': 0.2})
+    yield pool_app
+    stop_relay(pool_app)
+    pool_app.config.pop('EVENT_RELAY_INTERVAL')
+    pool_app.config.pop('SSE_KEEPALIVE_INTERVAL')
+
+def test_broker_serializes_once_for_all_subscribers():
+    """Every listener receives the same pre-formatted frame."""
+    local = EventBroker()
+    subscriptions = [local.subscribe() for _ in range(5)]
+    frame = local.publish(7, 'scores', '{"week": 1}')
+
+    assert frame == 'id: 7\nevent: scores\ndata: {"week": 1}\n\n'
+    assert all(subscription.get(timeout=0) is frame for subscription in subscriptions)
+    assert local.stats()['delivered'] == 5
+
+def test_broker_drops_slow_subscriber():
+    """A full queue disconnects that subscriber without holding up the rest."""
+    local = EventBroker(queue_size=2)
+    slow = local.subscribe()
+    fast = local.subscribe()
+
+    for event_id in range(1, 4):
+        local.publish(event_id, 'scores', '{}')
+        fast.get(timeout=0)
+
+    assert slow.closed and not fast.closed
+    assert local.stats() == {
+        'subscribers': 1, 'published': 3, 'delivered': 5, 'dropped': 1, 'last_event_id': 3
+    }
+
+def test_broker_replays_after_last_event_id():
+    local = EventBroker()
+    for event_id in range(1, 5):
+        local.publish(event_id, 'scores', '{}')
+
+    subscription = local.subscribe(last_event_id=2)
+    replayed = [subscription.get(timeout=0) for _ in range(2)]
+    assert [frame.split('\n')[0] for frame in replayed] == ['id: 3', 'id: 4']
+    assert subscription.get(timeout=0) is None
+
+def test_ingestion_records_scores_and_leaderboard_delta(pool_app):
+    """Deciding a game writes one scores event and one leaderboard delta."""
+    with pool_app.app_context():
+        _run_update_games({'401547417': (27, 20)})
+
+        events = {event.kind: json.loads(event.payload) for event in LiveEvent.query}
+        assert set(events) == {'scores', 'leaderboard'}
+        assert [game['winner'] for game in events['scores']['games']] == ['DET']
+        # Only alice's totals moved; bob picked the loser
+        assert events['leaderboard']['changes'] == [{
+            'username': 'alice', 'correct_picks': 1, 'total_picks': 3,
+            'accuracy': 33.33, 'correct_picks_change': 1
+        }]
+
+        # Re-polling the same result announces nothing new
+        _run_update_games({'401547417': (27, 20)})
+        assert LiveEvent.query.count() == 2
+
+def test_relay_publishes_new_rows_once(pool_app):
+    local = EventBroker()
+    relay = EventRelay(pool_app, local)
+    subscription = local.subscribe()
+
+    with pool_app.app_context():
+        db.session.add(LiveEvent(kind='scores', payload='{"old": true}'))
+        db.session.commit()
+        relay.poll()  # Starts from the tip; existing rows are not re-announced
+
+        db.session.add(LiveEvent(kind='scores', payload='{"week": 1}'))
+        db.session.commit()
+
+    assert relay.poll() == 1
+    assert relay.poll() == 0
+    assert 'data: {"week": 1}' in subscription.get(timeout=0)
+    assert subscription.get(timeout=0) is None
+
+def test_stream_requires_login(pool_client):
+    assert pool_client.get('/api/stream').status_code != 200
+
+def test_stream_load(stream_app):
+    """Hundreds of live subscribers all receive one ingestion's events."""
+    server = make_server('127.0.0.1', 0, stream_app, threaded=True)
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+    port = server.server_port
+
+    login_response = login(stream_app.test_client(), 'alice')
+    cookie = login_response.headers['Set-Cookie'].split(';')[0]
+
+    received = []
+    errors = []
+    connected = threading.Barrier(SUBSCRIBERS + 1, timeout=30)
+
+    def subscribe():
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        try:
+            connection.request('GET', '/api/stream', headers={'Cookie': cookie})
+            response = connection.getresponse()
+            assert response.status == 200
+            connected.wait()
+            kinds = [_read_event(response).get('event') for _ in range(2)]
+            received.append(kinds)
+        except Exception as e:
+            errors.append(e)
+            connected.abort()
+        finally:
+            connection.close()
+
+    clients = [threading.Thread(target=subscribe) for _ in range(SUBSCRIBERS)]
+    for client in clients:
+        client.start()
+    try:
+        connected.wait()
+        while broker.stats()['subscribers'] < SUBSCRIBERS:
+            time.sleep(0.01)
+        delivered_before = broker.stats()['delivered']
+
+        with stream_app.app_context():
+            _run_update_games({'401547417': (27, 20)})
+
+        for client in clients:
+            client.join(timeout=30)
+    finally:
+        server.shutdown()
+
+    assert errors == []
+    assert len(received) == SUBSCRIBERS
+    assert all(kinds == ['scores', 'leaderboard'] for kinds in received)
+    assert broker.stats()['delivered'] - delivered_before == 2 * SUBSCRIBERS
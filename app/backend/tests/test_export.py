@@ -0,0 +1,82 @@
+import pytest
+import csv
+import io
+import json
+import tracemalloc
+from app import db, Game
+from tests.helpers import login, seed_season
+
+SEASON_USERS = 100
+SEASON_WEEKS = 17
+
+def test_export_csv(pool_client):
+    login(pool_client, 'admin')
+    response = pool_client.get('/api/admin/export')
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'text/csv'
+    assert response.headers['Content-Disposition'] == 'attachment; filename="picks.csv"'
+
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert len(rows) == 5
+    assert rows[0]['username'] == 'alice' and rows[0]['picked_team'] == 'DET'
+    assert rows[0]['correct'] == '' and rows[0]['winner'] == ''
+
+def test_export_ndjson_for_one_week(pool_client, pool_app):
+    with pool_app.app_context():
+        game = Game.query.filter_by(espn_id='401547417').first()
+        game.winner = 'DET'
+        db.session.commit()
+
+    login(pool_client, 'admin')
+    response = pool_client.get('/api/admin/export?format=ndjson&week=1')
+
+    assert response.mimetype == 'application/x-ndjson'
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [(row['username'], row['picked_team'], row['correct']) for row in rows if row['espn_id'] == '401547417'] == [
+        ('alice', 'DET', True), ('bob', 'KC', False)
+    ]
+
+def test_export_rejects_unknown_format(pool_client):
+    login(pool_client, 'admin')
+    response = pool_client.get('/api/admin/export?format=xlsx')
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+def test_export_requires_admin(pool_client):
+    login(pool_client, 'alice')
+    assert pool_client.get('/api/admin/export').status_code == 403
+
+def _traced_export(client, url):
+    """Consume a streamed export; returns (bytes, peak traced bytes)."""
+    tracemalloc.start()
+    response = client.get(url, buffered=False)
+    try:
+        exported = sum(len(chunk) for chunk in response.response)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        response.close()
+    return exported, peak
+
+def test_export_memory_stays_flat(pool_client, pool_app):
+    """Exporting the season takes no more memory than exporting one week."""
+    with pool_app.app_context():
+        seed_season(SEASON_USERS, SEASON_WEEKS)
+
+    login(pool_client, 'admin')
+    week_bytes, week_peak = _traced_export(pool_client, '/api/admin/export?week=2')
+    season_bytes, season_peak = _traced_export(pool_client, '/api/admin/export')
+
+    assert season_bytes > 15 * week_bytes
+    assert season_peak < 2 * week_peak
+
+def test_export_sends_header_first(pool_client):
+    """The first chunk goes out before any pick is read."""
+    login(pool_client, 'admin')
+    response = pool_client.get('/api/admin/export', buffered=False)
+    try:
+        assert next(iter(response.response)).decode('utf-8').startswith('week,username,')
+    finally:
+        response.close()
@@ -0,0 +1,243 @@
+import pytest
+import pytz
+from unittest.mock import patch
+from datetime import datetime, timedelta
+from app import db, Game
+from app.ingest import sync_games
+from app.utils import count_queries
+
+def _espn_game(espn_id, home='GB', away='CHI', kickoff=None, scores=None):
+    kickoff = kickoff or datetime(2026, 9, 13, 17, 0, tzinfo=pytz.UTC)
+    return {
+        'espn_id': espn_id,
+        'week': 2,
+        'home_team': home,
+        'away_team': away,
+        'start_time': kickoff,
+        'home_score': scores[0] if scores else None,
+        'away_score': scores[1] if scores else None,
+        'is_finished': scores is not None
+    }
+
+def test_sync_games_inserts_new_games(pool_app):
+    """Unknown ESPN ids are inserted with naive UTC kickoff times."""
+    with pool_app.app_context():
+        result = sync_games(2, [_espn_game('500'), _espn_game('501', home='MIN', away='LAR')])
+        db.session.commit()
+
+        assert (result['inserted'], result['updated'], result['unchanged']) == (2, 0, 0)
+        game = Game.query.filter_by(espn_id='500').one()
+        assert game.week == 2
+        assert game.start_time == datetime(2026, 9, 13, 17, 0)
+        assert game.is_mnf is False
+
+def test_sync_games_skips_unchanged_rows(pool_app):
+    """A repeated slate costs one SELECT and no writes."""
+    with pool_app.app_context():
+        slate = [_espn_game(str(500 + i)) for i in range(16)]
+        sync_games(2, slate)
+        db.session.commit()
+
+        with count_queries(db.engine) as counter:
+            result = sync_games(2, slate)
+        db.session.commit()
+
+        assert (result['inserted'], result['updated'], result['unchanged']) == (0, 0, 16)
+        assert counter.count == 1
+        assert counter.statements[0][0].lstrip().upper().startswith('SELECT')
+
+def test_sync_games_updates_only_changed_rows(pool_app):
+    """Score changes are written in a single upsert and report decided games."""
+    with pool_app.app_context():
+        slate = [_espn_game(str(500 + i)) for i in range(4)]
+        sync_games(2, slate)
+        db.session.commit()
+
+        slate[1] = _espn_game('501', scores=(17, 20))
+        slate[2] = _espn_game('502', kickoff=datetime(2026, 9, 13, 20, 25, tzinfo=pytz.UTC))
+        with count_queries(db.engine) as counter:
+            result = sync_games(2, slate)
+        db.session.commit()
+
+        assert (result['inserted'], result['updated'], result['unchanged']) == (0, 2, 2)
+        writes = [statement for statement, _ in counter.statements if 'ON CONFLICT' in statement.upper()]
+        assert len(writes) == 1
+
+        decided = Game.query.filter_by(espn_id='501').one()
+        assert decided.winner == 'CHI'
+        assert (decided.final_score_home, decided.final_score_away) == (17, 20)
+        assert result['decided_game_ids'] == [decided.id]
+        assert Game.query.filter_by(espn_id='502').one().start_time == datetime(2026, 9, 13, 20, 25)
+
+def test_sync_games_derives_mnf(pool_app):
+    """The week's last Monday kickoff, US/Eastern, is its MNF game."""
+    sunday = datetime(2026, 9, 13, 17, 0, tzinfo=pytz.UTC)
+    early_monday = datetime(2026, 9, 14, 23, 0, tzinfo=pytz.UTC)  # 7 pm EDT
+    monday_night = datetime(2026, 9, 15, 0, 15, tzinfo=pytz.UTC)  # 8:15 pm EDT, Tuesday in UTC
+    with pool_app.app_context():
+        slate = [_espn_game('500', kickoff=sunday), _espn_game('501', kickoff=early_monday),
+                 _espn_game('502', kickoff=monday_night)]
+        sync_games(2, slate)
+        db.session.commit()
+        assert [game.espn_id for game in Game.query.filter_by(week=2, is_mnf=True)] == ['502']
+
+        # Flexed to Sunday: the earlier Monday game becomes the tiebreak
+        slate[2] = _espn_game('502', kickoff=sunday)
+        result = sync_games(2, slate)
+        db.session.commit()
+        assert result['updated'] == 2
+        assert [game.espn_id for game in Game.query.filter_by(week=2, is_mnf=True)] == ['501']
+
+def test_sync_games_keeps_last_favorite(pool_app):
+    """A payload without a line doesn't erase the favorite already stored."""
+    with pool_app.app_context():
+        game_data = _espn_game('401600001')
+        sync_games(2, [dict(game_data, favorite='GB')])
+        db.session.commit()
+
+        result = sync_games(2, [game_data])
+        db.session.commit()
+
+        assert result['unchanged'] == 1
+        assert Game.query.filter_by(espn_id='401600001').one().favorite == 'GB'
+
+def _mock_espn(mock_api, week, games, not_modified=False):
+    mock_api.return_value.get_scoreboard.return_value = (week, games)
+    mock_api.return_value.last_not_modified = not_modified
+    return mock_api.return_value
+
+def _slate(week):
+    return [{
+        'espn_id': game.espn_id,
+        'week': week,
+        'home_team': game.home_team,
+        'away_team': game.away_team,
+        'start_time': game.start_time,
+        'home_score': None,
+        'away_score': None,
+        'is_finished': False
+    } for game in Game.query.filter_by(week=week)]
+
+def test_plan_refreshes_unsynced_and_live_weeks(pool_app):
+    """Never-synced weeks and weeks with games on are planned; quiet synced weeks are not."""
+    from app.ingest import plan_ingestion, record_sync
+
+    with pool_app.app_context():
+        now = datetime.utcnow()
+        assert plan_ingestion(now) == {'weeks': [1], 'discover': False}
+
+        record_sync(1, now, changed=True)
+        db.session.commit()
+        assert plan_ingestion(now + timedelta(hours=1)) == {'weeks': [], 'discover': False}
+
+        first_kickoff = db.session.query(db.func.min(Game.start_time)).scalar()
+        assert plan_ingestion(first_kickoff + timedelta(minutes=5))['weeks'] == [1]
+
+def test_plan_rechecks_stale_weeks(pool_app):
+    from app.ingest import plan_ingestion, record_sync, STALE_AFTER
+
+    with pool_app.app_context():
+        now = datetime.utcnow()
+        record_sync(1, now, changed=False)
+        db.session.commit()
+        assert plan_ingestion(now + STALE_AFTER)['weeks'] == [1]
+
+def test_plan_discovers_next_slate_when_all_final(pool_app):
+    """With every game final, the current scoreboard is checked every few hours."""
+    from app.ingest import plan_ingestion, record_sync, DISCOVERY_INTERVAL
+
+    with pool_app.app_context():
+        now = datetime.utcnow()
+        Game.query.update({Game.winner: Game.home_team})
+        record_sync(1, now, changed=True)
+        db.session.commit()
+
+        assert plan_ingestion(now + timedelta(hours=1)) == {'weeks': [], 'discover': False}
+        assert plan_ingestion(now + DISCOVERY_INTERVAL) == {'weeks': [], 'discover': True}
+
+def test_update_games_single_call_for_current_week(pool_app):
+    """The current week comes from the same scoreboard call as its games."""
+    from app import update_games, WeekSync
+
+    with pool_app.app_context():
+        with patch('app.espn_api.ESPNAPI') as mock_api:
+            api = _mock_espn(mock_api, 1, _slate(1))
+            results = update_games()
+
+        api.get_scoreboard.assert_called_once_with()
+        api.get_current_week.assert_not_called()
+        assert results[1]['unchanged'] == 3
+        assert db.session.get(WeekSync, 1).last_synced_at is not None
+
+def test_update_games_skips_writes_on_not_modified(pool_app):
+    """A 304 scoreboard records the sync without diffing any rows."""
+    from app import update_games, WeekSync
+
+    with pool_app.app_context():
+        with patch('app.espn_api.ESPNAPI') as mock_api, \
+                patch('app.sync_games') as mock_sync:
+            _mock_espn(mock_api, 1, _slate(1), not_modified=True)
+            update_games()
+            mock_sync.assert_not_called()
+        sync = db.session.get(WeekSync, 1)
+        assert sync.last_synced_at is not None
+        assert sync.last_changed_at is None
+
+def test_quiet_day_outbound_calls(pool_app):
+    """A day of hourly ticks with kickoffs days away costs a couple of ESPN calls."""
+    import app as app_module
+
+    with pool_app.app_context():
+        start = datetime.utcnow()
+        calls = 0
+        for hour in range(24):
+            tick = start + timedelta(hours=hour)
+            with patch('app.espn_api.ESPNAPI') as mock_api, \
+                    patch.object(app_module, 'datetime') as mock_datetime:
+                mock_datetime.utcnow.return_value = tick
+                api = _mock_espn(mock_api, 1, _slate(1))
+                app_module.update_games()
+                calls += api.get_scoreboard.call_count
+
+        # Previously two calls per 10-minute tick: 288 a day
+        assert calls <= 2
+
+def test_failed_sync_is_not_followed_by_not_modified(pool_app, fake_espn, monkeypatch):
+    """Validators are only kept once the week is stored, so the retry gets a full payload."""
+    import app as app_module
+    from app.espn_api import ESPNAPI, clear_conditional_cache
+
+    clear_conditional_cache()
+    monkeypatch.setattr(ESPNAPI, 'BASE_URL', fake_espn.url)
+    with pool_app.app_context():
+        with patch('app.sync_games', side_effect=Exception('database is locked')):
+            assert app_module.update_games() is None
+        assert Game.query.count() == 3
+
+        results = app_module.update_games()
+        assert fake_espn.not_modified == 0
+        assert results[1]['inserted'] == 16
+        assert Game.query.count() == 19
+
+        # Once stored, the next poll is a 304 that writes nothing
+        with patch('app.plan_ingestion', return_value={'weeks': [], 'discover': True}):
+            assert app_module.update_games()[1]['unchanged'] == 16
+        assert fake_espn.not_modified == 1
+
+def test_not_modified_after_database_changed_underneath(pool_app, fake_espn, monkeypatch):
+    """A 304 is not trusted when the week's rows are not the ones this process stored."""
+    import app as app_module
+    from app.espn_api import ESPNAPI, clear_conditional_cache
+
+    clear_conditional_cache()
+    monkeypatch.setattr(ESPNAPI, 'BASE_URL', fake_espn.url)
+    with pool_app.app_context():
+        app_module.update_games()
+        # What a restore of an older backup looks like to the worker
+        Game.query.filter(Game.espn_id.like('4015%')).delete(synchronize_session=False)
+        db.session.query(app_module.WeekSync).delete()
+        db.session.commit()
+
+        results = app_module.update_games()
+        assert fake_espn.not_modified == 1
+        assert results[1]['inserted'] == 16
@@ -2,6 +2,7 @@ import pytest
 import json
 from datetime import datetime, timedelta
 from app import db, Game, Pick
+from tests.helpers import login
 
 def test_get_picks(client):
     """Test retrieving user picks."""
@@ -117,3 +118,88 @@ def test_mnf_points_required(client):
     data = json.loads(response.data)
     assert data['success'] is False
     assert 'points' in data['message'].lower()
+
+def _add_week(week, count):
+    """Add a full slate of games for a week, kicking off in a few days."""
+    kickoff = datetime.utcnow() + timedelta(days=3)
+    games = [
+        Game(espn_id=f'9{week:02d}{i:02d}', week=week, home_team=f'H{i:02d}',
+             away_team=f'A{i:02d}', start_time=kickoff + timedelta(hours=i))
+        for i in range(count)
+    ]
+    db.session.add_all(games)
+    db.session.commit()
+    return [game.id for game in games]
+
+def test_submit_full_slate_query_count(pool_client, pool_app):
+    """A 16-game submission costs a fixed number of queries, not one per pick."""
+    from app.utils import count_queries
+
+    with pool_app.app_context():
+        game_ids = _add_week(2, 16)
+        engine = db.engine
+    login(pool_client, 'alice')
+
+    payload = {'week': 2, 'picks': [{'game_id': game_id, 'team': f'H{i:02d}'}
+                                    for i, game_id in enumerate(game_ids)]}
+    with count_queries(engine) as counter:
+        response = pool_client.post('/api/picks', json=payload)
+    assert response.status_code == 200
+    selects = [s for s, _ in counter.statements if s.lstrip().upper().startswith('SELECT')]
+    # Session user, week's last change, week's games, existing picks, standings refresh
+    assert len(selects) <= 5
+
+    picks = json.loads(pool_client.get('/api/picks?week=2').data)['picks']
+    assert len(picks) == 16
+
+    # Resubmitting the same picks writes nothing
+    with count_queries(engine) as counter:
+        response = pool_client.post('/api/picks', json=payload)
+    assert response.status_code == 200
+    assert not [s for s, _ in counter.statements if 'INSERT' in s.upper()]
+
+def test_resubmit_updates_existing_picks(pool_client, pool_app):
+    """Changing a pick updates the row in place and keeps the MNF total."""
+    with pool_app.app_context():
+        mnf_game = Game.query.filter_by(is_mnf=True).one()
+        mnf_id = mnf_game.id
+    login(pool_client, 'alice')
+
+    response = pool_client.post('/api/picks', json={
+        'week': 1,
+        'picks': [{'game_id': mnf_id, 'team': 'BUF'}]
+    })
+    assert response.status_code == 200
+
+    with pool_app.app_context():
+        picks = Pick.query.filter_by(game_id=mnf_id).all()
+        assert len(picks) == 1
+        assert picks[0].picked_team == 'BUF'
+        assert picks[0].mnf_total_points == 41
+
+def test_submit_picks_rejects_games_from_other_weeks(pool_client, pool_app):
+    """Every game id must belong to the submitted week."""
+    with pool_app.app_context():
+        other_week = _add_week(2, 1)
+    login(pool_client, 'alice')
+
+    response = pool_client.post('/api/picks', json={
+        'week': 1,
+        'picks': [{'game_id': other_week[0], 'team': 'H00'}]
+    })
+    assert response.status_code == 400
+    data = json.loads(response.data)
+    assert data['success'] is False
+    assert str(other_week[0]) in data['message']
+
+def test_pick_unique_per_user_and_game(pool_app):
+    """The database refuses a second pick for the same user and game."""
+    from sqlalchemy.exc import IntegrityError
+
+    with pool_app.app_context():
+        existing = Pick.query.first()
+        db.session.add(Pick(user_id=existing.user_id, game_id=existing.game_id,
+                            picked_team=existing.picked_team, week=existing.week))
+        with pytest.raises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
@@ -0,0 +1,96 @@
+import pytest
+import re
+from unittest.mock import patch
+from app import db, Game, update_games
+from app.utils import count_queries
+from tests.helpers import login
+
+# A bare "SCAN <table>" means SQLite reads every row; "SCAN ... USING INDEX"
+# and "SEARCH ..." are fine.
+TABLE_SCAN = re.compile(r'\bSCAN (pick|game|weekly_standing|user)\b(?! USING)')
+
+def _query_plans(engine, statements):
+    """EXPLAIN QUERY PLAN every SELECT that was captured."""
+    plans = []
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        for statement, parameters in statements:
+            if not statement.lstrip().upper().startswith('SELECT'):
+                continue
+            cursor.execute(f'EXPLAIN QUERY PLAN {statement}', parameters)
+            plans.append((statement, [row[-1] for row in cursor.fetchall()]))
+    finally:
+        raw.close()
+    return plans
+
+def _assert_indexed(engine, statements):
+    plans = _query_plans(engine, statements)
+    assert plans
+    for statement, details in plans:
+        scans = [detail for detail in details if TABLE_SCAN.search(detail)]
+        assert not scans, f"{statement}\n uses a table scan: {scans}"
+
+@pytest.mark.parametrize('url', [
+    '/api/picks?week=1',
+    '/api/leaderboard?week=1',
+    '/api/stats',
+])
+def test_read_routes_use_indexes(pool_client, pool_app, url):
+    """Read endpoints only issue indexed lookups."""
+    login(pool_client, 'alice')
+    with pool_app.app_context():
+        engine = db.engine
+
+    with count_queries(engine) as counter:
+        assert pool_client.get(url).status_code == 200
+    _assert_indexed(engine, counter.statements)
+
+def test_season_leaderboard_uses_index(pool_client, pool_app):
+    """The season leaderboard walks the standings in index order."""
+    login(pool_client, 'alice')
+    with pool_app.app_context():
+        engine = db.engine
+
+    with count_queries(engine) as counter:
+        assert pool_client.get('/api/leaderboard').status_code == 200
+    plans = _query_plans(engine, counter.statements)
+    for statement, details in plans:
+        assert not [d for d in details if re.search(r'\bSCAN (pick|game|user)\b(?! USING)', d)], details
+
+def test_pick_submission_uses_indexes(pool_client, pool_app):
+    """Lock check, validation, prefetch and standings refresh are indexed."""
+    login(pool_client, 'alice')
+    with pool_app.app_context():
+        engine = db.engine
+        game_id = Game.query.filter_by(is_mnf=True).one().id
+
+    with count_queries(engine) as counter:
+        response = pool_client.post('/api/picks', json={
+            'week': 1,
+            'picks': [{'game_id': game_id, 'team': 'BUF', 'mnf_total_points': 38}]
+        })
+    assert response.status_code == 200
+    _assert_indexed(engine, counter.statements)
+
+def test_game_ingestion_uses_indexes(pool_app):
+    """Ingestion diffing and the decided-game standings refresh are indexed."""
+    with pool_app.app_context():
+        engine = db.engine
+        slate = [{
+            'espn_id': game.espn_id,
+            'week': game.week,
+            'home_team': game.home_team,
+            'away_team': game.away_team,
+            'start_time': game.start_time,
+            'home_score': 24,
+            'away_score': 10,
+            'is_finished': True
+        } for game in Game.query.filter_by(week=1)]
+
+        with patch('app.espn_api.ESPNAPI') as mock_api:
+            mock_api.return_value.get_scoreboard.return_value = (1, slate)
+            mock_api.return_value.last_not_modified = False
+            with count_queries(engine) as counter:
+                update_games()
+    _assert_indexed(engine, counter.statements)
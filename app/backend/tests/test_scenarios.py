@@ -0,0 +1,95 @@
+import pytest
+import numpy as np
+from unittest.mock import patch
+from app import db, Game
+from app.scenarios import simulate, week_scenarios
+from tests.helpers import login, pick_matrix
+
+def _decide(espn_id, winner, home_score=None, away_score=None):
+    game = Game.query.filter_by(espn_id=espn_id).one()
+    game.winner = winner
+    game.final_score_home = home_score
+    game.final_score_away = away_score
+    db.session.commit()
+
+def _by_user(result):
+    return {entry['username']: entry for entry in result['scenarios']}
+
+def test_enumerates_every_outcome(pool_app):
+    """With all three games open, alice wins 5 of 8 outcomes (ties split)."""
+    with pool_app.app_context():
+        result = week_scenarios(1)
+
+    assert (result['remaining_games'], result['outcomes'], result['method']) == (3, 8, 'enumerated')
+    scenarios = _by_user(result)
+    assert scenarios['alice']['win_probability'] == 0.625
+    assert scenarios['bob']['win_probability'] == 0.375
+    assert (scenarios['alice']['correct_picks'], scenarios['alice']['max_possible']) == (0, 3)
+    assert (scenarios['bob']['correct_picks'], scenarios['bob']['max_possible']) == (0, 2)
+    assert [entry['username'] for entry in result['scenarios']] == ['alice', 'bob']
+
+def test_decided_games_eliminate(pool_app):
+    """Once bob can no longer catch alice he is reported as eliminated."""
+    with pool_app.app_context():
+        _decide('401547417', 'DET')
+        _decide('401547418', 'NYG')
+        result = week_scenarios(1)
+
+    scenarios = _by_user(result)
+    assert result['remaining_games'] == 1
+    assert scenarios['alice']['win_probability'] == 1.0
+    assert scenarios['bob'] == {
+        'username': 'bob', 'correct_picks': 0, 'max_possible': 0,
+        'win_probability': 0.0, 'eliminated': True
+    }
+
+def test_final_mnf_breaks_ties(pool_app):
+    """A tie on picks goes to the closer MNF guess once that game is final."""
+    with pool_app.app_context():
+        _decide('401547417', 'KC')
+        _decide('401547418', 'DAL')
+        _decide('401547419', 'NYJ', 24, 20)
+        result = week_scenarios(1)
+
+    scenarios = _by_user(result)
+    assert scenarios['alice']['correct_picks'] == scenarios['bob']['correct_picks'] == 2
+    assert scenarios['alice']['win_probability'] == 1.0
+    assert scenarios['bob']['eliminated']
+
+def test_ties_split_without_tiebreak():
+    base = np.array([1, 1, 0], dtype=np.float32)
+    probabilities, outcomes, exact = simulate(base, np.zeros((3, 0), dtype=np.float32))
+    assert (outcomes, exact) == (1, True)
+    assert probabilities.tolist() == [0.5, 0.5, 0.0]
+
+def test_samples_past_enumeration_limit(pool_app):
+    """Sampling approximates the exact answer and never claims elimination."""
+    with pool_app.app_context(), patch('app.scenarios.ENUMERATION_LIMIT', 2):
+        result = week_scenarios(1, rng=np.random.default_rng(7))
+
+    scenarios = _by_user(result)
+    assert result['method'] == 'sampled'
+    assert scenarios['alice']['win_probability'] == pytest.approx(0.625, abs=0.01)
+    assert scenarios['alice']['win_probability'] + scenarios['bob']['win_probability'] == pytest.approx(1)
+    assert not any(entry['eliminated'] for entry in result['scenarios'])
+
+def test_scenarios_endpoint(pool_client):
+    assert pool_client.get('/api/scenarios?week=1').status_code == 302
+
+    login(pool_client, 'alice')
+    assert pool_client.get('/api/scenarios').status_code == 400
+
+    response = pool_client.get('/api/scenarios?week=1')
+    assert response.status_code == 200
+    assert response.get_json()['outcomes'] == 8
+
+    repeat = pool_client.get('/api/scenarios?week=1', headers={'If-None-Match': response.headers['ETag']})
+    assert repeat.status_code == 304
+
+def test_enumerates_a_full_week():
+    """Every outcome of a 16-game week for a 1000-player pool."""
+    base, swing = pick_matrix(1000, 16)
+    probabilities, outcomes, exact = simulate(base, swing)
+
+    assert exact and outcomes == 1 << 16
+    assert probabilities.sum() == pytest.approx(1)
@@ -0,0 +1,108 @@
+import pytest
+import pytz
+from datetime import datetime, timedelta
+from app import db, Game
+from app.scheduler import AdaptivePollPolicy, load_unfinished_games, simulate_schedule
+from app.worker import GameDayTrigger
+
+# Sunday 2026-09-13, 17:00 UTC kickoffs (1pm ET) and a 20:25 late window
+SUNDAY = datetime(2026, 9, 13)
+EARLY = SUNDAY + timedelta(hours=17)
+LATE = SUNDAY + timedelta(hours=20, minutes=25)
+MNF = SUNDAY + timedelta(days=2, minutes=15)
+
+def _week(week=2):
+    return [(week, EARLY)] * 3 + [(week, LATE)] * 2 + [(week, MNF)]
+
+def _count(polls, start, end):
+    return sum(1 for poll in polls if start <= poll < end)
+
+def test_polls_every_minute_during_live_games():
+    policy = AdaptivePollPolicy()
+    polls = simulate_schedule(policy, _week(), EARLY, EARLY + timedelta(hours=2))
+    assert len(polls) == 120
+
+def test_backs_off_to_hourly_between_windows():
+    """Tuesday through Saturday costs one poll an hour."""
+    policy = AdaptivePollPolicy()
+    tuesday = SUNDAY + timedelta(days=2)
+    slate = [(3, tuesday + timedelta(days=4, hours=17))]
+    polls = simulate_schedule(policy, slate, tuesday, tuesday + timedelta(days=1))
+    assert len(polls) == 24
+
+def test_wakes_up_for_pick_lock():
+    """Polling speeds up just before picks lock, two hours before the first kickoff."""
+    policy = AdaptivePollPolicy()
+    start = SUNDAY
+    polls = simulate_schedule(policy, _week(), start, EARLY)
+
+    lock = EARLY - AdaptivePollPolicy.LOCK_LEAD
+    window = lock - AdaptivePollPolicy.LOOKAHEAD
+    assert window in polls
+    assert _count(polls, start, window) == 15  # Hourly from midnight
+    # Every five minutes from 30 minutes before lock up to kickoff
+    assert _count(polls, window, EARLY) == (EARLY - window) // AdaptivePollPolicy.ACTIVE_INTERVAL
+
+def test_full_sunday_poll_budget():
+    """A whole Sunday costs a few hundred polls instead of one per minute all day."""
+    policy = AdaptivePollPolicy()
+    finished_at = {EARLY: EARLY + timedelta(hours=3, minutes=10), LATE: LATE + timedelta(hours=3, minutes=20)}
+
+    def on_poll(now, games):
+        # Games drop out of the unfinished set once ESPN reports them final
+        return [(week, start) for week, start in games
+                if start not in finished_at or now < finished_at[start]]
+
+    polls = simulate_schedule(policy, _week(), SUNDAY, SUNDAY + timedelta(days=1), on_poll)
+    # Every minute while games are on the field...
+    assert _count(polls, EARLY, finished_at[EARLY]) == 190
+    assert _count(polls, LATE, finished_at[LATE]) == 200
+    # ...and every five between the early games going final and the late kickoff
+    assert _count(polls, finished_at[EARLY] + timedelta(minutes=1), LATE) == 2
+    # After the late games are final, back to hourly
+    assert _count(polls, finished_at[LATE] + timedelta(minutes=5), SUNDAY + timedelta(days=1)) <= 4
+    assert len(polls) < 24 * 60 / 3
+
+def test_finished_weeks_do_not_keep_polling():
+    """With every game final, the poller idles at the hourly cadence."""
+    policy = AdaptivePollPolicy()
+    polls = simulate_schedule(policy, [], EARLY, EARLY + timedelta(hours=6))
+    assert len(polls) == 6
+
+def test_overdue_games_keep_active_cadence():
+    """A game past its expected end but not final is still checked regularly."""
+    policy = AdaptivePollPolicy()
+    now = EARLY + timedelta(hours=6)
+    assert policy.next_delay(now, [(2, EARLY)]) == AdaptivePollPolicy.ACTIVE_INTERVAL
+
+def test_abandoned_games_stop_keeping_the_poller_active():
+    """A game still unfinished a day after kickoff (postponed, cancelled) falls back to hourly."""
+    policy = AdaptivePollPolicy()
+    now = EARLY + AdaptivePollPolicy.OVERDUE_LIMIT
+    assert policy.next_delay(now, [(2, EARLY)]) == AdaptivePollPolicy.IDLE_INTERVAL
+    polls = simulate_schedule(policy, [(2, EARLY)], now, now + timedelta(days=2))
+    assert len(polls) == 48
+
+def test_trigger_uses_stored_schedule(pool_app):
+    """The APScheduler trigger reads unfinished games from the database."""
+    with pool_app.app_context():
+        games = load_unfinished_games()
+        assert len(games) == Game.query.count()
+
+        first_kickoff = min(start for _, start in games)
+        now = pytz.UTC.localize(first_kickoff + timedelta(minutes=10))
+        trigger = GameDayTrigger(load_unfinished_games)
+        assert trigger.get_next_fire_time(None, now) == now + AdaptivePollPolicy.LIVE_INTERVAL
+
+        Game.query.update({Game.winner: Game.home_team})
+        db.session.commit()
+        assert load_unfinished_games() == []
+        assert trigger.get_next_fire_time(None, now) == now + AdaptivePollPolicy.IDLE_INTERVAL
+
+def test_trigger_falls_back_when_schedule_unavailable():
+    def broken_source():
+        raise RuntimeError('database unavailable')
+
+    now = pytz.UTC.localize(EARLY)
+    trigger = GameDayTrigger(broken_source)
+    assert trigger.get_next_fire_time(None, now) == now + AdaptivePollPolicy.ACTIVE_INTERVAL
@@ -0,0 +1,224 @@
+import pytest
+import json
+from datetime import datetime
+from unittest.mock import patch
+from app import db, Game, Pick, User, WeeklyStanding, update_games
+from app.standings import check_standings, rebuild_standings, refresh_standings, season_standings, week_standings
+from tests.helpers import login, seed_standings
+
+def _scoreboard(week, finished):
+    """ESPN game dicts for the seeded week, with the given games final."""
+    games = Game.query.filter_by(week=week).order_by(Game.id).all()
+    return [{
+        'espn_id': game.espn_id,
+        'week': week,
+        'home_team': game.home_team,
+        'away_team': game.away_team,
+        'start_time': game.start_time,
+        'home_score': finished.get(game.espn_id, (None, None))[0],
+        'away_score': finished.get(game.espn_id, (None, None))[1],
+        'is_finished': game.espn_id in finished
+    } for game in games]
+
+def _run_update_games(week, finished):
+    with patch('app.espn_api.ESPNAPI') as mock_api:
+        mock_api.return_value.get_scoreboard.return_value = (week, _scoreboard(week, finished))
+        mock_api.return_value.last_not_modified = False
+        update_games()
+
+def _ingest(week, finished):
+    """Ingest a scoreboard for the week directly, whatever the poll plan says"""
+    from app import _ingest_week
+    return _ingest_week(week, _scoreboard(week, finished), False, datetime.utcnow())
+
+def test_update_games_refreshes_standings(pool_app):
+    """Finalizing a game updates the standings of users who picked it."""
+    with pool_app.app_context():
+        _run_update_games(1, {'401547417': (27, 20)})
+
+        rows = {row.user_id: row for row in WeeklyStanding.query.filter_by(week=1)}
+        alice = next(row for row in rows.values() if row.user.username == 'alice')
+        bob = next(row for row in rows.values() if row.user.username == 'bob')
+        assert (alice.correct_picks, alice.total_picks) == (1, 3)
+        assert (bob.correct_picks, bob.total_picks) == (0, 2)
+        assert check_standings() == []
+
+def test_unchanged_winner_does_not_touch_standings(pool_app):
+    """Re-polling an already decided game leaves standings rows alone."""
+    with pool_app.app_context():
+        _ingest(1, {'401547417': (27, 20)})
+        before = {(row.user_id, row.week): row.updated_at for row in WeeklyStanding.query}
+
+        with patch('app.standings.refresh_standings') as mock_refresh:
+            _ingest(1, {'401547417': (27, 20)})
+            mock_refresh.assert_not_called()
+
+        after = {(row.user_id, row.week): row.updated_at for row in WeeklyStanding.query}
+        assert before == after
+
+def test_corrected_mnf_score_refreshes_tiebreak(pool_app):
+    """A final score corrected without changing the winner still moves the MNF distance."""
+    with pool_app.app_context():
+        _ingest(1, {'401547419': (24, 20)})
+        alice = User.query.filter_by(username='alice').one()
+        assert db.session.get(WeeklyStanding, (alice.id, 1)).mnf_distance == 3
+
+        _ingest(1, {'401547419': (27, 20)})
+        assert db.session.get(WeeklyStanding, (alice.id, 1)).mnf_distance == 6
+        assert check_standings() == []
+
+def test_pick_submission_refreshes_standings(pool_client, pool_app):
+    """Saving picks keeps the submitting user's total in step."""
+    login(pool_client, 'bob')
+    with pool_app.app_context():
+        mnf_game = Game.query.filter_by(is_mnf=True).first()
+        game_id = mnf_game.id
+
+    response = pool_client.post('/api/picks', json={
+        'week': 1,
+        'picks': [{'game_id': game_id, 'team': 'BUF', 'mnf_total_points': 44}]
+    })
+    assert response.status_code == 200
+
+    with pool_app.app_context():
+        assert check_standings() == []
+
+def test_check_standings_reports_drift(pool_app):
+    """The consistency check flags rows that disagree with the picks table."""
+    with pool_app.app_context():
+        row = WeeklyStanding.query.first()
+        row.correct_picks += 5
+        db.session.commit()
+
+        mismatches = check_standings()
+        assert len(mismatches) == 1
+        assert mismatches[0]['user_id'] == row.user_id
+        assert mismatches[0]['actual'][0] == mismatches[0]['expected'][0] + 5
+
+        rebuild_standings()
+        assert check_standings() == []
+
+def test_refresh_standings_drops_users_without_picks(pool_app):
+    """A user whose picks for a week are removed loses the standings row."""
+    with pool_app.app_context():
+        row = WeeklyStanding.query.first()
+        user_id, week = row.user_id, row.week
+        Pick.query.filter_by(user_id=user_id, week=week).delete()
+        refresh_standings(week, [user_id])
+        db.session.commit()
+
+        assert WeeklyStanding.query.filter_by(user_id=user_id).count() == 0
+        assert check_standings() == []
+
+def test_leaderboard_reads_standings(pool_client, pool_app):
+    """The leaderboard is served from the standings table."""
+    with pool_app.app_context():
+        _run_update_games(1, {'401547417': (27, 20), '401547418': (10, 24)})
+
+    login(pool_client, 'alice')
+    response = pool_client.get('/api/leaderboard?week=1')
+    assert response.status_code == 200
+    leaderboard = json.loads(response.data)['leaderboard']
+    assert [entry['username'] for entry in leaderboard] == ['alice', 'bob']
+    assert leaderboard[0]['correct_picks'] == 2
+    assert leaderboard[1]['correct_picks'] == 1
+
+    response = pool_client.get('/api/leaderboard')
+    season = json.loads(response.data)['leaderboard']
+    shared = ('rank', 'username', 'correct_picks', 'total_picks', 'accuracy')
+    assert [{key: entry[key] for key in shared} for entry in season] == \
+        [{key: entry[key] for key in shared} for entry in leaderboard]
+
+def test_rebuild_standings_command(pool_app):
+    """The CLI rebuild and check commands agree with the live aggregation."""
+    runner = pool_app.test_cli_runner()
+    with pool_app.app_context():
+        WeeklyStanding.query.delete()
+        db.session.commit()
+
+    result = runner.invoke(args=['check-standings'])
+    assert result.exit_code == 1
+
+    result = runner.invoke(args=['rebuild-standings'])
+    assert result.exit_code == 0
+    assert 'Rebuilt 2 standings rows' in result.output
+
+    result = runner.invoke(args=['check-standings'])
+    assert result.exit_code == 0
+
+def _add_tied_players():
+    """carol copies bob's picks; dave gets both early games wrong."""
+    games = {game.espn_id: game for game in Game.query}
+    carol = User(username='carol', first_login=False)
+    dave = User(username='dave', first_login=False)
+    db.session.add_all([carol, dave])
+    db.session.flush()
+    db.session.add_all([
+        Pick(user_id=carol.id, game_id=games['401547417'].id, picked_team='KC', week=1),
+        Pick(user_id=carol.id, game_id=games['401547418'].id, picked_team='DAL', week=1),
+        Pick(user_id=dave.id, game_id=games['401547417'].id, picked_team='DET', week=1),
+        Pick(user_id=dave.id, game_id=games['401547418'].id, picked_team='NYG', week=1),
+    ])
+    db.session.commit()
+    rebuild_standings()
+
+def test_mnf_tiebreak_and_dense_ranks(pool_app):
+    """Equal correct picks are split by MNF distance; exact ties share a dense rank."""
+    with pool_app.app_context():
+        _add_tied_players()
+        # KC and DAL win; NYJ win the MNF game 20-17, alice guessed 41 points
+        _run_update_games(1, {'401547417': (17, 24), '401547418': (10, 24), '401547419': (20, 17)})
+        assert check_standings() == []
+
+        week = week_standings(1)
+        season = season_standings()
+
+    assert week['complete'] is True
+    assert week['winners'] == ['alice']
+    assert [(entry['rank'], entry['username'], entry['correct_picks'], entry['mnf_distance'])
+            for entry in week['standings']] == [
+        (1, 'alice', 2, 4),
+        (2, 'bob', 2, None),
+        (2, 'carol', 2, None),
+        (3, 'dave', 0, None),
+    ]
+    assert [(entry['rank'], entry['username'], entry['weekly_wins']) for entry in season['standings']] == [
+        (1, 'alice', 1),
+        (2, 'bob', 0),
+        (2, 'carol', 0),
+        (3, 'dave', 0),
+    ]
+    assert season['weekly_winners'] == [{'week': 1, 'winners': ['alice']}]
+
+def test_incomplete_week_has_no_winner(pool_client, pool_app):
+    """Ranks are live during the week; the winner is named once every game is final."""
+    with pool_app.app_context():
+        _run_update_games(1, {'401547417': (27, 20)})
+
+    login(pool_client, 'alice')
+    data = json.loads(pool_client.get('/api/leaderboard?week=1').data)
+    assert data['complete'] is False
+    assert data['winners'] == []
+    assert data['leaderboard'][0]['rank'] == 1
+
+    season = json.loads(pool_client.get('/api/leaderboard').data)
+    assert season['weekly_winners'] == []
+
+def test_standings_for_a_large_pool(pool_app):
+    """A 1,000-player pool over 18 weeks is ranked in a fixed number of queries."""
+    from app.utils import count_queries
+
+    with pool_app.app_context():
+        seed_standings(1000, 18)
+        with count_queries(db.engine) as season_counter:
+            season = season_standings()
+        with count_queries(db.engine) as week_counter:
+            week = week_standings(10)
+
+    assert len(season['standings']) == 1002
+    assert [entry['week'] for entry in season['weekly_winners']] == list(range(2, 19))
+    ranks = [entry['rank'] for entry in season['standings']]
+    assert ranks == sorted(ranks) and ranks[0] == 1
+    assert len(week['standings']) == 1000 and week['winners']
+    assert len(season_counter.statements) <= 2
+    assert len(week_counter.statements) == 1
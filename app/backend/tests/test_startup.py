@@ -0,0 +1,63 @@
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP_SCRIPT = '''
+import json, logging, sys, threading, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+loaded = sorted(name for name in ('requests', 'apscheduler', 'app.espn_api', 'app.routes') if name in sys.modules)
+handlers = len(logging.getLogger().handlers)
+
+flask_app = app.create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'BACKUP_DIR': sys.argv[1]})
+with flask_app.app_context():
+    app.db.create_all()
+response = flask_app.test_client().get('/api/leaderboard')
+served = time.perf_counter()
+
+print(json.dumps({
+    'import_seconds': imported - started,
+    'first_request_seconds': served - imported,
+    'status': response.status_code,
+    'loaded': loaded,
+    'handlers': handlers,
+    'threads': threading.active_count(),
+    'late_loaded': sorted(name for name in ('requests', 'apscheduler') if name in sys.modules)
+}))
+'''
+
+def _measure_startup(tmp_path):
+    result = subprocess.run(
+        [sys.executable, '-c', STARTUP_SCRIPT, str(tmp_path / 'backups')],
+        cwd=BACKEND_DIR, capture_output=True, text=True, env=os.environ.copy()
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def test_import_is_side_effect_free(tmp_path):
+    """Importing the package configures no logging, starts no threads and skips HTTP/scheduler deps."""
+    startup = _measure_startup(tmp_path)
+    assert startup['loaded'] == []
+    assert startup['handlers'] == 0
+    assert startup['threads'] == 1
+    # Serving a request doesn't need them either; only ingestion does
+    assert startup['late_loaded'] == []
+    assert not (tmp_path / 'backups').exists()
+
+def test_startup_timings(tmp_path, record_testsuite_property):
+    """Cold import and first-request latency in a fresh interpreter, tracked per run.
+
+    The timings go into the test report (e.g. `--junitxml`) rather than an
+    assertion, so CI can chart them without failing on a slow machine;
+    benchmarks/bench_startup.py takes the median over several runs.
+    """
+    startup = _measure_startup(tmp_path)
+    record_testsuite_property('startup_import_ms', round(startup['import_seconds'] * 1000))
+    record_testsuite_property('startup_first_request_ms', round(startup['first_request_seconds'] * 1000))
+    print(f"\nStartup: import {startup['import_seconds'] * 1000:.0f}ms, "
+          f"first request {startup['first_request_seconds'] * 1000:.0f}ms")
+    assert startup['status'] == 302  # Redirect to the login view
@@ -2,6 +2,7 @@ import pytest
 import json
 from app import db, User, Game, Pick
 from datetime import datetime, timedelta
+from tests.helpers import login
 
 def test_leaderboard_overall(client):
     """Test overall leaderboard retrieval."""
@@ -138,3 +139,80 @@ def test_leaderboard_accuracy(client, app):
     # Accuracy should be (correct_picks / total_picks) * 100
     expected_accuracy = (user_entry['correct_picks'] / user_entry['total_picks']) * 100
     assert abs(user_entry['accuracy'] - expected_accuracy) < 0.01  # Allow for floating-point imprecision
+
+def _add_pool_members(count):
+    """Add members with one pick each on every seeded game."""
+    from app.standings import rebuild_standings
+
+    games = Game.query.all()
+    for i in range(count):
+        member = User(username=f'member{i:03d}', password_hash='x', first_login=False)
+        db.session.add(member)
+        db.session.flush()
+        db.session.add_all([
+            Pick(user_id=member.id, game_id=game.id, picked_team=game.home_team, week=game.week)
+            for game in games
+        ])
+    db.session.commit()
+    rebuild_standings()
+
+@pytest.mark.parametrize('url', ['/api/leaderboard', '/api/leaderboard?week=1', '/api/stats', '/api/stats/pool'])
+def test_query_count_independent_of_pool_size(pool_client, pool_app, url):
+    """Leaderboard and stats run a fixed number of queries however big the pool is."""
+    from app.utils import count_queries
+
+    login(pool_client, 'alice')
+    with pool_app.app_context():
+        engine = db.engine
+
+    with count_queries(engine) as small_pool:
+        assert pool_client.get(url).status_code == 200
+
+    with pool_app.app_context():
+        _add_pool_members(40)
+
+    with count_queries(engine) as large_pool:
+        response = pool_client.get(url)
+    assert response.status_code == 200
+    assert large_pool.count == small_pool.count
+    # Session user, data version for the ETag, and the payload itself (the
+    # season leaderboard reads its weekly winners and stats its team
+    # breakdowns separately)
+    assert large_pool.count <= 4
+
+def test_team_breakdowns(pool_client, pool_app):
+    """Team, opponent, home/away and favorite splits of one user's picks."""
+    with pool_app.app_context():
+        game = Game.query.filter_by(espn_id='401547417').first()
+        game.winner = 'DET'
+        game.favorite = 'KC'
+        db.session.commit()
+
+    login(pool_client, 'alice')
+    data = pool_client.get('/api/stats').get_json()
+
+    assert data['team_stats'] == [
+        {'team': 'DAL', 'total_picks': 1, 'correct_picks': 0, 'accuracy': 0},
+        {'team': 'DET', 'total_picks': 1, 'correct_picks': 1, 'accuracy': 100.0},
+        {'team': 'NYJ', 'total_picks': 1, 'correct_picks': 0, 'accuracy': 0},
+    ]
+    assert [entry['team'] for entry in data['against_stats']] == ['BUF', 'KC', 'NYG']
+    assert data['home_away'] == {
+        'home': {'total_picks': 2, 'correct_picks': 1, 'accuracy': 50.0},
+        'away': {'total_picks': 1, 'correct_picks': 0, 'accuracy': 0}
+    }
+    # Only the DET game has a line; alice took the underdog
+    assert data['favorite_underdog'] == {
+        'underdog': {'total_picks': 1, 'correct_picks': 1, 'accuracy': 100.0}
+    }
+
+def test_pool_team_breakdowns(pool_client):
+    """The pool-wide variant counts every member's picks."""
+    login(pool_client, 'bob')
+    data = pool_client.get('/api/stats/pool').get_json()
+
+    assert {entry['team']: entry['total_picks'] for entry in data['team_stats']} == {
+        'DAL': 2, 'DET': 1, 'KC': 1, 'NYJ': 1
+    }
+    assert data['home_away']['away']['total_picks'] == 3
+    assert data['favorite_underdog'] == {}
@@ -0,0 +1,104 @@
+import pytest
+import subprocess
+import sys
+import os
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from app import db, SchedulerLease
+from app.worker import IngestionWorker, acquire_lease, release_lease, LEASE_NAME, LEASE_TTL
+
+class FakeScheduler:
+    def __init__(self):
+        self.jobs = []
+        self.running = False
+
+    def add_job(self, **kwargs):
+        self.jobs.append(kwargs)
+
+    def start(self):
+        self.running = True
+
+    def shutdown(self, wait=True):
+        self.running = False
+
+def test_lease_is_exclusive(pool_app):
+    """Only one holder wins while the lease is live."""
+    with pool_app.app_context():
+        now = datetime.utcnow()
+        assert acquire_lease('jobs', 'worker-a', now=now) is True
+        assert acquire_lease('jobs', 'worker-b', now=now) is False
+        # The holder renews
+        assert acquire_lease('jobs', 'worker-a', now=now + timedelta(seconds=30)) is True
+        assert acquire_lease('jobs', 'worker-b', now=now + LEASE_TTL) is False
+
+def test_lease_taken_over_after_expiry(pool_app):
+    """A standby takes over once the leader stops renewing."""
+    with pool_app.app_context():
+        now = datetime.utcnow()
+        acquire_lease('jobs', 'worker-a', now=now)
+        later = now + LEASE_TTL + timedelta(seconds=1)
+        assert acquire_lease('jobs', 'worker-b', now=later) is True
+        assert acquire_lease('jobs', 'worker-a', now=later) is False
+
+        lease = db.session.get(SchedulerLease, 'jobs')
+        assert lease.holder == 'worker-b'
+        assert lease.acquired_at == later
+
+def test_released_lease_is_free(pool_app):
+    with pool_app.app_context():
+        now = datetime.utcnow()
+        acquire_lease('jobs', 'worker-a', now=now)
+        release_lease('jobs', 'worker-a', now=now)
+        assert acquire_lease('jobs', 'worker-b', now=now) is True
+
+def test_only_leader_runs_scheduler(pool_app):
+    """Of two workers, one schedules jobs; the other takes over when it goes away."""
+    with pool_app.app_context():
+        db.session.query(SchedulerLease).delete()
+        db.session.commit()
+
+    leader = IngestionWorker(pool_app, holder='worker-a', scheduler_factory=FakeScheduler)
+    standby = IngestionWorker(pool_app, holder='worker-b', scheduler_factory=FakeScheduler)
+
+    assert leader.tick() is True
+    assert standby.tick() is False
+    assert leader.scheduler.running
+    assert standby.scheduler is None
+    assert [job['id'] for job in leader.scheduler.jobs] == ['update_games']
+
+    # Standby never writes even if its job fires
+    with patch('app.worker.update_games') as mock_update:
+        assert standby.run_update() is None
+        mock_update.assert_not_called()
+
+    leader.stop()
+    leader.run_forever(renew_interval=0)
+    assert leader.scheduler is None
+    assert standby.tick() is True
+    assert standby.scheduler.running
+
+def test_leader_stops_scheduler_when_lease_lost(pool_app):
+    worker = IngestionWorker(pool_app, holder='worker-a', scheduler_factory=FakeScheduler)
+    assert worker.tick() is True
+    scheduler = worker.scheduler
+
+    with pool_app.app_context():
+        lease = db.session.get(SchedulerLease, LEASE_NAME)
+        lease.holder = 'worker-b'
+        db.session.commit()
+
+    assert worker.tick() is False
+    assert scheduler.running is False
+    assert worker.scheduler is None
+
+def test_web_import_starts_no_scheduler():
+    """Importing the web app must not spin up scheduler threads."""
+    code = (
+        "import threading, app\n"
+        "names = [t.name for t in threading.enumerate()]\n"
+        "assert names == ['MainThread'], names\n"
+    )
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, '-c', code], cwd=backend,
+                            capture_output=True, text=True, env=os.environ.copy())
+    assert result.returncode == 0, result.stderr